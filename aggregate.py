@@ -0,0 +1,192 @@
+"""Summarize the close approaches that match a query, without materializing them.
+
+Counting the close approaches of each year, or computing the mean velocity of
+the approaches of potentially hazardous NEOs, doesn't need a `CloseApproach`
+object per match. `NEODatabase.aggregate` runs the same query plans as
+`NEODatabase.query`, but works on the rows of the matching approaches: a single
+pass over the matches sorts their rows into groups, and the values of each
+summarized column are then read straight from the storage engine into compact
+arrays, from which the `Summary` statistics are computed.
+
+The supported groupings are `GROUP_KEYS`:
+
+- "year": the year of the time of approach, as an int;
+- "month": the month of the time of approach, as a "YYYY-MM" string;
+- "neo": the primary designation of the approaching NEO;
+- "hazardous": whether the approaching NEO is potentially hazardous.
+
+The summarized columns are `SUMMARY_COLUMNS`: the approach distance (au), the
+approach velocity (km/s), and the diameter of the NEO (km), whose missing values
+(NaN) are counted but otherwise ignored.
+"""
+
+import math
+from array import array
+
+# How the matches of a query can be grouped.
+GROUP_KEYS = ("year", "month", "neo", "hazardous")
+
+# The columns whose values can be summarized, with their units.
+SUMMARY_COLUMNS = {
+    "distance": "au",
+    "velocity": "km/s",
+    "diameter": "km",
+}
+
+# The percentiles reported by default.
+DEFAULT_PERCENTILES = (50.0,)
+
+
+class Summary:
+    """Summary statistics of the values of a column for a group of approaches.
+
+    Attributes:
+        count: The number of known (non-NaN) values.
+        missing: The number of missing (NaN) values.
+        min: The smallest known value, or NaN if there are none.
+        max: The largest known value, or NaN if there are none.
+        mean: The arithmetic mean of the known values, or NaN if there are none.
+    """
+
+    __slots__ = ("count", "missing", "min", "max", "mean", "_values", "_sorted")
+
+    def __init__(self, values):
+        """Summarize a collection of values.
+
+        Args:
+            values: An array of floats, where NaN means missing.
+        """
+        present = [value for value in values if value == value]
+        self.count = len(present)
+        self.missing = len(values) - self.count
+        if present:
+            self.min, self.max = min(present), max(present)
+            self.mean = math.fsum(present) / self.count
+        else:
+            self.min = self.max = self.mean = math.nan
+        self._values = present
+        self._sorted = None
+
+    def percentile(self, q):
+        """Return a percentile of the known values.
+
+        Percentiles are interpolated linearly between the closest ranks, so the
+        50th percentile is the median.
+
+        Args:
+            q: The percentile, between 0 and 100.
+
+        Returns:
+            float: The value at that percentile, or NaN if there are no values.
+
+        Raises:
+            ValueError: If `q` isn't between 0 and 100.
+        """
+        if not 0 <= q <= 100:
+            raise ValueError(f"Percentile {q} must be between 0 and 100.")
+        if not self.count:
+            return math.nan
+        if self._sorted is None:
+            self._sorted = sorted(self._values)
+        position = (self.count - 1) * q / 100
+        lo = math.floor(position)
+        hi = min(lo + 1, self.count - 1)
+        fraction = position - lo
+        return self._sorted[lo] + (self._sorted[hi] - self._sorted[lo]) * fraction
+
+    def serialize(self, percentiles=DEFAULT_PERCENTILES):
+        """Produce a dictionary of these statistics.
+
+        Args:
+            percentiles: The percentiles to include, between 0 and 100.
+
+        Returns:
+            dict: The count, missing count, min, max, mean and percentiles.
+        """
+        result = {
+            "count": self.count,
+            "missing": self.missing,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+        }
+        for q in percentiles:
+            result[f"p{q:g}"] = self.percentile(q)
+        return result
+
+
+class Aggregate:
+    """The number of matching approaches in a group, and summaries of their columns.
+
+    Attributes:
+        count: The number of matching close approaches in the group.
+        summaries: A dictionary from column name to `Summary`.
+    """
+
+    __slots__ = ("count", "summaries")
+
+    def __init__(self, count, summaries):
+        """Create a new `Aggregate`."""
+        self.count = count
+        self.summaries = summaries
+
+    def serialize(self, percentiles=DEFAULT_PERCENTILES):
+        """Produce a dictionary of this group's statistics.
+
+        Args:
+            percentiles: The percentiles of each column to include.
+
+        Returns:
+            dict: The count, and the serialized summary of each column.
+        """
+        result = {"count": self.count}
+        for column, summary in self.summaries.items():
+            result[column] = summary.serialize(percentiles)
+        return result
+
+
+def aggregate(rows, readers, group_key=None):
+    """Summarize the values of some rows, optionally in groups.
+
+    The rows are consumed in a single pass, keeping only their row numbers (in
+    one integer array per group); each column is then read into a float array
+    per group.
+
+    Args:
+        rows: An iterable of the rows to summarize.
+        readers: A dictionary from column name to a function from an iterable of
+            rows to an iterable of their values in that column.
+        group_key: A function from a row to its group, or None for one group.
+
+    Returns:
+        dict: A mapping from each group (None without `group_key`) to its
+            `Aggregate`. Groups without any row are omitted.
+    """
+    if group_key is None:
+        grouped = {None: array("q", rows)}
+        if not grouped[None]:
+            return {}
+    else:
+        grouped = {}
+        for row in rows:
+            key = group_key(row)
+            members = grouped.get(key)
+            if members is None:
+                members = grouped[key] = array("q")
+            members.append(row)
+
+    return {
+        key: Aggregate(
+            len(members),
+            {
+                column: Summary(array("d", read(members)))
+                for column, read in readers.items()
+            },
+        )
+        for key, members in grouped.items()
+    }
+
+
+def group_order(key):
+    """Sort key that orders groups by their key, with the missing (None) group last."""
+    return (key is None, key)
@@ -0,0 +1,6 @@
+"""Let Python know that the `benchmarks/` folder is a package.
+
+Each benchmark is a module that can be run from the project root, e.g.::
+
+    $ python3 -m benchmarks.bench_dates
+"""
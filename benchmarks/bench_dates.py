@@ -0,0 +1,76 @@
+"""Benchmark the conversion of NASA calendar dates to and from datetimes.
+
+This compares `helpers.cd_to_datetime` and `helpers.datetime_to_str` with the
+`datetime.strptime`/`datetime.strftime` calls they replaced, on every `cd`
+value in a close approach data file, and then times a full `load_approaches`.
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.bench_dates [--cadfile data/cad.json] [--repeat 3]
+"""
+
+import argparse
+import datetime
+import pathlib
+import time
+
+from extract import iter_cad_rows, load_approaches
+from helpers import _cd_date, cd_to_datetime, datetime_to_str
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+
+def strptime_cd_to_datetime(calendar_date):
+    """Convert a NASA calendar date into a datetime the way we used to."""
+    return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
+
+
+def strftime_datetime_to_str(dt):
+    """Convert a datetime into a string the way we used to."""
+    return datetime.datetime.strftime(dt, "%Y-%m-%d %H:%M")
+
+
+def best_of(repeat, func, *args):
+    """Return the fastest wall time, in seconds, of several calls to a function."""
+    timings = []
+    for _ in range(repeat):
+        _cd_date.cache_clear()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dates = [cd for (cd,) in iter_cad_rows(args.cadfile, ("cd",))]
+    datetimes = [cd_to_datetime(cd) for cd in dates]
+    assert datetimes == [strptime_cd_to_datetime(cd) for cd in dates]
+    assert [datetime_to_str(dt) for dt in datetimes] == [
+        strftime_datetime_to_str(dt) for dt in datetimes
+    ]
+
+    print(f"{len(dates)} calendar dates from {args.cadfile}")
+    for label, old, new, inputs in (
+        ("parse", strptime_cd_to_datetime, cd_to_datetime, dates),
+        ("format", strftime_datetime_to_str, datetime_to_str, datetimes),
+    ):
+        before = best_of(args.repeat, lambda f, xs: [f(x) for x in xs], old, inputs)
+        after = best_of(args.repeat, lambda f, xs: [f(x) for x in xs], new, inputs)
+        print(
+            f"{label:>8}: {before:7.3f}s -> {after:7.3f}s ({before / after:4.1f}x faster)"
+        )
+
+    elapsed = best_of(1, load_approaches, args.cadfile)
+    print(f"load_approaches: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
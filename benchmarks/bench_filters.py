@@ -0,0 +1,91 @@
+"""Benchmark compiled filter predicates against per-filter method dispatch.
+
+A full scan with many criteria is timed three ways over the same close
+approaches: calling each `AttributeFilter` in turn (as `NEODatabase.query` used
+to), calling the single predicate of `filters.compile_filters`, and calling the
+compiled predicate of `columnar.ApproachColumns.matcher` on rows.
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.bench_filters [--neofile data/neos.csv] [--cadfile data/cad.json]
+"""
+
+import argparse
+import datetime
+import pathlib
+import time
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import compile_filters, create_filters
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+# A query with a criterion on every column, so that every filter runs.
+CRITERIA = {
+    "start_date": datetime.date(1900, 1, 1),
+    "end_date": datetime.date(2200, 1, 1),
+    "distance_min": 0.0,
+    "distance_max": 0.5,
+    "velocity_min": 1.0,
+    "velocity_max": 40.0,
+    "diameter_max": 100.0,
+    "hazardous": False,
+}
+
+
+def dispatch(filters, approaches):
+    """Count matching approaches by calling each filter in turn."""
+    count = 0
+    for approach in approaches:
+        for filter_obj in filters:
+            if not filter_obj(approach):
+                break
+        else:
+            count += 1
+    return count
+
+
+def timed(function, *args):
+    """Return the result of a call and how long it took, in seconds."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv"
+    )
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    args = parser.parse_args()
+
+    approaches = load_approaches(args.cadfile)
+    NEODatabase(load_neos(args.neofile), approaches)
+    columns = ApproachColumns.from_approaches(approaches)
+    NEODatabase(load_neos(args.neofile), columns)
+    filters = create_filters(**CRITERIA)
+    print(f"{len(approaches)} close approaches, {len(filters)} filters")
+
+    predicate = compile_filters(filters)
+    matches = columns.matcher(filters)
+    expected, baseline = timed(dispatch, filters, approaches)
+    for label, (count, elapsed) in (
+        ("dispatch", (expected, baseline)),
+        ("compiled", timed(lambda: sum(map(predicate, approaches)))),
+        ("columnar", timed(lambda: sum(map(matches, range(len(columns)))))),
+    ):
+        assert count == expected, (label, count, expected)
+        print(
+            f"{label:>10} {elapsed:8.3f}s {count:>8} matches "
+            f"({baseline / elapsed:4.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
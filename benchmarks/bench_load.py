@@ -0,0 +1,74 @@
+"""Benchmark loading close approaches with an increasing number of processes.
+
+The sequential, streaming parse of `extract.load_approaches` is compared with
+parallel loads by 2, 4, ... worker processes (up to the number of CPUs, at
+least 4, or `--max-workers`), into both columnar and object storage. Each parallel load is
+checked to produce the same approaches as the sequential one.
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.bench_load [--cadfile data/cad.json] [--max-workers 8]
+"""
+
+import argparse
+import os
+import pathlib
+import time
+
+from extract import load_approaches
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+
+def timed(function, *args, **kwargs):
+    """Return the result of a call and how long it took, in seconds."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def rows(approaches):
+    """Return the designation, time, distance and velocity of every approach."""
+    return [
+        (approach._designation, approach.time, approach.distance, approach.velocity)
+        for approach in approaches
+    ]
+
+
+def main():
+    """Run the benchmark and print the speedup curve."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    parser.add_argument("--max-workers", type=int, default=max(os.cpu_count() or 1, 4))
+    args = parser.parse_args()
+
+    counts = [2]
+    while counts[-1] * 2 <= args.max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] < args.max_workers:
+        counts.append(args.max_workers)
+
+    print(f"{os.cpu_count()} CPUs available")
+    for columnar in (True, False):
+        storage = "columnar" if columnar else "objects"
+        expected, baseline = timed(load_approaches, args.cadfile, columnar=columnar)
+        expected = rows(expected)
+        print(f"{storage:>9} {'sequential':>12} {baseline:8.2f}s")
+        for workers in counts:
+            loaded, elapsed = timed(
+                load_approaches, args.cadfile, columnar=columnar, workers=workers
+            )
+            if rows(loaded) != expected:
+                raise SystemExit(
+                    f"{storage} load with {workers} workers differs from the sequential load"
+                )
+            print(
+                f"{storage:>9} {f'{workers} workers':>12} {elapsed:8.2f}s "
+                f"({baseline / elapsed:4.2f}x faster)"
+            )
+
+
+if __name__ == "__main__":
+    main()
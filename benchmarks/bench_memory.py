@@ -0,0 +1,146 @@
+"""Benchmark the memory footprint of NEOs, close approaches and whole databases.
+
+The footprint of an object graph is measured by walking everything reachable
+from it with `gc.get_referents` and summing `sys.getsizeof`, counting shared
+objects (such as interned strings) once. This is compared across:
+
+- "legacy": the original `__dict__`-based models, reproduced below;
+- "slots": the current slotted models, with a `datetime` per approach;
+- "compact": the slotted models, with integer timestamps;
+- "columnar": the `columnar.ApproachColumns` storage engine.
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.bench_memory [--neofile data/neos.csv] [--cadfile data/cad.json]
+"""
+
+import argparse
+import csv
+import gc
+import pathlib
+import sys
+import types
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import APPROACH_FIELDS, NEO_FIELDS, iter_cad_rows
+from helpers import cd_to_datetime
+from models import CloseApproach, NearEarthObject
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+# Shared objects that shouldn't be attributed to any one object graph.
+_SKIP = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+
+class LegacyNearEarthObject:
+    """The original, `__dict__`-based near-Earth object model."""
+
+    def __init__(self, designation, name, diameter, hazardous):
+        """Create a new LegacyNearEarthObject."""
+        self.designation = str(designation) if designation else ""
+        self.name = name if name and name.strip() else None
+        self.diameter = (
+            float(diameter) if diameter and str(diameter).strip() else float("nan")
+        )
+        self.hazardous = bool(hazardous)
+        self.approaches = []
+
+
+class LegacyCloseApproach:
+    """The original, `__dict__`-based close approach model."""
+
+    def __init__(self, designation, time, distance, velocity):
+        """Create a new LegacyCloseApproach."""
+        self._designation = str(designation) if designation else ""
+        self.time = cd_to_datetime(time) if time else None
+        self.distance = float(distance) if distance else 0.0
+        self.velocity = float(velocity) if velocity else 0.0
+        self.neo = None
+
+
+def footprint(root):
+    """Return the total size in bytes of all objects reachable from `root`."""
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIP):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+        # Instance dictionaries aren't always reported as referents.
+        instance_dict = getattr(obj, "__dict__", None)
+        if isinstance(instance_dict, dict):
+            stack.append(instance_dict)
+    return total
+
+
+def read_rows(neo_csv_path, cad_json_path):
+    """Read the raw fields used to build NEOs and close approaches."""
+    with open(neo_csv_path, encoding="utf-8", newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        des, name, diameter, pha = (header.index(field) for field in NEO_FIELDS)
+        neo_rows = [
+            (row[des], row[name] or None, row[diameter] or None, row[pha] == "Y")
+            for row in reader
+            if row
+        ]
+    cad_rows = list(iter_cad_rows(cad_json_path, APPROACH_FIELDS))
+    return neo_rows, cad_rows
+
+
+def build(variant, neo_rows, cad_rows):
+    """Build the NEOs and close approaches of one variant from raw rows."""
+    if variant == "legacy":
+        neos = [LegacyNearEarthObject(*row) for row in neo_rows]
+        return neos, [LegacyCloseApproach(*row) for row in cad_rows]
+    neos = [NearEarthObject(*row) for row in neo_rows]
+    compact = variant != "slots"
+    approaches = [CloseApproach(*row, compact_time=compact) for row in cad_rows]
+    if variant == "columnar":
+        approaches = ApproachColumns.from_approaches(approaches)
+    return neos, approaches
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv"
+    )
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    args = parser.parse_args()
+
+    neo_rows, cad_rows = read_rows(args.neofile, args.cadfile)
+    print(f"{len(neo_rows)} NEOs and {len(cad_rows)} close approaches")
+    print(f"{'variant':>10} {'per NEO':>10} {'per approach':>14} {'database':>12}")
+
+    baseline = None
+    for variant in ("legacy", "slots", "compact", "columnar"):
+        neos, approaches = build(variant, neo_rows, cad_rows)
+        if variant == "columnar":
+            per_approach = footprint(approaches) / len(approaches)
+        else:
+            per_approach = sum(map(footprint, approaches[:10_000])) / min(
+                len(approaches), 10_000
+            )
+        per_neo = sum(map(footprint, neos[:10_000])) / min(len(neos), 10_000)
+
+        database = NEODatabase(neos, approaches)
+        total = footprint(database) / 2**20
+        baseline = baseline or total
+        print(
+            f"{variant:>10} {per_neo:>9.0f}B {per_approach:>13.0f}B "
+            f"{total:>9.1f}MiB ({baseline / total:3.1f}x smaller)"
+        )
+        del neos, approaches, database
+
+
+if __name__ == "__main__":
+    main()
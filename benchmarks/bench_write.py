@@ -0,0 +1,130 @@
+"""Benchmark exporting every close approach to an output file.
+
+The original CSV writer, reproduced below, serializes each approach to a nested
+dictionary, flattens it into another dictionary and writes it with a
+`csv.DictWriter`. The current `write.write_to_csv` writes flat tuples from
+`serialize_row` in batches.
+
+The original JSON writers, also reproduced below, call `json.dump` with
+indentation for each approach (and the streaming one flushes the file after
+each of them). The current ones encode batches of records with a shared
+`json.JSONEncoder` and write them through a large buffer.
+
+The writers of each format export the full data set, and their outputs are
+checked to be byte-identical.
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.bench_write [--neofile data/neos.csv] [--cadfile data/cad.json]
+"""
+
+import argparse
+import csv
+import filecmp
+import json
+import pathlib
+import tempfile
+import time
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from write import CSV_FIELDS, write_to_csv, write_to_json, write_to_json_streaming
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+
+def legacy_write_to_csv(results, filename):
+    """Write close approaches to a CSV file like the original writer."""
+    with open(filename, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for approach in results:
+            data = approach.serialize()
+            writer.writerow(
+                {
+                    "datetime_utc": data["datetime_utc"],
+                    "distance_au": data["distance_au"],
+                    "velocity_km_s": data["velocity_km_s"],
+                    "designation": data["neo"]["designation"],
+                    "name": data["neo"]["name"],
+                    "diameter_km": data["neo"]["diameter_km"],
+                    "potentially_hazardous": data["neo"]["potentially_hazardous"],
+                }
+            )
+
+
+def legacy_write_to_json(results, filename, flush=False):
+    """Write close approaches to a JSON file like the original writers."""
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write("[\n")
+        first = True
+        for approach in results:
+            if not first:
+                file.write(",\n")
+            first = False
+            json.dump(approach.serialize(), file, indent=2, separators=(",", ": "))
+            if flush:
+                file.flush()
+        file.write("\n]")
+
+
+def legacy_write_to_json_streaming(results, filename):
+    """Write close approaches to a JSON file like the original streaming writer."""
+    legacy_write_to_json(results, filename, flush=True)
+
+
+def compare(label, writers, approaches, directory):
+    """Time each writer over the same approaches and check their outputs match."""
+    baseline = reference = None
+    for name, write in writers:
+        path = directory / f"{name}.out"
+        start = time.perf_counter()
+        write(approaches, path)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            baseline, reference = elapsed, path
+        identical = filecmp.cmp(reference, path, shallow=False)
+        print(
+            f"{label:>6} {name:>17} {elapsed:8.3f}s {path.stat().st_size / 2**20:7.1f}MiB "
+            f"({baseline / elapsed:4.1f}x faster, "
+            f"{'identical' if identical else 'DIFFERENT'})"
+        )
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv"
+    )
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    args = parser.parse_args()
+
+    approaches = load_approaches(args.cadfile)
+    NEODatabase(load_neos(args.neofile), approaches)
+    print(f"Exporting {len(approaches)} close approaches")
+
+    with tempfile.TemporaryDirectory() as directory:
+        compare(
+            "csv",
+            (("legacy", legacy_write_to_csv), ("current", write_to_csv)),
+            approaches,
+            pathlib.Path(directory),
+        )
+        compare(
+            "json",
+            (
+                ("legacy", legacy_write_to_json),
+                ("streaming", legacy_write_to_json_streaming),
+                ("current", write_to_json),
+                ("current-streaming", write_to_json_streaming),
+            ),
+            approaches,
+            pathlib.Path(directory),
+        )
+
+
+if __name__ == "__main__":
+    main()
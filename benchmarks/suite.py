@@ -0,0 +1,421 @@
+"""Time and memory-profile the hot paths of the project, and catch regressions.
+
+The suite runs a fixed set of cases against one dataset:
+
+- "load_neos", and "load_approaches" into object and columnar storage;
+- "init", building an `NEODatabase` (linking, indexes, statistics) for each storage;
+- "query", a few representative filter combinations (and a top-k query) for
+  each storage, with the query cache disabled and every result consumed;
+- "write_csv" and "write_json", exporting the first `EXPORT_ROWS` approaches.
+
+Each case is prepared by an untimed setup step, then run `--repeat` times; the
+best and median wall times are recorded. Each case is then run once more under
+`tracemalloc`, to record the peak memory allocated while it runs.
+
+The dataset is either the real `data/` files (or `--neofile`/`--cadfile`), or
+synthetic files of `--synthetic N` close approaches generated by
+`benchmarks.synthetic` into a temporary directory.
+
+Results are printed as a table, and written as JSON with `--output`. A baseline
+file holds the results of earlier runs, one per dataset: with `--compare`, each
+case is compared to the baseline of the same dataset, and cases that became
+slower than `--tolerance` allows, or allocate more memory at their peak than
+`--memory-tolerance` allows, are reported as regressions, with an exit status
+of 1. With `--save`, the results become the baseline of their dataset.
+Timings depend on the machine, so a baseline is only meaningful on the machine
+that recorded it: no baseline is kept in the repository, and each machine
+records its own (`benchmarks/baseline.json` is ignored by git).
+
+To run this benchmark from the project root, run::
+
+    $ python3 -m benchmarks.suite [--synthetic 100000] [--repeat 3] [--only query]
+    $ python3 -m benchmarks.suite --compare [--baseline benchmarks/baseline.json]
+    $ python3 -m benchmarks.suite --save --output results.json
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+from benchmarks.synthetic import generate
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from write import write_to_csv, write_to_json
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+DEFAULT_BASELINE = PROJECT_ROOT / "benchmarks" / "baseline.json"
+
+# The version of the layout of result documents.
+RESULTS_VERSION = 1
+
+# Representative queries: the `create_filters` criteria, and the other
+# arguments of `NEODatabase.query`.
+QUERIES = {
+    "date": ({"date": datetime.date(2020, 1, 1)}, {}),
+    "year_near": (
+        {
+            "start_date": datetime.date(2020, 1, 1),
+            "end_date": datetime.date(2020, 12, 31),
+            "distance_max": 0.1,
+        },
+        {},
+    ),
+    "near_fast": ({"distance_max": 0.05, "velocity_min": 20.0}, {}),
+    "hazardous_large": ({"hazardous": True, "diameter_min": 0.5}, {}),
+    "every_column": (
+        {
+            "start_date": datetime.date(1900, 1, 1),
+            "end_date": datetime.date(2200, 1, 1),
+            "distance_max": 0.5,
+            "velocity_min": 1.0,
+            "velocity_max": 40.0,
+            "diameter_max": 100.0,
+            "hazardous": False,
+        },
+        {},
+    ),
+    "top10_closest": ({}, {"sort_by": "distance", "limit": 10}),
+}
+
+# The storage engines of the load, init and query cases.
+STORAGES = ("objects", "columnar")
+
+# The number of close approaches exported by the write cases.
+EXPORT_ROWS = 50_000
+
+# Differences in time below this many seconds are never regressions.
+NOISE_FLOOR = 0.002
+
+# Differences in peak memory below this many bytes are never regressions.
+MEMORY_NOISE_FLOOR = 64 * 2**10
+
+
+class Case:
+    """A benchmark case: an untimed setup, and the function to time.
+
+    Attributes:
+        name: The name of the case, such as "query/date/columnar".
+        setup: A function returning the arguments of `run`, called before each run.
+        run: The function to time.
+    """
+
+    def __init__(self, name, run, setup=tuple):
+        """Create a new `Case`."""
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+
+def consume(iterable):
+    """Exhaust an iterable, and return how many items it produced."""
+    return sum(1 for _ in iterable)
+
+
+def make_cases(neofile, cadfile, workdir):
+    """Build the benchmark cases for a dataset.
+
+    The approaches, databases and results that cases need are only built (and
+    cached) by the setup of the first case that needs them, so running a few
+    cases doesn't pay for loading everything.
+
+    Args:
+        neofile: The path of the NEO data file.
+        cadfile: The path of the close approach data file.
+        workdir: A directory in which to write exported files.
+
+    Returns:
+        list: The cases, in the order they should run.
+    """
+    workdir = pathlib.Path(workdir)
+
+    @functools.cache
+    def approaches(storage):
+        return load_approaches(cadfile, columnar=storage == "columnar")
+
+    @functools.cache
+    def database(storage):
+        database = NEODatabase(load_neos(neofile), approaches(storage))
+        database.cache = None
+        return database
+
+    @functools.cache
+    def exported():
+        return (list(islice(database("objects").query(), EXPORT_ROWS)),)
+
+    cases = [
+        Case("load_neos", lambda: load_neos(neofile)),
+        Case("load_approaches/objects", lambda: load_approaches(cadfile)),
+        Case("load_approaches/columnar", lambda: load_approaches(cadfile, columnar=True)),
+    ]
+    for storage in STORAGES:
+        # Linking mutates the NEOs, so each run gets fresh ones.
+        cases.append(
+            Case(
+                f"init/{storage}",
+                NEODatabase,
+                setup=lambda storage=storage: (load_neos(neofile), approaches(storage)),
+            )
+        )
+    for name, (criteria, options) in QUERIES.items():
+        filters = create_filters(**criteria)
+        for storage in STORAGES:
+            cases.append(
+                Case(
+                    f"query/{name}/{storage}",
+                    lambda database, filters=filters, options=options: consume(
+                        database.query(filters, **options)
+                    ),
+                    setup=lambda storage=storage: (database(storage),),
+                )
+            )
+    cases.append(
+        Case(
+            "write_csv",
+            lambda results: write_to_csv(results, workdir / "results.csv"),
+            setup=exported,
+        )
+    )
+    cases.append(
+        Case(
+            "write_json",
+            lambda results: write_to_json(results, workdir / "results.json"),
+            setup=exported,
+        )
+    )
+    return cases
+
+
+def measure(case, repeat, memory=True):
+    """Time a case, and measure its peak memory allocation.
+
+    Args:
+        case: The `Case` to measure.
+        repeat: How many times to time the case.
+        memory: Whether to run the case once more under `tracemalloc`.
+
+    Returns:
+        dict: The best and median times in seconds, and the peak allocation in
+            bytes (None if not measured).
+    """
+    times = []
+    for _ in range(repeat):
+        args = case.setup()
+        start = time.perf_counter()
+        case.run(*args)
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            args = case.setup()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            case.run(*args)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return {"best": min(times), "median": statistics.median(times), "peak_bytes": peak}
+
+
+def run_suite(neofile, cadfile, dataset, repeat=3, only=(), memory=True, report=print):
+    """Run every selected case against a dataset.
+
+    Args:
+        neofile: The path of the NEO data file.
+        cadfile: The path of the close approach data file.
+        dataset: A label identifying the dataset, such as "real".
+        repeat: How many times to time each case.
+        only: Substrings of the names of the cases to run; empty for every case.
+        memory: Whether to measure the peak memory allocation of each case.
+        report: A function called with a line of text as each case finishes.
+
+    Returns:
+        dict: A JSON-serializable document of the results.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in make_cases(neofile, cadfile, workdir):
+            if only and not any(part in case.name for part in only):
+                continue
+            results[case.name] = measure(case, repeat, memory)
+            report(format_result(case.name, results[case.name]))
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": dataset,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def format_result(name, result, reference=None):
+    """Format the result of a case on one line, compared to a reference if any."""
+    peak = result["peak_bytes"]
+    line = (
+        f"{name:<32} {result['best'] * 1e3:10.2f}ms {result['median'] * 1e3:10.2f}ms "
+        f"{'-' if peak is None else f'{peak / 2**20:.1f}MiB':>10}"
+    )
+    if reference is not None:
+        line += f"  {result['best'] / reference['best']:5.2f}x baseline"
+        if peak is not None and reference["peak_bytes"]:
+            line += f"  {peak / reference['peak_bytes']:5.2f}x peak"
+    return line
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Find the cases that became slower, or use more memory, than a baseline allows.
+
+    Peak memory is only compared for the cases measured in both runs.
+
+    Args:
+        results: The `results` of a run, by case name.
+        baseline: The `results` of the baseline run, by case name.
+        tolerance: The allowed relative slowdown, such as 0.25 for 25%.
+        memory_tolerance: The allowed relative growth of the peak allocation.
+
+    Returns:
+        list: The (name, measure) of each regression, where the measure is
+            "best" or "peak_bytes".
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        slower = result["best"] - reference["best"]
+        if slower > NOISE_FLOOR and result["best"] > reference["best"] * (1 + tolerance):
+            regressions.append((name, "best"))
+        peak, reference_peak = result["peak_bytes"], reference["peak_bytes"]
+        if peak is None or reference_peak is None:
+            continue
+        if (
+            peak - reference_peak > MEMORY_NOISE_FLOOR
+            and peak > reference_peak * (1 + memory_tolerance)
+        ):
+            regressions.append((name, "peak_bytes"))
+    return regressions
+
+
+def load_baselines(path):
+    """Read a baseline file, as a dictionary from dataset to results document."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    """Run the benchmark suite, then report, store and compare its results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv"
+    )
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="N",
+        help="Benchmark a synthetic dataset of N close approaches instead.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The synthetic dataset's seed.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        help="Only run the cases whose name contains this text; may be repeated.",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Skip the tracemalloc measurements."
+    )
+    parser.add_argument("--output", type=pathlib.Path, help="Write the results as JSON.")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare the results to the baseline."
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Store the results as the baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="The relative slowdown reported as a regression (default 0.25).",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.10,
+        help="The relative growth of peak memory reported as a regression "
+        "(default 0.10).",
+    )
+    args = parser.parse_args()
+
+    print(f"{'case':<32} {'best':>12} {'median':>12} {'peak':>10}")
+    with tempfile.TemporaryDirectory() as datadir:
+        if args.synthetic is not None:
+            dataset = f"synthetic-{args.synthetic}-seed{args.seed}"
+            neofile, cadfile = generate(datadir, args.synthetic, args.seed)
+        else:
+            dataset = "real" if args.cadfile == parser.get_default("cadfile") else str(args.cadfile)
+            neofile, cadfile = args.neofile, args.cadfile
+        document = run_suite(
+            neofile, cadfile, dataset, args.repeat, args.only, not args.no_memory
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2)
+
+    baselines = load_baselines(args.baseline)
+    status = 0
+    if args.compare:
+        reference = baselines.get(dataset)
+        if reference is None:
+            print(f"No baseline for dataset {dataset!r} in {args.baseline}.")
+        else:
+            print(f"\nCompared to the baseline of {reference['created']}:")
+            for name, result in document["results"].items():
+                if name in reference["results"]:
+                    print(format_result(name, result, reference["results"][name]))
+            regressions = compare(
+                document["results"],
+                reference["results"],
+                args.tolerance,
+                args.memory_tolerance,
+            )
+            if regressions:
+                described = ", ".join(f"{name} ({measure})" for name, measure in regressions)
+                print(f"\n{len(regressions)} regression(s): {described}")
+                status = 1
+            else:
+                print("\nNo regressions.")
+    if args.save:
+        # Keep the baseline of the cases that weren't run this time.
+        previous = baselines.get(dataset, {}).get("results", {})
+        document["results"] = {**previous, **document["results"]}
+        baselines[dataset] = document
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baselines, file, indent=2)
+            file.write("\n")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
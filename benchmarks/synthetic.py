@@ -0,0 +1,490 @@
+"""Generate realistic synthetic NEO and close approach data files at any scale.
+
+The generated files have the exact layout of the real data files: a CSV file of
+NEOs with the columns read by `extract.load_neos` (including its optional
+columns), and a JSON file of close approaches with the same `fields` as the
+real close approach data, sorted by time. They can be compressed with any
+codec of `compression`.
+
+Values are drawn so that their distributions match those of the real data. The
+`fit` function summarizes the real files as a model - the quantiles of each
+numeric attribute, the number of approaches per NEO, and the share of NEOs with
+a name, a diameter, etc. - and `DEFAULT_MODEL` holds the model fitted to the
+`data/` files. Attributes are also kept consistent: potentially hazardous NEOs
+are bright (H <= 22) and have a small MOID (<= 0.05 au), and diameters follow
+from magnitudes and albedos.
+
+The output is written as it is generated, and memory only grows with the number
+of NEOs (a few numbers each), never with the number of close approaches: the
+approach times are drawn already sorted, as successive order statistics, so a
+multi-GB file never needs to be held in memory. A given model, scale and seed
+always produce the same files.
+
+To generate a dataset from the project root, run::
+
+    $ python3 -m benchmarks.synthetic --approaches 10000000 --outdir /tmp/neo-10m [--seed 1]
+    $ python3 -m benchmarks.synthetic --approaches 1000000 --outdir /tmp/1m --compress gz
+    $ python3 -m benchmarks.synthetic --fit > model.json
+    $ python3 -m benchmarks.synthetic --approaches 100000 --outdir /tmp/f --model model.json
+"""
+
+import argparse
+import bisect
+import csv
+import datetime
+import json
+import math
+import pathlib
+import random
+import sys
+from array import array
+
+from compression import open_file
+from extract import iter_cad_rows
+from helpers import EPOCH_DAY, cd_to_datetime
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+
+# The start of the time span of close approaches. Approach times are modeled
+# as a number of days since then.
+FIRST_DAY = datetime.datetime(1900, 1, 1)
+
+# The format of approach times in close approach data, as in "2020-Jan-01 12:30".
+CD_FORMAT = "%Y-%b-%d %H:%M"
+
+# The Julian date of the Unix epoch.
+EPOCH_JD = 2440587.5
+
+# The fields of the generated close approach data, as in the real data.
+CAD_FIELDS = (
+    "des", "orbit_id", "jd", "cd", "dist", "dist_min", "dist_max",
+    "v_rel", "v_inf", "t_sigma_f", "h",
+)
+
+# The columns of the generated NEO data.
+NEO_COLUMNS = ("pdes", "name", "diameter", "pha", "H", "albedo", "moid", "class")
+
+# Hazardous NEOs are at least this bright, and pass at most this close to Earth's orbit.
+PHA_MAGNITUDE = 22.0
+PHA_MOID = 0.05
+
+# The number of quantiles in each fitted distribution.
+QUANTILES = 40
+
+# How many rows are written at once.
+BATCH_SIZE = 10_000
+
+# Letters of provisional designations: the half-month, and the order within it.
+HALF_MONTHS = "ABCDEFGHJKLMNOPQRSTUVWXY"
+ORDERS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+
+# Syllables of generated names.
+SYLLABLES = (
+    "a", "ka", "ri", "to", "me", "nos", "the", "ra", "do", "lu", "phi", "ge",
+    "sis", "mo", "an", "ver", "cer", "ba", "ty", "ion", "el", "pa", "zu", "os",
+)
+
+# The model fitted to the real `data/` files by `fit`.
+DEFAULT_MODEL = {
+    "time": [
+        0.01, 2309.06, 4627.38, 6947.49, 9200.13, 11388.34, 13561.06, 15682.14,
+        17783.81, 19805.83, 21850.55, 23814.4, 25765.49, 27713.7, 29637.04, 31531.43,
+        33395.7, 35193.94, 36871.6, 38363.32, 39657.57, 40808.7, 41841.84, 42729.65,
+        43540.2, 44410.05, 45905.22, 47517.56, 49260.52, 51056.59, 52896.99, 54764.85,
+        56664.31, 58609.3, 60550.79, 62551.01, 64588.64, 66631.42, 68742.45, 70904.09,
+        73048.87,
+    ],
+    "distance": [
+        6e-05, 0.02745, 0.048, 0.06705, 0.08519, 0.10235, 0.11852, 0.13431, 0.14918,
+        0.16345, 0.17723, 0.19056, 0.20369, 0.21626, 0.22848, 0.24007, 0.25157, 0.26296,
+        0.27415, 0.28515, 0.29604, 0.30669, 0.31723, 0.32779, 0.33827, 0.34853, 0.359,
+        0.36952, 0.37982, 0.38992, 0.40003, 0.40993, 0.41991, 0.43009, 0.44011, 0.4502,
+        0.46039, 0.47044, 0.48032, 0.49015, 0.49999,
+    ],
+    "velocity": [
+        0.0754, 3.55968, 4.58653, 5.37561, 6.02547, 6.59097, 7.11055, 7.60273, 8.08976,
+        8.57494, 9.07554, 9.56058, 10.05549, 10.54966, 11.03711, 11.51266, 11.9803,
+        12.44227, 12.89699, 13.35227, 13.81717, 14.28131, 14.7686, 15.26415, 15.77219,
+        16.28028, 16.80087, 17.34389, 17.92206, 18.51492, 19.13956, 19.7934, 20.5336,
+        21.37807, 22.30256, 23.36574, 24.61121, 26.23415, 28.47065, 32.01008, 81.05039,
+    ],
+    "approaches_per_neo": [
+        1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 3, 3, 4, 5, 5, 6, 7, 8, 8, 9, 10, 11, 12,
+        14, 15, 17, 19, 22, 25, 28, 32, 37, 43, 51, 59, 71, 91, 400,
+    ],
+    "magnitude": [
+        9.4, 17.2, 18.1, 18.6, 19.0, 19.3, 19.6, 19.9, 20.1, 20.4, 20.6, 20.8, 21.1,
+        21.3, 21.6, 21.9, 22.1, 22.4, 22.6, 22.9, 23.1, 23.393, 23.6, 23.8, 24.0, 24.2,
+        24.4, 24.6, 24.8, 25.0, 25.2, 25.4, 25.6, 25.8, 26.1, 26.3, 26.6, 27.0, 27.433,
+        28.168, 33.2,
+    ],
+    "albedo": [
+        0.009, 0.016, 0.019, 0.022, 0.025, 0.029, 0.031, 0.035, 0.039, 0.042, 0.047,
+        0.054, 0.062, 0.07, 0.079, 0.089, 0.095, 0.106, 0.117, 0.125, 0.137, 0.145,
+        0.155, 0.17, 0.18, 0.193, 0.202, 0.214, 0.225, 0.238, 0.253, 0.269, 0.289,
+        0.313, 0.331, 0.353, 0.379, 0.415, 0.459, 0.518, 0.856,
+    ],
+    "moid": [
+        0.0, 0.00069, 0.00153, 0.00262, 0.00388, 0.00538, 0.00701, 0.00908, 0.01123,
+        0.0133, 0.01579, 0.01837, 0.02101, 0.02384, 0.02702, 0.03053, 0.03423, 0.03849,
+        0.04283, 0.04766, 0.05274, 0.05853, 0.06509, 0.07213, 0.07953, 0.08818, 0.0971,
+        0.10665, 0.1171, 0.13001, 0.14274, 0.15662, 0.17165, 0.19065, 0.20961, 0.22943,
+        0.25099, 0.274, 0.29932, 0.35103, 0.70772,
+    ],
+    "orbit_id": [
+        1, 2, 3, 3, 4, 5, 5, 6, 7, 7, 8, 9, 9, 10, 11, 12, 12, 13, 14, 15, 16, 17, 18,
+        19, 21, 22, 24, 26, 28, 30, 33, 36, 40, 45, 50, 57, 69, 82, 105, 154, 1011,
+    ],
+    "share": {
+        "named": 0.01431, "numbered": 0.12175, "hazardous": 0.08783, "measured":
+        0.05032, "magnitude": 0.99195,
+    },
+    "classes": {
+        "APO": 13112, "AMO": 8849, "ATE": 1800, "JFc": 138, "HTC": 32, "IEO": 23, "JFC":
+        10, "ETc": 3,
+    },
+}
+
+
+def quantiles(values, count=QUANTILES):
+    """Return `count + 1` evenly spaced quantiles of some values, from min to max."""
+    values = sorted(values)
+    last = len(values) - 1
+    return [values[round(i * last / count)] for i in range(count + 1)]
+
+
+def fit(neo_csv_path, cad_json_path):
+    """Summarize real data files as a model for `generate`.
+
+    Args:
+        neo_csv_path: A path to a CSV file of NEOs, as read by `extract.load_neos`.
+        cad_json_path: A path to a JSON file of close approach data.
+
+    Returns:
+        dict: A JSON-serializable model, with the layout of `DEFAULT_MODEL`.
+    """
+    with open_file(neo_csv_path, encoding="utf-8", newline="") as file:
+        neos = list(csv.DictReader(file))
+    times, distances, velocities, orbits, counts = [], [], [], [], {}
+    first = FIRST_DAY.toordinal()
+    for designation, orbit_id, time, distance, velocity in iter_cad_rows(
+        cad_json_path, ("des", "orbit_id", "cd", "dist", "v_rel")
+    ):
+        moment = cd_to_datetime(time)
+        times.append(
+            moment.toordinal() - first + (moment.hour * 60 + moment.minute) / 1440
+        )
+        distances.append(float(distance))
+        velocities.append(float(velocity))
+        if orbit_id.isdigit():
+            orbits.append(int(orbit_id))
+        counts[designation] = counts.get(designation, 0) + 1
+
+    def numbers(column):
+        return [float(neo[column]) for neo in neos if neo.get(column)]
+
+    def share(condition):
+        return round(sum(map(condition, neos)) / len(neos), 5)
+
+    classes = {}
+    for neo in neos:
+        if neo.get("class"):
+            classes[neo["class"]] = classes.get(neo["class"], 0) + 1
+    return {
+        "time": [round(value, 2) for value in quantiles(times)],
+        "distance": [round(value, 5) for value in quantiles(distances)],
+        "velocity": [round(value, 5) for value in quantiles(velocities)],
+        "approaches_per_neo": quantiles(counts.values()),
+        "magnitude": quantiles(numbers("H")),
+        "albedo": quantiles(numbers("albedo")),
+        "moid": [round(value, 5) for value in quantiles(numbers("moid"))],
+        "orbit_id": quantiles(orbits),
+        "share": {
+            "named": share(lambda neo: bool(neo["name"])),
+            "numbered": share(lambda neo: neo["pdes"].isdigit()),
+            "hazardous": share(lambda neo: neo["pha"] == "Y"),
+            "measured": share(lambda neo: bool(neo.get("albedo") and neo.get("diameter"))),
+            "magnitude": share(lambda neo: bool(neo.get("H"))),
+        },
+        "classes": dict(sorted(classes.items(), key=lambda item: -item[1])),
+    }
+
+
+def sample(table, u):
+    """Draw from a distribution given by its quantiles, by inverse transform.
+
+    Args:
+        table: Evenly spaced quantiles of the distribution, from min to max.
+        u: A uniform random number in [0, 1].
+
+    Returns:
+        float: The value at quantile `u`, interpolated linearly.
+    """
+    position = u * (len(table) - 1)
+    i = min(int(position), len(table) - 2)
+    return table[i] + (table[i + 1] - table[i]) * (position - i)
+
+
+def mean(table):
+    """Return the mean of a distribution given by its quantiles, as `sample` draws it."""
+    return sum(lo + hi for lo, hi in zip(table, table[1:])) / (2 * (len(table) - 1))
+
+
+def quantile_of(table, value):
+    """Return the fraction of a distribution (given by its quantiles) below a value."""
+    i = bisect.bisect_right(table, value)
+    if i == 0:
+        return 0.0
+    if i == len(table):
+        return 1.0
+    lo, hi = table[i - 1], table[i]
+    return (i - 1 + (value - lo) / (hi - lo)) / (len(table) - 1)
+
+
+def designation(index, numbered):
+    """Return the primary designation of the NEO at an index.
+
+    The first `numbered` NEOs get a number, as in "433". The others get a
+    provisional designation, as in "2015 AB12", unique for each index.
+    """
+    if index < numbered:
+        return str(index + 1)
+    index -= numbered
+    half_month, index = HALF_MONTHS[index % 24], index // 24
+    order, index = ORDERS[index % 25], index // 25
+    year, cycle = 1980 + index % 45, index // 45
+    return f"{year} {half_month}{order}{cycle or ''}"
+
+
+def make_name(rng, taken):
+    """Return a new, pronounceable name that isn't already taken."""
+    while True:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        if name not in taken:
+            taken.add(name)
+            return name
+
+
+def write_neos(path, count, rng, model):
+    """Write the NEOs of a synthetic dataset, and return what approaches need of them.
+
+    Args:
+        path: The path of the NEO CSV file to write.
+        count: The number of NEOs.
+        rng: The `random.Random` generator.
+        model: The model of the data, as returned by `fit`.
+
+    Returns:
+        tuple: Arrays of the cumulative approach weight, the magnitude (NaN if
+            unknown), and the orbit ID of each NEO.
+    """
+    share = model["share"]
+    classes, class_weights = zip(*model["classes"].items())
+    numbered = round(count * share["numbered"])
+    pha_magnitude = quantile_of(model["magnitude"], PHA_MAGNITUDE)
+    pha_moid = quantile_of(model["moid"], PHA_MOID)
+
+    weights, magnitudes, orbits = array("d"), array("d"), array("q")
+    total, names = 0.0, set()
+    with open_file(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(NEO_COLUMNS)
+        batch = []
+        for index in range(count):
+            hazardous = rng.random() < share["hazardous"]
+            if hazardous:
+                magnitude = sample(model["magnitude"], rng.uniform(0, pha_magnitude))
+                moid = sample(model["moid"], rng.uniform(0, pha_moid))
+            else:
+                magnitude = sample(model["magnitude"], rng.random())
+                moid = sample(model["moid"], rng.random())
+                if round(magnitude, 1) <= PHA_MAGNITUDE and moid <= PHA_MOID:
+                    moid = sample(model["moid"], rng.uniform(pha_moid, 1))
+                    moid = max(moid, 1.0001 * PHA_MOID)
+            magnitude, moid = round(magnitude, 1), float(f"{moid:.5g}")
+            known = hazardous or rng.random() < share["magnitude"]
+
+            diameter = albedo = ""
+            if known and rng.random() < share["measured"]:
+                # D = 1329 km / sqrt(albedo) * 10^(-H/5)
+                albedo_value = sample(model["albedo"], rng.random())
+                diameter = f"{1329 / math.sqrt(albedo_value) * 10 ** (-magnitude / 5):.3f}"
+                albedo = f"{albedo_value:.3f}"
+
+            batch.append(
+                (
+                    designation(index, numbered),
+                    make_name(rng, names) if rng.random() < share["named"] else "",
+                    diameter,
+                    "Y" if hazardous else "N",
+                    str(magnitude) if known else "",
+                    albedo,
+                    str(moid),
+                    rng.choices(classes, class_weights)[0],
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                writer.writerows(batch)
+                batch.clear()
+
+            total += sample(model["approaches_per_neo"], rng.random())
+            weights.append(total)
+            magnitudes.append(magnitude if known else math.nan)
+            orbits.append(round(sample(model["orbit_id"], rng.random())))
+        writer.writerows(batch)
+    return weights, magnitudes, orbits
+
+
+def time_sigma(rng):
+    """Return a random 3-sigma time uncertainty, formatted as in the `t_sigma_f` field."""
+    minutes = rng.lognormvariate(0.5, 2.0)
+    if minutes < 1:
+        return "< 00:01"
+    minutes = round(minutes)
+    if minutes >= 1440:
+        return f"{minutes // 1440}_{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def write_approaches(path, count, neos, rng, model):
+    """Write the close approaches of a synthetic dataset, sorted by time.
+
+    The times are successive order statistics of `count` uniform draws,
+    mapped through the modeled distribution of times: the i-th smallest of n
+    uniform draws is derived from the previous one as
+    ``u' = 1 - (1 - u) * v ** (1 / (n - i))`` for a fresh uniform draw v.
+
+    Args:
+        path: The path of the JSON file to write.
+        count: The number of close approaches.
+        neos: The tuple returned by `write_neos`.
+        rng: The `random.Random` generator.
+        model: The model of the data, as returned by `fit`.
+    """
+    weights, magnitudes, orbits = neos
+    numbered = round(len(weights) * model["share"]["numbered"])
+    total, first = weights[-1], FIRST_DAY.toordinal()
+    epoch_offset = (first - EPOCH_DAY) * 1440
+
+    with open_file(path, "w", encoding="utf-8") as file:
+        file.write('{"signature":{"source":"benchmarks.synthetic","version":"1.1"},')
+        file.write(f'"count":"{count}","fields":{json.dumps(CAD_FIELDS)},"data":[')
+        u, batch = 0.0, []
+        for i in range(count):
+            u = 1 - (1 - u) * rng.random() ** (1 / (count - i))
+            minutes = int(sample(model["time"], u) * 1440)
+            time = FIRST_DAY + datetime.timedelta(minutes=minutes)
+            neo = bisect.bisect_right(weights, rng.random() * total)
+            neo = min(neo, len(weights) - 1)
+            distance = sample(model["distance"], rng.random())
+            spread = distance * rng.uniform(0.0001, 0.02)
+            velocity = sample(model["velocity"], rng.random())
+            magnitude = magnitudes[neo]
+            batch.append(
+                json.dumps(
+                    [
+                        designation(neo, numbered),
+                        str(orbits[neo]),
+                        f"{EPOCH_JD + (epoch_offset + minutes) / 1440:.9f}",
+                        time.strftime(CD_FORMAT),
+                        str(distance),
+                        str(max(distance - spread, 0.0)),
+                        str(distance + spread),
+                        str(velocity),
+                        str(velocity * (1 - rng.uniform(0, 0.001))),
+                        time_sigma(rng),
+                        None if math.isnan(magnitude) else str(magnitude),
+                    ],
+                    separators=(",", ":"),
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                file.write(("," if i >= len(batch) else "") + ",".join(batch))
+                batch.clear()
+        if batch:
+            file.write(("," if count > len(batch) else "") + ",".join(batch))
+        file.write("]}\n")
+
+
+def generate(directory, approaches, seed=0, neos=None, model=None, compression=None):
+    """Write a synthetic `neos.csv` and `cad.json` into a directory.
+
+    Args:
+        directory: The directory in which to write the files.
+        approaches: The number of close approaches to generate.
+        seed: The seed of the random generator.
+        neos: The number of NEOs, by default in the same proportion to the
+            number of approaches as in the model.
+        model: The model of the data, as returned by `fit`; `DEFAULT_MODEL` if None.
+        compression: A compression suffix, such as ".gz", for both files, or None.
+
+    Returns:
+        tuple: The paths of the NEO file and of the close approach file.
+    """
+    model = model or DEFAULT_MODEL
+    if neos is None:
+        neos = max(1, round(approaches / mean(model["approaches_per_neo"])))
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = compression or ""
+    neo_path = directory / f"neos.csv{suffix}"
+    cad_path = directory / f"cad.json{suffix}"
+
+    rng = random.Random(seed)
+    linked = write_neos(neo_path, neos, rng, model)
+    write_approaches(cad_path, approaches, linked, rng, model)
+    return neo_path, cad_path
+
+
+def main():
+    """Generate a synthetic dataset, or print a model fitted to real data."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approaches", type=int, help="The number of close approaches.")
+    parser.add_argument(
+        "--neos", type=int, help="The number of NEOs. Defaults to the modeled ratio."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+    parser.add_argument(
+        "--outdir", type=pathlib.Path, default=pathlib.Path("."), help="The output folder."
+    )
+    parser.add_argument(
+        "--compress", choices=("gz", "bz2", "xz"), help="Compress both files."
+    )
+    parser.add_argument("--model", type=pathlib.Path, help="A JSON model printed by --fit.")
+    parser.add_argument(
+        "--fit",
+        action="store_true",
+        help="Instead, print the model of --neofile and --cadfile as JSON.",
+    )
+    parser.add_argument(
+        "--neofile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "neos.csv"
+    )
+    parser.add_argument(
+        "--cadfile", type=pathlib.Path, default=PROJECT_ROOT / "data" / "cad.json"
+    )
+    args = parser.parse_args()
+
+    if args.fit:
+        json.dump(fit(args.neofile, args.cadfile), sys.stdout, indent=2)
+        print()
+        return
+    if args.approaches is None:
+        parser.error("--approaches is required unless --fit is given")
+
+    model = None
+    if args.model:
+        with open(args.model, encoding="utf-8") as file:
+            model = json.load(file)
+    neo_path, cad_path = generate(
+        args.outdir,
+        args.approaches,
+        seed=args.seed,
+        neos=args.neos,
+        model=model,
+        compression=f".{args.compress}" if args.compress else None,
+    )
+    print(f"Wrote {neo_path} and {cad_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Cache the results of repeated queries against an `NEODatabase`.
+
+The interactive shell, the query server and batch jobs often run the same
+criteria over and over. A `QueryCache` remembers, for each distinct collection
+of filters, the rows of the close approaches that matched - as a compact integer
+array rather than a list of objects - so that repeating a query only needs to
+look those rows up again.
+
+Queries are often limited (`--limit`), so the scan behind a result is often
+abandoned early. An entry then remembers how far the scan got: a later query
+with the same filters replays the cached prefix, and only resumes scanning if
+it needs more results than were found so far.
+
+The cache is bounded both by its number of entries and by the memory held by
+their row arrays, and evicts the least recently used entries first. It is safe
+to share between threads.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+# The default bounds of a `QueryCache`.
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+class CacheEntry:
+    """The rows matching a collection of filters, as far as they are known.
+
+    Attributes:
+        rows: An array of the matching rows found so far, in result order.
+        position: How many of the query plan's candidate rows have been scanned.
+        complete: Whether the scan finished, so `rows` holds every match.
+    """
+
+    __slots__ = ("rows", "position", "complete")
+
+    def __init__(self, rows, position, complete):
+        """Create a new `CacheEntry`."""
+        self.rows = rows
+        self.position = position
+        self.complete = complete
+
+    @property
+    def nbytes(self):
+        """Return the approximate memory held by this entry, in bytes."""
+        return sys.getsizeof(self.rows) + sys.getsizeof(self)
+
+
+class QueryCache:
+    """A thread-safe, memory-bounded LRU cache of query results.
+
+    Attributes:
+        max_entries: The maximum number of cached queries.
+        max_bytes: The maximum total size of the cached entries, in bytes.
+        hits: The number of lookups that found a complete entry.
+        partial_hits: The number of lookups that found an incomplete entry.
+        misses: The number of lookups that found no entry.
+        evictions: The number of entries evicted to respect the bounds.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """Create a new, empty `QueryCache`.
+
+        Args:
+            max_entries: The maximum number of cached queries. 0 disables caching.
+            max_bytes: The maximum total size of the cached entries, in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.partial_hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(filters):
+        """Return the canonical cache key of a collection of filters.
+
+        Two collections get the same key if they hold equivalent filters, in
+        any order and regardless of duplicates: each filter is identified by its
+        class, comparator, and reference value in its column's representation.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            frozenset: A hashable key, or None if the filters can't be keyed.
+        """
+        try:
+            return frozenset(
+                (type(filter_obj), filter_obj.op, filter_obj.key(filter_obj.value))
+                for filter_obj in filters
+            )
+        except (AttributeError, TypeError):
+            return None
+
+    def get(self, key):
+        """Look up the entry of a key, marking it as recently used.
+
+        Args:
+            key: A key returned by `QueryCache.key`.
+
+        Returns:
+            CacheEntry: The cached entry, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.complete:
+                self.hits += 1
+            else:
+                self.partial_hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """Store an entry, unless a more complete one is already cached.
+
+        Least recently used entries are evicted until the cache is within its
+        bounds again. Entries too large for the cache on their own are dropped.
+
+        Args:
+            key: A key returned by `QueryCache.key`.
+            entry: The `CacheEntry` to store.
+        """
+        size = entry.nbytes
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                if current.position >= entry.position:
+                    return
+                self._bytes -= current.nbytes
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry, keeping the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        """Return the number of cached queries."""
+        return len(self._entries)
+
+    def stats(self):
+        """Return a snapshot of the usage statistics of this cache.
+
+        Returns:
+            dict: The number of entries, the bytes they hold, the bounds, and
+                the hit, partial hit, miss and eviction counts.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __str__(self):
+        """Describe the contents and usage of this cache on one line."""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["partial_hits"] + stats["misses"]
+        ratio = (stats["hits"] + stats["partial_hits"]) / lookups if lookups else 0.0
+        return (
+            f"{stats['entries']}/{stats['max_entries']} queries cached in "
+            f"{stats['bytes'] / 2**20:.1f}/{stats['max_bytes'] / 2**20:.0f} MiB; "
+            f"{stats['hits']} hits, {stats['partial_hits']} partial hits, "
+            f"{stats['misses']} misses ({ratio:.0%} hit rate), "
+            f"{stats['evictions']} evictions"
+        )
@@ -0,0 +1,349 @@
+"""A columnar (struct-of-arrays) storage engine for close approaches.
+
+Rather than keeping one `CloseApproach` object per row, an `ApproachColumns`
+stores the close approaches of a data set as parallel typed arrays:
+
+- `time`: the time of closest approach, in minutes since the Unix epoch;
+- `distance`: the nominal approach distance, in astronomical units;
+- `velocity`: the relative approach velocity, in kilometers per second;
+- `neo`: the row of the approaching NEO in the database's collection of NEOs.
+
+Filters are evaluated directly against these columns, and `CloseApproach`
+objects are only materialized for the rows that are actually requested. The
+`NEODatabase` accepts an `ApproachColumns` anywhere it accepts a list of
+`CloseApproach`es, and `extract.load_approaches(..., columnar=True)` builds one
+without ever constructing the intermediate objects.
+"""
+
+import sys
+from array import array
+from collections.abc import Sequence
+from types import MappingProxyType
+
+from filters import compile_filters
+from helpers import EPOCH_DAY, MINUTES_PER_DAY
+from index import TimeIndex
+from models import CloseApproach
+
+# The stored time of approaches whose time is unknown.
+MISSING_TIME = -(2**63)
+
+# How a compiled predicate reads each column for a `row` argument; see `getter`.
+ROW_ACCESSORS = {
+    "day": (
+        "(time[row] // MINUTES_PER_DAY + EPOCH_DAY"
+        " if time[row] != MISSING_TIME else nan)"
+    ),
+    "distance": "distance[row]",
+    "velocity": "velocity[row]",
+    "diameter": "neo_diameter[neo[row]]",
+    "hazardous": "neo_hazardous[neo[row]]",
+}
+
+
+class ApproachColumns(Sequence):
+    """A compact, column-oriented collection of close approaches.
+
+    Until it is linked to a collection of NEOs (with `link`), an
+    `ApproachColumns` remembers the primary designation of each row's NEO.
+    Afterwards, only the `neo` column is kept, along with the designations of
+    the few approaches whose NEO is unknown.
+
+    Indexing an `ApproachColumns` materializes a new `CloseApproach`, linked to
+    its NEO, for that row.
+    """
+
+    def __init__(self):
+        """Create a new, empty `ApproachColumns`."""
+        self.time = array("q")
+        self.distance = array("d")
+        self.velocity = array("d")
+        self.neo = array("q")
+
+        # Per-NEO attributes, indexed by the `neo` column after linking.
+        self.neo_diameter = array("d")
+        self.neo_hazardous = array("b")
+
+        self._neos = []
+        self._designations = []
+        self._orphans = {}
+
+    @classmethod
+    def from_approaches(cls, approaches):
+        """Build an `ApproachColumns` from a collection of `CloseApproach` objects.
+
+        Args:
+            approaches: An iterable of unlinked CloseApproaches.
+
+        Returns:
+            ApproachColumns: The same approaches, stored column by column.
+        """
+        columns = cls()
+        for approach in approaches:
+            minutes = approach.minutes
+            columns.append(
+                approach._designation,
+                MISSING_TIME if minutes is None else minutes,
+                approach.distance,
+                approach.velocity,
+            )
+        return columns
+
+    def append(self, designation, minutes, distance, velocity):
+        """Add an unlinked close approach to the end of the columns.
+
+        Args:
+            designation: The primary designation of the approaching NEO.
+            minutes: The time of approach in minutes since the epoch, or
+                `MISSING_TIME` if unknown.
+            distance: The nominal approach distance in astronomical units.
+            velocity: The relative approach velocity in kilometers per second.
+        """
+        self._designations.append(sys.intern(designation))
+        self.time.append(minutes)
+        self.distance.append(distance)
+        self.velocity.append(velocity)
+
+    def extend(self, designations, time, distance, velocity):
+        """Add many unlinked close approaches, given column by column, to the end.
+
+        Args:
+            designations: The primary designation of each approaching NEO.
+            time: The time of each approach, as in `append`.
+            distance: The distance of each approach, as in `append`.
+            velocity: The velocity of each approach, as in `append`.
+        """
+        self._designations.extend(map(sys.intern, designations))
+        self.time.extend(time)
+        self.distance.extend(distance)
+        self.velocity.extend(velocity)
+
+    @classmethod
+    def restore(cls, time, distance, velocity, neo, orphans):
+        """Rebuild an `ApproachColumns` from the columns of a linked instance.
+
+        The result still needs to be linked to the same collection of NEOs, in
+        the same order, but doesn't need to resolve any designations.
+
+        Args:
+            time: The `time` column, as an array of epoch minutes.
+            distance: The `distance` column, as an array of floats.
+            velocity: The `velocity` column, as an array of floats.
+            neo: The `neo` column, as an array of NEO rows.
+            orphans: A mapping from row to designation for approaches of unknown NEOs.
+
+        Returns:
+            ApproachColumns: The restored, not yet linked, columns.
+        """
+        columns = cls()
+        columns.time, columns.distance, columns.velocity = time, distance, velocity
+        columns.neo = neo
+        columns._orphans = dict(orphans)
+        return columns
+
+    @property
+    def orphans(self):
+        """Return the designations of the approaches of unknown NEOs, by row.
+
+        Returns:
+            Mapping: A read-only mapping from row to the designation of the
+                approaching NEO, for the rows of a linked instance whose NEO is
+                missing from the database.
+        """
+        return MappingProxyType(self._orphans)
+
+    def link(self, neos, neos_by_designation):
+        """Link every row to its NEO, and give each NEO a view of its approaches.
+
+        After linking, the `.approaches` attribute of each NEO is a read-only
+        sequence that materializes that NEO's close approaches on demand.
+
+        Args:
+            neos: The database's collection of NearEarthObjects.
+            neos_by_designation: A mapping from primary designation to NEO.
+        """
+        self._neos = list(neos)
+        missing = len(self._neos)
+        if len(self.neo) != len(self.time):
+            self._resolve(neos_by_designation)
+
+        # A trailing entry describes the missing NEO of orphaned approaches.
+        self.neo_diameter = array("d", (neo.diameter for neo in self._neos))
+        self.neo_diameter.append(float("nan"))
+        self.neo_hazardous = array("b", (neo.hazardous for neo in self._neos))
+        self.neo_hazardous.append(False)
+
+        rows_by_neo = {}
+        for row, neo_row in enumerate(self.neo):
+            if neo_row != missing:
+                rows_by_neo.setdefault(neo_row, array("q")).append(row)
+        for neo_row, rows in rows_by_neo.items():
+            self._neos[neo_row].approaches = ApproachView(self, rows)
+
+    def _resolve(self, neos_by_designation):
+        """Fill the `neo` column from the designation of each row's NEO.
+
+        Args:
+            neos_by_designation: A mapping from primary designation to NEO.
+        """
+        row_of = {id(neo): row for row, neo in enumerate(self._neos)}
+        missing = len(self._neos)
+
+        self.neo = array("q", bytes(8 * len(self.time)))
+        for row, designation in enumerate(self._designations):
+            neo = neos_by_designation.get(designation)
+            if neo is None:
+                self.neo[row] = missing
+                self._orphans[row] = designation
+            else:
+                self.neo[row] = row_of[id(neo)]
+        self._designations = []
+
+    def days(self):
+        """Return the day ordinal of every row, as used by `index.TimeIndex`.
+
+        Returns:
+            list: One proleptic Gregorian day ordinal per row, or
+                `TimeIndex.MISSING` for approaches without a known time.
+        """
+        return [
+            minutes // MINUTES_PER_DAY + EPOCH_DAY
+            if minutes != MISSING_TIME
+            else TimeIndex.MISSING
+            for minutes in self.time
+        ]
+
+    def getter(self, column):
+        """Return a function that fetches a named column's value for a row.
+
+        The supported columns match the `column` attribute of the filters in
+        `filters`: "day", "distance", "velocity", "diameter" and "hazardous";
+        "designation" fetches the primary designation of the row's NEO. The day
+        of an approach without a known time is NaN.
+
+        Args:
+            column: The name of the column.
+
+        Returns:
+            callable: A 1-argument function from a row to that row's value.
+        """
+        if column == "day":
+            time, nan = self.time, float("nan")
+            return lambda row: (
+                time[row] // MINUTES_PER_DAY + EPOCH_DAY
+                if time[row] != MISSING_TIME
+                else nan
+            )
+        if column in ("distance", "velocity"):
+            return getattr(self, column).__getitem__
+        if column in ("diameter", "hazardous"):
+            values, neo = getattr(self, f"neo_{column}"), self.neo
+            return lambda row: values[neo[row]]
+        if column == "designation":
+            neo, orphans = self.neo, self._orphans
+            designations = [linked.designation for linked in self._neos]
+            missing = len(designations)
+            return lambda row: (
+                designations[neo[row]] if neo[row] != missing else orphans[row]
+            )
+        raise KeyError(column)
+
+    def matcher(self, filters):
+        """Build a predicate on rows that checks all of a collection of filters.
+
+        The filters are compiled with `filters.compile_filters`, in the given
+        order: filters that name a supported `column` are evaluated on the
+        columns directly; any other filter is called on a materialized
+        `CloseApproach`.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            callable: A 1-argument function from a row to whether it matches.
+        """
+        return compile_filters(
+            filters,
+            accessors=ROW_ACCESSORS,
+            argument="row",
+            namespace={
+                "time": self.time,
+                "distance": self.distance,
+                "velocity": self.velocity,
+                "neo": self.neo,
+                "neo_diameter": self.neo_diameter,
+                "neo_hazardous": self.neo_hazardous,
+                "MINUTES_PER_DAY": MINUTES_PER_DAY,
+                "EPOCH_DAY": EPOCH_DAY,
+                "MISSING_TIME": MISSING_TIME,
+                "approach_at": self.__getitem__,
+            },
+            materialize="approach_at(row)",
+        )
+
+    def __len__(self):
+        """Return the number of stored close approaches."""
+        return len(self.time)
+
+    def __getitem__(self, row):
+        """Materialize the `CloseApproach` stored in a given row.
+
+        Args:
+            row: The position of the close approach.
+
+        Returns:
+            CloseApproach: A new CloseApproach, linked to its NEO if known.
+        """
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        minutes = self.time[row]
+        if self._designations:
+            designation, neo = self._designations[row], None
+        else:
+            neo_row = self.neo[row]
+            if neo_row < len(self._neos):
+                neo = self._neos[neo_row]
+                designation = neo.designation
+            else:
+                neo, designation = None, self._orphans[row]
+
+        approach = CloseApproach(
+            designation=designation,
+            distance=self.distance[row],
+            velocity=self.velocity[row],
+        )
+        if minutes != MISSING_TIME:
+            # Keep the compact form; a datetime is only created if it's read.
+            approach.minutes = minutes
+        approach.neo = neo
+        return approach
+
+
+class ApproachView(Sequence):
+    """A read-only view of some rows of an `ApproachColumns`.
+
+    This stands in for the list of close approaches of a `NearEarthObject`
+    whose approaches are stored in columns.
+    """
+
+    def __init__(self, columns, rows):
+        """Create a new `ApproachView`.
+
+        Args:
+            columns: The ApproachColumns holding the close approaches.
+            rows: The rows of the close approaches in this view, in order.
+        """
+        self._columns = columns
+        self._rows = rows
+
+    def __len__(self):
+        """Return the number of close approaches in this view."""
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        """Materialize the close approach at a position in this view."""
+        if isinstance(index, slice):
+            return [self._columns[row] for row in self._rows[index]]
+        return self._columns[self._rows[index]]
@@ -0,0 +1,103 @@
+"""Open data and result files that may be compressed.
+
+Data files and exports can be stored compressed with gzip (`.gz`), bzip2
+(`.bz2`) or xz (`.xz`). The `open_file` function opens any of them like the
+built-in `open`, decompressing or compressing on the fly with the standard
+library codecs, so readers and writers can stream them without ever holding
+a whole uncompressed file in memory or on disk.
+
+When reading, the codec is detected from the magic bytes at the start of the
+file, so that a compressed file is understood even without its usual suffix;
+when writing, it is chosen from the suffix of the path. The `format_suffix`
+function returns the suffix of the format inside any compression, such as
+".csv" for "results.csv.gz".
+"""
+
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+
+# The stdlib module of each codec, by file suffix, with the keyword arguments
+# used when compressing. gzip defaults to its slowest level, which makes
+# exports several times slower for a marginally smaller file.
+CODECS = {
+    ".gz": (gzip, {"compresslevel": 6}),
+    ".bz2": (bz2, {}),
+    ".xz": (lzma, {}),
+}
+
+# The magic bytes that start a file compressed with each codec.
+MAGIC_BYTES = {
+    b"\x1f\x8b": ".gz",
+    b"BZh": ".bz2",
+    b"\xfd7zXZ\x00": ".xz",
+}
+
+
+def compression_of(path, sniff=False):
+    """Return the compression suffix of a path, or None if it isn't compressed.
+
+    Args:
+        path: A path to a (possibly compressed) file, or None.
+        sniff: Whether to detect the codec from the content of an existing file
+            first, and only fall back to the suffix of the path.
+
+    Returns:
+        str: One of the keys of `CODECS`, or None.
+    """
+    if path is None:
+        return None
+    path = Path(path)
+    if sniff:
+        try:
+            with open(path, "rb") as file:
+                head = file.read(max(map(len, MAGIC_BYTES)))
+        except OSError:
+            pass
+        else:
+            for magic, suffix in MAGIC_BYTES.items():
+                if head.startswith(magic):
+                    return suffix
+            return None
+    suffix = path.suffix.lower()
+    return suffix if suffix in CODECS else None
+
+
+def format_suffix(path):
+    """Return the suffix of the format of a file, ignoring any compression suffix.
+
+    Args:
+        path: A path such as "results.csv" or "results.csv.gz".
+
+    Returns:
+        str: The suffix of the uncompressed format, such as ".csv".
+    """
+    path = Path(path)
+    if path.suffix.lower() in CODECS:
+        path = path.with_suffix("")
+    return path.suffix
+
+
+def open_file(path, mode="r", **kwargs):
+    """Open a file like the built-in `open`, decompressing or compressing as needed.
+
+    Args:
+        path: A path to a (possibly compressed) file.
+        mode: The mode in which to open the file, such as "r", "w" or "rb".
+        kwargs: Further arguments of `open`, such as `encoding` and `newline`.
+
+    Returns:
+        A file object. Reading from it produces uncompressed data.
+    """
+    suffix = compression_of(path, sniff="r" in mode)
+    if suffix is None:
+        return open(path, mode, **kwargs)
+
+    codec, options = CODECS[suffix]
+    kwargs.pop("buffering", None)
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    if "w" in mode or "a" in mode or "x" in mode:
+        kwargs = {**options, **kwargs}
+    return codec.open(path, mode, **kwargs)
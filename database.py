@@ -12,6 +12,30 @@ data on NEOs and close approaches extracted by `extract.load_neos` and
 You'll edit this file in Tasks 2 and 3.
 """
 
+import bisect
+import datetime
+import functools
+import heapq
+import operator
+from array import array
+from itertools import compress, count, islice
+
+from aggregate import GROUP_KEYS, SUMMARY_COLUMNS, aggregate
+from cache import CacheEntry, QueryCache
+from columnar import MISSING_TIME, ApproachColumns
+from filters import COLUMN_FILTERS, compile_filters
+from helpers import EPOCH_DAY, MINUTES_PER_DAY
+from index import FUZZY_LIMIT, NameIndex, TimeIndex
+from planner import QueryPlanner
+from profiling import counted, phase
+from vectorized import VectorColumns, numpy
+
+# The value of a column that is missing, as counted by `planner.ColumnStats`.
+NAN = float("nan")
+
+# The attributes by which `NEODatabase.query` can order its results.
+SORT_KEYS = ("date", "distance", "velocity", "diameter")
+
 
 class NEODatabase:
     """A database of near-Earth objects and their close approaches.
@@ -20,6 +44,15 @@ class NEODatabase:
     approaches. It additionally maintains a few auxiliary data structures to
     help fetch NEOs by primary designation or by name and to help speed up
     querying for close approaches that match criteria.
+
+    The rows matched by recent queries are kept in `cache`, a `cache.QueryCache`
+    that can be replaced (or set to None) to change its bounds or disable it.
+    Likewise, `profiler` can be set to a `profiling.Profiler` to count the rows
+    scanned by queries and time their planning.
+
+    When NumPy is installed, a database in columnar storage also keeps
+    `vectorized`, a `vectorized.VectorColumns` that evaluates filters on whole
+    columns at once; set it to None to check filters one row at a time.
     """
 
     def __init__(self, neos, approaches):
@@ -37,17 +70,92 @@ class NEODatabase:
         a collection of that NEO's close approaches, and the .neo attribute of
         each close approach references the appropriate NEO.
 
+        The close approaches may instead be supplied as a `columnar.ApproachColumns`,
+        in which case they stay in columnar storage: each NEO's .approaches
+        becomes a read-only view, and `CloseApproach` objects are only
+        materialized as they are generated by `query`.
+
         Args:
             neos: A collection of NearEarthObjects.
-            approaches: A collection of CloseApproaches.
+            approaches: A collection of CloseApproaches, or an ApproachColumns.
         """
-        self._neos = neos
-        self._approaches = approaches
+        self._index_neos(neos)
+        self._attach(approaches)
 
-        # Create auxiliary data structures for fast lookup
+    def _index_neos(self, neos):
+        """Set up the lookups of NEOs by designation and by name.
+
+        Args:
+            neos: A collection of NearEarthObjects.
+        """
+        self._neos = neos
         self._neos_by_designation = {neo.designation: neo for neo in neos}
         self._neos_by_name = {neo.name: neo for neo in neos if neo.name}
+        self._name_index = NameIndex(neos)
+
+    def with_approaches(self, approaches):
+        """Create a database of this database's NEOs and some close approaches.
+
+        The new database shares this database's lookups of NEOs, rather than
+        building them again, so a database of NEOs without close approaches can
+        be completed cheaply once the approaches are loaded. As in the
+        constructor, the NEOs and close approaches must not be linked yet, and
+        are linked together; this database is otherwise left unchanged.
+
+        Args:
+            approaches: A collection of CloseApproaches, or an ApproachColumns.
 
+        Returns:
+            NEODatabase: A database of the same NEOs and the close approaches.
+        """
+        database = type(self).__new__(type(self))
+        database._neos = self._neos
+        database._neos_by_designation = self._neos_by_designation
+        database._neos_by_name = self._neos_by_name
+        database._name_index = self._name_index
+        database._attach(approaches)
+        return database
+
+    def _attach(self, approaches, time_index=None, days=None):
+        """Link the close approaches to the NEOs, and set up querying them.
+
+        Every database, however its NEOs are looked up, sets up its close
+        approaches here.
+
+        Args:
+            approaches: A collection of CloseApproaches, or an ApproachColumns.
+            time_index: The `TimeIndex` of close approaches that are already
+                linked to the NEOs, or None to link them and build their index.
+            days: The day ordinal of every row of linked columns, as in
+                `vectorized.VectorColumns`, or None to compute them if needed.
+        """
+        self._approaches = approaches
+        self._columnar = isinstance(approaches, ApproachColumns)
+
+        if time_index is not None:
+            self._time_index = time_index
+        elif self._columnar:
+            approaches.link(self._neos, self._neos_by_designation)
+            self._time_index = TimeIndex(approaches.days())
+        else:
+            self._link(approaches)
+            # Index the approaches by day to answer date queries without a full scan
+            self._time_index = TimeIndex.from_approaches(approaches)
+
+        # Gather statistics to plan queries
+        self._planner = QueryPlanner(self._getter, len(approaches), self._time_index)
+        self.cache = QueryCache()
+        self.profiler = None
+        self.vectorized = None
+        if self._columnar and numpy is not None:
+            self.vectorized = VectorColumns(approaches, days)
+
+    def _link(self, approaches):
+        """Link together the NEOs and a list of their close approaches.
+
+        Args:
+            approaches: A collection of unlinked CloseApproaches.
+        """
         # Link together the NEOs and their close approaches
         for approach in approaches:
             # Find the corresponding NEO
@@ -95,7 +203,38 @@ class NEODatabase:
         """
         return self._neos_by_name.get(name)
 
-    def query(self, filters=()):
+    def find_neos_by_name(self, text, match="exact", limit=None):
+        """Find the NEOs whose name matches some text, ignoring case and accents.
+
+        Unlike `get_neo_by_name`, names are compared after normalizing their
+        case, accents and spacing, so "halley" finds "Halley". The text can also
+        be matched against the start of names ("prefix"), or approximately
+        ("fuzzy"), to find names that are only partially known or misspelled.
+
+        Args:
+            text: The name, or start of a name, to search for.
+            match: One of `index.NAME_MATCHES`: "exact", "prefix" or "fuzzy".
+            limit: The maximum number of NEOs to return. None means every exact
+                or prefix match, and the few most similar fuzzy matches.
+
+        Returns:
+            list: The matching NearEarthObjects, best match first.
+        """
+        return self._name_index.find(text, match, limit)
+
+    def suggest_names(self, text, limit=FUZZY_LIMIT):
+        """Suggest the names of NEOs similar to a name that didn't match any.
+
+        Args:
+            text: The (possibly misspelled) name that was searched for.
+            limit: The maximum number of suggestions.
+
+        Returns:
+            list: The names of the most similar NEOs, most similar first.
+        """
+        return [neo.name for neo in self._name_index.find(text, "fuzzy", limit)]
+
+    def query(self, filters=(), sort_by=None, descending=False, limit=None):
         """Query close approaches to generate those that match a collection of filters.
 
         This generates a stream of CloseApproach objects that match all of the
@@ -103,22 +242,382 @@ class NEODatabase:
 
         If no arguments are provided, generate all known close approaches.
 
-        The CloseApproach objects are generated in internal order, which isn't
-        guaranteed to be sorted meaningfully, although is often sorted by time.
+        Without `sort_by`, the CloseApproach objects are generated in internal
+        order, which isn't guaranteed to be sorted meaningfully, although is
+        often sorted by time. With `sort_by`, they are ordered by one of
+        `SORT_KEYS`; approaches without a value for it (no known time, or an
+        NEO of unknown diameter) come last in either direction, and ties keep
+        their internal order.
+
+        Ordering by date walks the time index, so results are generated as soon
+        as they are found. Ordering by another attribute has to see every match
+        first - but with a `limit` of k results, only the best k are kept, in a
+        bounded heap, so memory stays proportional to k rather than to the
+        number of matches.
 
         Args:
             filters: A collection of filters capturing user-specified criteria.
+            sort_by: The attribute to order results by, or None for internal order.
+            descending: Whether to order results from the largest value down.
+            limit: The maximum number of results to generate. None or 0 means
+                unlimited.
 
         Yields:
             CloseApproach: A stream of matching CloseApproach objects.
         """
-        for approach in self._approaches:
-            # Check if this approach matches all filters
-            matches_all = True
-            for filter_obj in filters:
-                if not filter_obj(approach):
-                    matches_all = False
-                    break
+        if sort_by is not None and sort_by not in SORT_KEYS:
+            raise ValueError(f"Cannot sort close approaches by {sort_by!r}.")
+        with phase(self.profiler, "plan"):
+            plan = self.plan(filters)
+        if sort_by == "date":
+            rows = self._rows_by_date(plan, descending)
+        elif sort_by is not None:
+            rows = self._rows_by_value(
+                self._rows(plan, filters), self._getter(sort_by), descending, limit
+            )
+        elif not plan.filters and plan.full_scan and not self._columnar:
+            # Every approach matches, in internal order: skip the row lookups.
+            yield from islice(counted(self.profiler, self._approaches), limit or None)
+            return
+        else:
+            rows = self._rows(plan, filters)
+        yield from map(self._approaches.__getitem__, islice(rows, limit or None))
+
+    def count(self, filters=()):
+        """Count the close approaches that match a collection of filters.
+
+        No CloseApproach objects are created: date criteria alone are answered
+        by the time index, and other filters are checked on rows.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            int: The number of matching close approaches.
+        """
+        plan = self.plan(filters)
+        if not plan.filters:
+            return len(plan.rows)
+        return sum(1 for _ in self._rows(plan, filters))
+
+    def aggregate(self, filters=(), group_by=None, columns=tuple(SUMMARY_COLUMNS)):
+        """Summarize the close approaches that match a collection of filters.
+
+        The matching rows are found as by `query` (and share its cache), but
+        no CloseApproach objects are created; see `aggregate.aggregate`.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+            group_by: One of `aggregate.GROUP_KEYS`, or None for a single group.
+            columns: The columns to summarize, from `aggregate.SUMMARY_COLUMNS`.
+
+        Returns:
+            dict: A mapping from each group (None without `group_by`) to its
+                `aggregate.Aggregate`. Approaches without a value for the group
+                (such as those without a known time) are grouped under None.
+        """
+        if group_by is not None and group_by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group close approaches by {group_by!r}.")
+        unknown = set(columns) - set(SUMMARY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot summarize close approaches by {unknown.pop()!r}.")
+        plan = self.plan(filters)
+        return aggregate(
+            self._rows(plan, filters),
+            {column: self._reader(column) for column in columns},
+            self._group_key(group_by) if group_by is not None else None,
+        )
+
+    def _reader(self, column):
+        """Return a function that reads a named column's values for many rows.
+
+        Unlike `_getter`, the values are looked up with chained built-in
+        functions where possible, without calling Python code for each row.
+
+        Args:
+            column: The name of a column, as in `filters.COLUMN_FILTERS`.
+
+        Returns:
+            callable: A function from an iterable of rows to an iterator over
+                their values.
+        """
+        if self._columnar:
+            columns = self._approaches
+            if column in ("diameter", "hazardous"):
+                values, neo = getattr(columns, f"neo_{column}"), columns.neo
+                return lambda rows: map(values.__getitem__, map(neo.__getitem__, rows))
+            return functools.partial(map, columns.getter(column))
+        if column in ("distance", "velocity"):
+            get, approach_at = operator.attrgetter(column), self._approaches.__getitem__
+            return lambda rows: map(get, map(approach_at, rows))
+        return functools.partial(map, self._getter(column))
 
-            if matches_all:
-                yield approach
+    def _group_key(self, group_by):
+        """Return a function from a row to its group, for one of `GROUP_KEYS`."""
+        if group_by == "neo":
+            if self._columnar:
+                return self._approaches.getter("designation")
+            approaches = self._approaches
+            return lambda row: approaches[row]._designation
+        if group_by == "hazardous":
+            hazardous = self._getter("hazardous")
+            return lambda row: bool(hazardous(row))
+
+        # Labels are computed once per day, as many approaches share a day.
+        if group_by == "year":
+            label = functools.cache(lambda day: datetime.date.fromordinal(day).year)
+        else:
+            label = functools.cache(
+                lambda day: datetime.date.fromordinal(day).strftime("%Y-%m")
+            )
+        if self._columnar:
+            time = self._approaches.time
+
+            def key(row):
+                minutes = time[row]
+                if minutes == MISSING_TIME:
+                    return None
+                return label(minutes // MINUTES_PER_DAY + EPOCH_DAY)
+
+        else:
+            approaches = self._approaches
+
+            def key(row):
+                approach_time = approaches[row].time
+                return label(approach_time.toordinal()) if approach_time else None
+
+        return key
+
+    def _rows(self, plan, filters):
+        """Generate the rows of the close approaches that match a query plan.
+
+        The rows are looked up in the query cache first; see `_scan`.
+
+        Args:
+            plan: The `planner.QueryPlan` of the filters.
+            filters: The filters of the query, to compute its cache key.
+
+        Yields:
+            int: The matching rows, in internal order.
+        """
+        key = None
+        if self.cache is not None and plan.filters:
+            key = self.cache.key(filters)
+        entry = self.cache.get(key) if key is not None else None
+        if entry is not None:
+            # Replay the cached results, and only scan if they are incomplete.
+            yield from entry.rows
+            if entry.complete:
+                return
+        yield from self._scan(plan, key, entry)
+
+    def _scan(self, plan, key=None, entry=None):
+        """Generate the rows of the close approaches that match a query plan.
+
+        With a cache key, the matching rows are recorded and stored in the
+        cache once the scan finishes or is abandoned by the consumer. Plans
+        without filters to evaluate (such as pure date queries, answered by the
+        time index alone) are never cached.
+
+        Args:
+            plan: The `planner.QueryPlan` to follow.
+            key: The cache key of the query, or None not to cache its results.
+            entry: A cached, incomplete `CacheEntry` of the query to resume.
+
+        Yields:
+            int: The matching rows, in internal order.
+        """
+        if not plan.filters:
+            # The candidate rows are exactly the results, so they aren't cached.
+            yield from counted(self.profiler, plan.rows)
+            return
+
+        start = entry.position if entry is not None else 0
+        if self.vectorized is not None:
+            yield from self._select(plan, key, entry, start)
+            return
+        checks = map(self._matcher(plan), islice(plan.rows, start, None))
+
+        # Only the positions of matching candidates reach Python code.
+        candidates = plan.rows
+        rows = array("q", entry.rows) if entry is not None else array("q")
+        position, complete = start - 1, False
+        try:
+            for position in compress(count(start), checks):
+                row = candidates[position]
+                if key is not None:
+                    rows.append(row)
+                yield row
+            position, complete = len(candidates) - 1, True
+        finally:
+            # An abandoned scan stopped right after its last match.
+            scanned = position + 1
+            if self.profiler is not None:
+                self.profiler.count("scanned", scanned - start)
+            if key is not None:
+                self.cache.put(key, CacheEntry(rows, scanned, complete))
+
+    def _select(self, plan, key, entry, start):
+        """Find every remaining match of a query plan at once, with `vectorized`.
+
+        Unlike a row-by-row scan, the whole scan runs before the first row is
+        generated, so its results are always cached complete.
+
+        Args:
+            plan: The `planner.QueryPlan` to follow.
+            key: The cache key of the query, or None not to cache its results.
+            entry: A cached, incomplete `CacheEntry` of the query to resume.
+            start: The position in the candidate rows at which to resume.
+
+        Returns:
+            list: The matching rows after `start`, in internal order.
+        """
+        matches = self.vectorized.select(plan.filters, plan.rows[start:])
+        if self.profiler is not None:
+            self.profiler.count("scanned", len(plan.rows) - start)
+        if key is not None:
+            rows = array("q", entry.rows) if entry is not None else array("q")
+            rows.extend(matches)
+            self.cache.put(key, CacheEntry(rows, len(plan.rows), True))
+        return matches
+
+    def _matcher(self, plan):
+        """Build a predicate on rows that checks the filters of a query plan.
+
+        Args:
+            plan: The `planner.QueryPlan` whose filters to check.
+
+        Returns:
+            callable: A 1-argument function from a row to whether it matches.
+        """
+        if self.vectorized is not None:
+            return self.vectorized.matcher(plan.filters)
+        if self._columnar:
+            return self._approaches.matcher(plan.filters)
+        predicate, approaches = compile_filters(plan.filters), self._approaches
+        return lambda row: predicate(approaches[row])
+
+    def _rows_by_date(self, plan, descending=False):
+        """Generate the rows that match a query plan, ordered by time of approach.
+
+        The time index is already sorted by day, so it is walked in order (or in
+        reverse), one day at a time: only the matches within a single day need
+        to be sorted by their exact time. The filters are checked as the walk
+        goes, so the first results are generated without a full scan.
+
+        Args:
+            plan: The `planner.QueryPlan` to follow.
+            descending: Whether to generate the latest approaches first.
+
+        Yields:
+            int: The matching rows, by time of approach, then in internal order.
+        """
+        index = self._time_index
+        if plan.full_scan:
+            lo, hi = 0, len(index)
+        else:
+            lo, hi = index.span(*plan.index_range)
+        # Approaches without a known time sort first in the index, but last here.
+        known = max(lo, bisect.bisect_right(index.keys, TimeIndex.MISSING, lo, hi))
+
+        keys, rows = index.keys, index.rows
+        matches = self._matcher(plan) if plan.filters else None
+        time_of = self._time_getter()
+        positions = range(hi - 1, known - 1, -1) if descending else range(known, hi)
+        positions = counted(self.profiler, positions)
+
+        def ordered(group):
+            # A walk in reverse collects ties in reverse, but they keep internal order.
+            if descending:
+                group.reverse()
+            group.sort(key=time_of, reverse=descending)
+            return group
+
+        day, group = None, []
+        for position in positions:
+            if keys[position] != day:
+                yield from ordered(group)
+                day, group = keys[position], []
+            row = rows[position]
+            if matches is None or matches(row):
+                group.append(row)
+        yield from ordered(group)
+        missing = counted(self.profiler, rows[lo:known])
+        yield from filter(matches, missing) if matches is not None else missing
+
+    @staticmethod
+    def _rows_by_value(rows, get, descending=False, limit=None):
+        """Order rows by the value of a column.
+
+        With a limit of k rows, only the best k rows seen so far are kept, with
+        `heapq`; otherwise, every row is sorted. Rows whose value is missing
+        (NaN) are set aside and come last.
+
+        Args:
+            rows: An iterable of rows.
+            get: A function from a row to its value in the column.
+            descending: Whether to order rows from the largest value down.
+            limit: The maximum number of rows to return. None or 0 means unlimited.
+
+        Returns:
+            list: The ordered rows, with ties in internal order.
+        """
+        sign = -1 if descending else 1
+        missing = []
+
+        def keyed():
+            # Negating the value rather than reversing the order keeps ties stable.
+            for row in rows:
+                value = get(row)
+                if value == value:
+                    yield sign * value, row
+                elif not limit or len(missing) < limit:
+                    missing.append(row)
+
+        if limit:
+            ordered = heapq.nsmallest(limit, keyed())
+        else:
+            ordered = sorted(keyed())
+        return [row for _, row in ordered] + missing
+
+    def _time_getter(self):
+        """Return a function from a row to a sortable time of approach."""
+        if self._columnar:
+            return self._approaches.time.__getitem__
+        approaches = self._approaches
+        return lambda row: approaches[row].time
+
+    def plan(self, filters=()):
+        """Choose how to answer a query for a collection of filters.
+
+        Date criteria are answered with the time index when possible, and the
+        remaining filters are ordered by their estimated selectivity and cost.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            planner.QueryPlan: The plan `query` follows for these filters.
+        """
+        return self._planner.plan(filters)
+
+    def _getter(self, column):
+        """Return a function that fetches a named column's value for a row.
+
+        Args:
+            column: The name of a column, as in `filters.COLUMN_FILTERS`.
+
+        Returns:
+            callable: A 1-argument function from a row to that row's value, or
+                NaN if the value is missing.
+        """
+        if self._columnar:
+            return self._approaches.getter(column)
+        approaches = self._approaches
+        if column == "day":
+            # Approaches without a known time have a missing (NaN) day.
+            return lambda row: (
+                approaches[row].time.toordinal() if approaches[row].time else NAN
+            )
+        filter_cls = COLUMN_FILTERS[column]
+        return lambda row: filter_cls.key(filter_cls.get(approaches[row]))
@@ -2,10 +2,19 @@
 
 The `load_neos` function extracts NEO data from a CSV file, formatted as
 described in the project instructions, into a collection of `NearEarthObject`s.
+Only a handful of the file's columns are read; a few optional ones, listed in
+`EXTRA_NEO_FIELDS`, can be loaded on request.
 
 The `load_approaches` function extracts close approach data from a JSON file,
 formatted as described in the project instructions, into a collection of
-`CloseApproach` objects.
+`CloseApproach` objects. The JSON file is parsed incrementally by
+`iter_cad_rows`, which `iter_approaches` also uses to generate approaches one
+at a time for one-pass pipelines that never build a database. Its progress can
+be followed with a callback, against the number of approaches announced by the
+file (see `read_approach_count`).
+
+Either file may be compressed with gzip, bzip2 or xz (see `compression`), in
+which case it is decompressed as it is read.
 
 The main module calls these functions with the arguments provided at the command
 line, and uses the resulting collections to build an `NEODatabase`.
@@ -13,80 +22,531 @@ line, and uses the resulting collections to build an `NEODatabase`.
 You'll edit this file in Task 2.
 """
 
+import concurrent.futures
 import csv
+import itertools
 import json
+import operator
+import os
+import re
 
+from columnar import MISSING_TIME, ApproachColumns
+from compression import compression_of, open_file
+from helpers import cd_to_datetime, datetime_to_minutes, minutes_to_datetime
 from models import CloseApproach, NearEarthObject
 
+# The columns of NEO data that are used to build a `NearEarthObject`.
+NEO_FIELDS = ("pdes", "name", "diameter", "pha")
+
+# Optional columns of NEO data, mapped to the attribute of `NearEarthObject`
+# that holds them, a function converting their text, and a value if empty.
+EXTRA_NEO_FIELDS = {
+    "H": ("magnitude", float, float("nan")),
+    "albedo": ("albedo", float, float("nan")),
+    "moid": ("moid", float, float("nan")),
+    "class": ("orbit_class", str, None),
+}
+
+# The fields of close approach data that are used to build a `CloseApproach`.
+APPROACH_FIELDS = ("des", "cd", "dist", "v_rel")
+
+# How many characters of a JSON file to read at a time while streaming it.
+CHUNK_SIZE = 1 << 16
+
+# How many close approaches are read between two reports of progress.
+PROGRESS_INTERVAL = 10_000
+
+# How many byte ranges of a JSON file each worker of a parallel load parses,
+# and how many bytes are searched for the members or a boundary between rows.
+RANGES_PER_WORKER = 4
+_SCAN_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
 
-def load_neos(neo_csv_path):
+# The members of a close approach data document located by a parallel load,
+# and the boundary between two rows of its "data" array.
+_FIELDS_MEMBER = re.compile(rb'"fields"\s*:\s*(\[[^\]]*\])')
+_DATA_MEMBER = re.compile(rb'"data"\s*:\s*\[')
+_ROW_BOUNDARY = re.compile(rb"\]\s*,\s*\[")
+
+
+def load_neos(neo_csv_path, extra_fields=()):
     """Read near-Earth object information from a CSV file.
 
+    Only the needed columns are extracted from each row: their positions are
+    resolved from the header once, and rows are read as plain lists.
+
     Args:
         neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+        extra_fields: Names of optional columns (keys of `EXTRA_NEO_FIELDS`) to
+            additionally load into typed attributes of each NEO.
 
     Returns:
         list: A collection of NearEarthObjects.
+
+    Raises:
+        ValueError: If the file lacks one of the needed columns.
     """
+    extras = [EXTRA_NEO_FIELDS[field] for field in extra_fields]
     neos = []
 
-    with open(neo_csv_path, encoding="utf-8") as file:
-        reader = csv.DictReader(file)
+    with open_file(neo_csv_path, encoding="utf-8", newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return neos
+
+        columns = NEO_FIELDS + tuple(extra_fields)
+        try:
+            project = _projector([header.index(column) for column in columns])
+        except ValueError:
+            raise ValueError(
+                f"{neo_csv_path} lacks one of the columns {columns}"
+            ) from None
 
         for row in reader:
+            if not row:
+                # Skip blank lines, as csv.DictReader does.
+                continue
+
             # Extract relevant fields
-            designation = row["pdes"]
-            name = row["name"] if row["name"].strip() else None
-            diameter = row["diameter"] if row["diameter"].strip() else None
-            hazardous = row["pha"] == "Y"
+            designation, name, diameter, pha, *values = project(row)
 
             # Create NearEarthObject instance
             neo = NearEarthObject(
                 designation=designation,
-                name=name,
-                diameter=diameter,
-                hazardous=hazardous,
+                name=name if name.strip() else None,
+                diameter=diameter if diameter.strip() else None,
+                hazardous=pha == "Y",
+                **{
+                    attribute: convert(value) if value.strip() else missing
+                    for (attribute, convert, missing), value in zip(
+                        extras, values, strict=True
+                    )
+                },
             )
             neos.append(neo)
 
     return neos
 
 
-def load_approaches(cad_json_path):
+def load_approaches(
+    cad_json_path, columnar=False, compact_time=False, workers=1, progress=None
+):
     """Read close approach data from a JSON file.
 
+    The file is parsed incrementally with `iter_cad_rows`, so the raw JSON
+    document is never held in memory all at once.
+
+    With several `workers`, the rows of the file's "data" array are instead
+    split into byte ranges that are parsed into columns by a pool of processes
+    (see `load_columns_parallel`), and merged in order. Compressed files, and
+    files whose layout can't be split, are parsed sequentially.
+
     Args:
         cad_json_path: A path to a JSON file containing data about close approaches.
+        columnar: Whether to store the approaches in an `ApproachColumns`
+            instead of constructing a `CloseApproach` for each of them.
+        compact_time: Whether each `CloseApproach` stores its time as an
+            integer number of minutes rather than as a `datetime`.
+        workers: The number of processes parsing the file.
+        progress: A function called with the number of close approaches read so
+            far, every `PROGRESS_INTERVAL` approaches and at the end, or None.
+            A parallel load only reports its progress at the end.
 
     Returns:
-        list: A collection of CloseApproaches.
+        list: A collection of CloseApproaches, or an ApproachColumns.
     """
-    approaches = []
+    approaches = None
+    if workers > 1:
+        approaches = load_columns_parallel(cad_json_path, workers)
+    if approaches is not None:
+        if progress is not None:
+            progress(len(approaches))
+        if columnar:
+            return approaches
+        return _materialize(approaches, compact_time)
+
+    if not columnar:
+        approaches = iter_approaches(cad_json_path, compact_time=compact_time)
+        return list(_reporting(approaches, progress))
+
+    approaches = ApproachColumns()
+    rows = iter_cad_rows(cad_json_path, APPROACH_FIELDS)
+    _append_rows(approaches, _reporting(rows, progress))
+    return approaches
+
+
+def _reporting(items, progress):
+    """Generate some items, reporting how many were generated to a progress callback.
+
+    Items are drawn in batches of `PROGRESS_INTERVAL`, so that the cost of
+    reporting doesn't grow with the number of items.
+    """
+    if progress is None:
+        yield from items
+        return
+    items, done = iter(items), 0
+    while batch := list(itertools.islice(items, PROGRESS_INTERVAL)):
+        yield from batch
+        done += len(batch)
+        progress(done)
+    if not done:
+        progress(0)
+
+
+def read_approach_count(cad_json_path):
+    """Return the number of close approaches announced by a JSON file.
+
+    The "count" member of the document is read, if it precedes the "data"
+    array - as it does in responses of NASA's close approach data API - so only
+    the start of the file is read.
+
+    Args:
+        cad_json_path: A path to a JSON file containing data about close approaches.
+
+    Returns:
+        int: The announced number of close approaches, or None if it isn't known.
+    """
+    with open_file(cad_json_path, encoding="utf-8") as file:
+        tokens = _JSONTokenizer(file)
+        try:
+            tokens.expect("{")
+            while not tokens.accept("}"):
+                member = tokens.value()
+                tokens.expect(":")
+                if member == "data":
+                    return None
+                value = tokens.value()
+                if member == "count":
+                    return int(value)
+                tokens.accept(",")
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def load_columns_parallel(cad_json_path, workers):
+    """Parse the close approaches of a JSON file into columns with a process pool.
+
+    The parent process finds the "fields" and "data" members of the document
+    and splits the rows of "data" into byte ranges at row boundaries. Each
+    worker decodes its ranges with a single call to the JSON decoder and
+    converts the rows into arrays, which the parent concatenates in order.
+
+    Args:
+        cad_json_path: A path to a JSON file containing data about close approaches.
+        workers: The number of worker processes.
+
+    Returns:
+        ApproachColumns: The unlinked approaches, or None if the file is
+            compressed or its layout can't be split into ranges.
+    """
+    if compression_of(cad_json_path, sniff=True) is not None:
+        return None
+    layout = _data_ranges(cad_json_path, workers * RANGES_PER_WORKER)
+    if layout is None:
+        return None
+    fields, ranges = layout
+    try:
+        indices = [fields.index(name) for name in APPROACH_FIELDS]
+    except ValueError:
+        raise ValueError(
+            f"{cad_json_path} lacks one of the fields {APPROACH_FIELDS}"
+        ) from None
+
+    approaches = ApproachColumns()
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for columns in pool.map(
+            _parse_data_range,
+            itertools.repeat(cad_json_path),
+            *zip(*ranges, strict=True),
+            itertools.repeat(indices),
+        ):
+            approaches.extend(*columns)
+    return approaches
+
+
+def _data_ranges(cad_json_path, parts):
+    """Split the rows of the "data" array of a JSON file into byte ranges.
+
+    Each range but the last ends right after a row's closing bracket, and the
+    next one starts at the following row's opening bracket. The last range
+    extends to the end of the file, past the end of the array.
+
+    Args:
+        cad_json_path: A path to an uncompressed JSON file of close approach data.
+        parts: The number of ranges to aim for.
+
+    Returns:
+        tuple: The list of field names and a list of (start, end) byte offsets,
+            or None if the members aren't found near the start (or, for the
+            field names, the end) of the file.
+    """
+    with open(cad_json_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        head = file.read(_SCAN_SIZE)
+        fields = _FIELDS_MEMBER.search(head)
+        if fields is None:
+            # The field names may instead follow the rows.
+            file.seek(max(0, size - _SCAN_SIZE))
+            fields = _FIELDS_MEMBER.search(file.read())
+        rows = _DATA_MEMBER.search(head)
+        if fields is None or rows is None:
+            return None
+
+        start = rows.end()
+        ranges = []
+        for part in range(1, parts):
+            target = max(start, rows.end() + (size - rows.end()) // parts * part)
+            file.seek(target)
+            boundary = _ROW_BOUNDARY.search(file.read(_SCAN_SIZE))
+            if boundary is None:
+                break
+            ranges.append((start, target + boundary.start() + 1))
+            start = target + boundary.end() - 1
+        ranges.append((start, size))
+    return json.loads(fields.group(1)), ranges
+
+
+def _parse_data_range(cad_json_path, start, end, indices):
+    """Parse the rows in a byte range of a "data" array into columns.
+
+    This runs in the worker processes of `load_columns_parallel`.
 
-    with open(cad_json_path, encoding="utf-8") as file:
-        data = json.load(file)
-
-    # Extract fields and data
-    fields = data["fields"]
-    approach_data = data["data"]
-
-    # Map field names to indices
-    des_idx = fields.index("des")
-    cd_idx = fields.index("cd")
-    dist_idx = fields.index("dist")
-    v_rel_idx = fields.index("v_rel")
-
-    for approach_row in approach_data:
-        # Extract relevant fields
-        designation = approach_row[des_idx]
-        time = approach_row[cd_idx]
-        distance = approach_row[dist_idx]
-        velocity = approach_row[v_rel_idx]
-
-        # Create CloseApproach instance
-        approach = CloseApproach(
-            designation=designation, time=time, distance=distance, velocity=velocity
+    Args:
+        cad_json_path: A path to an uncompressed JSON file of close approach data.
+        start: The offset of the first row's opening bracket (or whitespace).
+        end: The offset just past the last row, or the end of the file.
+        indices: The positions of `APPROACH_FIELDS` in each row.
+
+    Returns:
+        tuple: The designations, times, distances and velocities of the rows.
+    """
+    with open(cad_json_path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8")
+    # The brackets turn the rows into an array; in the last range, the closing
+    # bracket of the "data" array ends it first, and the rest is ignored.
+    rows, _ = _DECODER.raw_decode("[" + text + "]")
+    columns = ApproachColumns()
+    _append_rows(columns, map(_projector(indices), rows))
+    return columns._designations, columns.time, columns.distance, columns.velocity
+
+
+def _append_rows(columns, rows):
+    """Convert the (designation, cd, dist, v_rel) text of rows into columns."""
+    append = columns.append
+    for designation, time, distance, velocity in rows:
+        append(
+            designation or "",
+            datetime_to_minutes(cd_to_datetime(time)) if time else MISSING_TIME,
+            float(distance) if distance else 0.0,
+            float(velocity) if velocity else 0.0,
         )
-        approaches.append(approach)
 
+
+def _materialize(columns, compact_time):
+    """Create an unlinked `CloseApproach` for every row of unlinked columns."""
+    approaches = []
+    for designation, minutes, distance, velocity in zip(
+        columns._designations, columns.time, columns.distance, columns.velocity
+    ):
+        approach = CloseApproach(designation, None, distance, velocity)
+        if minutes != MISSING_TIME and compact_time:
+            approach.minutes = minutes
+        elif minutes != MISSING_TIME:
+            approach.time = minutes_to_datetime(minutes)
+        approaches.append(approach)
     return approaches
+
+
+def iter_approaches(cad_json_path, compact_time=False):
+    """Generate close approaches from a JSON file, one at a time.
+
+    This is a one-pass alternative to `load_approaches` for pipelines that
+    don't need an `NEODatabase`: only the current approach is kept in memory.
+
+    Args:
+        cad_json_path: A path to a JSON file containing data about close approaches.
+        compact_time: Whether each `CloseApproach` stores its time as an
+            integer number of minutes rather than as a `datetime`.
+
+    Yields:
+        CloseApproach: Each (unlinked) close approach in the file, in order.
+    """
+    for designation, time, distance, velocity in iter_cad_rows(
+        cad_json_path, APPROACH_FIELDS
+    ):
+        yield CloseApproach(
+            designation=designation,
+            time=time,
+            distance=distance,
+            velocity=velocity,
+            compact_time=compact_time,
+        )
+
+
+def iter_approach_batches(cad_json_path, batch_size=10_000):
+    """Generate close approaches from a JSON file in lists of bounded size.
+
+    Args:
+        cad_json_path: A path to a JSON file containing data about close approaches.
+        batch_size: The maximum number of close approaches in each batch.
+
+    Yields:
+        list: Consecutive batches of (unlinked) CloseApproaches.
+    """
+    approaches = iter_approaches(cad_json_path)
+    while batch := list(itertools.islice(approaches, batch_size)):
+        yield batch
+
+
+def iter_cad_rows(cad_json_path, names, chunk_size=CHUNK_SIZE):
+    """Generate selected fields of each row of close approach data in a JSON file.
+
+    The file is formatted like the responses of NASA's close approach data API:
+    a JSON object whose "fields" member lists the field names, and whose "data"
+    member is an array of rows, each of which is an array of values in the same
+    order as the field names. The file is read in chunks of `chunk_size`
+    characters, and each row is decoded as soon as it has been read.
+
+    Args:
+        cad_json_path: A path to a JSON file containing data about close approaches.
+        names: The names of the fields to extract from each row.
+        chunk_size: The number of characters to read from the file at a time.
+
+    Yields:
+        tuple: The values of the requested fields of each row, in order.
+
+    Raises:
+        ValueError: If the file isn't laid out as described above.
+    """
+    pending = []
+    project = None
+    with open_file(cad_json_path, encoding="utf-8") as file:
+        for member, value in _iter_cad_members(_JSONTokenizer(file, chunk_size)):
+            if member == "fields":
+                try:
+                    indices = [value.index(name) for name in names]
+                except ValueError:
+                    raise ValueError(
+                        f"{cad_json_path} lacks one of the fields {names}"
+                    ) from None
+                project = _projector(indices)
+                # Rows that preceded the field names are only buffered.
+                yield from map(project, pending)
+                pending = []
+            elif project is not None:
+                yield project(value)
+            else:
+                pending.append(value)
+
+    if project is None:
+        raise ValueError(f"{cad_json_path} has no 'fields' member")
+
+
+def _projector(indices):
+    """Return a function that extracts the values at some indices of a row as a tuple."""
+    if len(indices) == 1:
+        (index,) = indices
+        return lambda row: (row[index],)
+    return operator.itemgetter(*indices)
+
+
+def _iter_cad_members(tokens):
+    """Walk a close approach data document, generating its field names and rows.
+
+    Args:
+        tokens: A `_JSONTokenizer` positioned at the start of the document.
+
+    Yields:
+        tuple: ("fields", the list of field names) once, and ("data", row) for
+            each row of the "data" array. Other members are skipped.
+    """
+    tokens.expect("{")
+    if tokens.accept("}"):
+        return
+    while True:
+        member = tokens.value()
+        tokens.expect(":")
+        if member == "data" and tokens.accept("["):
+            if not tokens.accept("]"):
+                while True:
+                    yield "data", tokens.value()
+                    if not tokens.accept(","):
+                        tokens.expect("]")
+                        break
+        else:
+            value = tokens.value()
+            if member == "fields":
+                yield "fields", value
+        if not tokens.accept(","):
+            tokens.expect("}")
+            return
+
+
+class _JSONTokenizer:
+    """Decode a JSON document from a text file piece by piece.
+
+    Structural characters are consumed with `accept` and `expect`, and complete
+    values (such as a single row of data) are decoded with `value`. Only the
+    unconsumed remainder of the current chunk of the file is kept in memory.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        """Create a new `_JSONTokenizer` reading from a text file."""
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self):
+        """Append the next chunk of the file to the buffer, if any remains."""
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character, or "" at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def accept(self, char):
+        """Consume the next character if it is `char`, and return whether it was."""
+        if self._peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        """Consume the next character, which must be `char`."""
+        if not self.accept(char):
+            raise ValueError(
+                f"Expected {char!r} but found {self._peek()!r} in JSON document"
+            )
+
+    def value(self):
+        """Decode and consume the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if self._read_more():
+                    continue
+                raise ValueError(f"Malformed JSON document: {e}") from e
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end < len(self._buffer) or self._eof or not self._read_more():
+                self._pos = end
+                return value
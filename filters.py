@@ -11,12 +11,20 @@ from a comparator (from the `operator` module), a reference value, and a class
 method `get` that subclasses can override to fetch an attribute of interest from
 the supplied `CloseApproach`.
 
+Every filter can also be fused into a single compiled predicate with
+`compile_filters`: the generated function reads each attribute once, merges
+lower and upper bounds on the same attribute into one range check, and
+compares dates as precomputed day ordinals. `create_filters(..., compiled=True)`
+returns such a `CompiledFilters`, which remains iterable as the individual
+filters it was compiled from.
+
 The `limit` function simply limits the maximum number of values produced by an
 iterator.
 
 You'll edit this file in Tasks 3a and 3c.
 """
 
+import itertools
 import operator
 
 
@@ -38,8 +46,16 @@ class AttributeFilter:
 
     Concrete subclasses can override the `get` classmethod to provide custom
     behavior to fetch a desired attribute from the given `CloseApproach`.
+
+    Subclasses may also name the `column` of the columnar storage engine that
+    holds the same attribute, and override `key` to convert the reference value
+    into that column's representation, so that the filter can be evaluated
+    without materializing a `CloseApproach`.
     """
 
+    # The name of the matching column in `columnar.ApproachColumns`, if any.
+    column = None
+
     def __init__(self, op, value):
         """Construct a new `AttributeFilter` from an binary predicate and a reference value.
 
@@ -70,6 +86,15 @@ class AttributeFilter:
         """
         raise UnsupportedCriterionError
 
+    @classmethod
+    def key(cls, value):
+        """Convert a reference value into the representation used by `column`.
+
+        :param value: A reference value, comparable to the result of `get`.
+        :return: The equivalent value, comparable to the entries of `column`.
+        """
+        return value
+
     def __repr__(self):
         """Return a string representation of this filter.
 
@@ -83,6 +108,8 @@ class AttributeFilter:
 class DateFilter(AttributeFilter):
     """Filter for date-based criteria."""
 
+    column = "day"
+
     @classmethod
     def get(cls, approach):
         """Get the date from the close approach.
@@ -95,10 +122,24 @@ class DateFilter(AttributeFilter):
         """
         return approach.time.date()
 
+    @classmethod
+    def key(cls, value):
+        """Convert a reference date into its proleptic Gregorian day ordinal.
+
+        Args:
+            value (date): A reference date.
+
+        Returns:
+            int: The day ordinal of the reference date.
+        """
+        return value.toordinal()
+
 
 class DistanceFilter(AttributeFilter):
     """Filter for distance-based criteria."""
 
+    column = "distance"
+
     @classmethod
     def get(cls, approach):
         """Get the distance from the close approach.
@@ -115,6 +156,8 @@ class DistanceFilter(AttributeFilter):
 class VelocityFilter(AttributeFilter):
     """Filter for velocity-based criteria."""
 
+    column = "velocity"
+
     @classmethod
     def get(cls, approach):
         """Get the velocity from the close approach.
@@ -131,6 +174,8 @@ class VelocityFilter(AttributeFilter):
 class DiameterFilter(AttributeFilter):
     """Filter for diameter-based criteria."""
 
+    column = "diameter"
+
     @classmethod
     def get(cls, approach):
         """Get the diameter from the NEO in the close approach.
@@ -147,6 +192,8 @@ class DiameterFilter(AttributeFilter):
 class HazardousFilter(AttributeFilter):
     """Filter for hazardous-based criteria."""
 
+    column = "hazardous"
+
     @classmethod
     def get(cls, approach):
         """Get the hazardous status from the NEO in the close approach.
@@ -161,6 +208,169 @@ class HazardousFilter(AttributeFilter):
         return approach.neo.hazardous if approach.neo else False
 
 
+# The filter class that reads each column of `columnar.ApproachColumns`.
+COLUMN_FILTERS = {
+    cls.column: cls
+    for cls in (DateFilter, DistanceFilter, VelocityFilter, DiameterFilter, HazardousFilter)
+}
+
+# How a compiled predicate reads each column from a `CloseApproach` argument,
+# mirroring the `get` and `key` methods of the filter classes above.
+APPROACH_ACCESSORS = {
+    "day": "(approach.time.toordinal() if approach.time else nan)",
+    "distance": "approach.distance",
+    "velocity": "approach.velocity",
+    "diameter": "(approach.neo.diameter if approach.neo else nan)",
+    "hazardous": "(approach.neo.hazardous if approach.neo else False)",
+}
+
+# The infix source of each comparator that a compiled predicate can inline.
+_OPERATOR_SYMBOLS = {
+    operator.eq: "==",
+    operator.ne: "!=",
+    operator.lt: "<",
+    operator.le: "<=",
+    operator.gt: ">",
+    operator.ge: ">=",
+}
+
+# The chained form of a lower bound, as in `lower <= value <= upper`.
+_LOWER_SYMBOLS = {operator.ge: "<=", operator.gt: "<"}
+_UPPER_SYMBOLS = {operator.le: "<=", operator.lt: "<"}
+
+
+class CompiledFilters:
+    """A single predicate that checks all of a collection of filters at once.
+
+    Calling a `CompiledFilters` on a `CloseApproach` is equivalent to checking
+    that every one of its filters accepts the approach, but runs one generated
+    function rather than dispatching to each filter in turn. Iterating over it
+    produces the original filters, so it can be passed anywhere a collection
+    of filters is expected, such as `NEODatabase.query`.
+    """
+
+    def __init__(self, filters):
+        """Compile a collection of filters into a predicate on `CloseApproach`es.
+
+        :param filters: A collection of filters capturing user-specified criteria.
+        """
+        self.filters = tuple(filters)
+        self.predicate = compile_filters(self.filters)
+        self.source = self.predicate.source
+
+    def __call__(self, approach):
+        """Invoke `self(approach)`."""
+        return self.predicate(approach)
+
+    def __iter__(self):
+        """Iterate over the individual filters."""
+        return iter(self.filters)
+
+    def __len__(self):
+        """Return the number of individual filters."""
+        return len(self.filters)
+
+    def __repr__(self):
+        """Return a string representation of these compiled filters."""
+        return f"{self.__class__.__name__}({list(self.filters)!r})"
+
+
+class FilterCollection(list):
+    """A list of filters, as returned by `create_filters`, that can be compiled."""
+
+    def compile(self):
+        """Fuse these filters into a single predicate.
+
+        :return: A `CompiledFilters` of (a snapshot of) the filters in this list.
+        """
+        return CompiledFilters(self)
+
+
+def compile_filters(
+    filters,
+    accessors=APPROACH_ACCESSORS,
+    argument="approach",
+    namespace=None,
+    materialize=None,
+):
+    """Generate a single predicate that checks all of a collection of filters.
+
+    Filters on the same column are grouped where that column first appears, so
+    the column is read once and, for example, a minimum and a maximum become a
+    single chained comparison `lower <= value <= upper`. Reference values are
+    converted with each filter's `key` beforehand (dates into day ordinals) and
+    bound as constants of the generated function. Groups are checked in the
+    order of the given filters, so the caller decides which run first.
+
+    Filters without a column in `accessors`, or with a comparator that can't be
+    inlined, are called on the argument instead.
+
+    :param filters: A collection of filters capturing user-specified criteria.
+    :param accessors: A mapping from a column name to the source of an
+        expression that reads that column from `argument`, in the column's
+        representation.
+    :param argument: The name of the generated function's argument.
+    :param namespace: Extra global names used by the expressions in `accessors`.
+    :param materialize: The source of an expression that converts `argument`
+        into the `CloseApproach` on which other filters are called, if the
+        argument isn't one already.
+    :return: A 1-argument function, whose generated `source` is attached.
+    """
+    namespace = {"nan": float("nan"), **(namespace or {})}
+    materialize = materialize or argument
+    groups = {}
+    steps = []
+    for number, filter_obj in enumerate(filters):
+        name = f"_v{number}"
+        if filter_obj.column in accessors and filter_obj.op in _OPERATOR_SYMBOLS:
+            namespace[name] = filter_obj.key(filter_obj.value)
+            if filter_obj.column not in groups:
+                groups[filter_obj.column] = []
+                steps.append(filter_obj.column)
+            groups[filter_obj.column].append((filter_obj.op, name))
+        else:
+            namespace[name] = filter_obj
+            steps.append((name,))
+
+    lines = [f"def predicate({argument}):"]
+    for step in steps:
+        if isinstance(step, tuple):
+            condition = f"{step[0]}({materialize})"
+        else:
+            value = accessors[step]
+            if len(groups[step]) > 1:
+                lines.append(f"    value = {value}")
+                value = "value"
+            condition = _condition(value, groups[step])
+        lines.append(f"    if not ({condition}):")
+        lines.append("        return False")
+    lines.append("    return True")
+    source = "\n".join(lines) + "\n"
+
+    exec(compile(source, "<compiled filters>", "exec"), namespace)
+    # The predicate never refers to itself; keeping it out of its own globals
+    # avoids a reference cycle that would outlive the columns it reads.
+    predicate = namespace.pop("predicate")
+    predicate.source = source
+    return predicate
+
+
+def _condition(value, bounds):
+    """Return the source of a check of an expression against (op, name) bounds."""
+    lower = [(op, name) for op, name in bounds if op in _LOWER_SYMBOLS]
+    upper = [(op, name) for op, name in bounds if op in _UPPER_SYMBOLS]
+    if len(lower) == 1 and len(upper) == 1:
+        (low_op, low), (high_op, high) = lower[0], upper[0]
+        others = [bound for bound in bounds if bound not in (lower[0], upper[0])]
+        checks = [
+            f"{low} {_LOWER_SYMBOLS[low_op]} {value} {_UPPER_SYMBOLS[high_op]} {high}"
+        ]
+    else:
+        others, checks = bounds, []
+    checks.extend(f"{value} {_OPERATOR_SYMBOLS[op]} {name}" for op, name in others)
+    return " and ".join(checks)
+
+
 def create_filters(
     date=None,
     start_date=None,
@@ -172,6 +382,7 @@ def create_filters(
     diameter_min=None,
     diameter_max=None,
     hazardous=None,
+    compiled=False,
 ):
     """Create a collection of filters from user-specified criteria.
 
@@ -188,7 +399,8 @@ def create_filters(
 
     The return value must be compatible with the `query` method of `NEODatabase`
     because the main module directly passes this result to that method. For now,
-    this can be thought of as a collection of `AttributeFilter`s.
+    this can be thought of as a collection of `AttributeFilter`s. With
+    `compiled`, it is also a single predicate that checks them all at once.
 
     :param date: A `date` on which a matching `CloseApproach` occurs.
     :param start_date: A `date` on or after which a matching `CloseApproach` occurs.
@@ -200,9 +412,10 @@ def create_filters(
     :param diameter_min: A minimum diameter of the NEO of a matching `CloseApproach`.
     :param diameter_max: A maximum diameter of the NEO of a matching `CloseApproach`.
     :param hazardous: Whether the NEO of a matching `CloseApproach` is potentially hazardous.
+    :param compiled: Whether to return a `CompiledFilters` rather than a `FilterCollection`.
     :return: A collection of filters for use with `query`.
     """
-    filters = []
+    filters = FilterCollection()
 
     # Date filters
     if date is not None:
@@ -234,7 +447,7 @@ def create_filters(
     if hazardous is not None:
         filters.append(HazardousFilter(operator.eq, hazardous))
 
-    return filters
+    return filters.compile() if compiled else filters
 
 
 def limit(iterator, n=None):
@@ -252,9 +465,5 @@ def limit(iterator, n=None):
     if n is None or n == 0:
         yield from iterator
     else:
-        count = 0
-        for item in iterator:
-            if count >= n:
-                break
-            yield item
-            count += 1
+        # Stop as soon as n values are produced, without pulling one more.
+        yield from itertools.islice(iterator, max(n, 0))
@@ -3,15 +3,37 @@
 NASA's dataset provides timestamps as naive datetimes (corresponding to UTC).
 
 The `cd_to_datetime` function converts a string, formatted as the `cd` field of
-NASA's close approach data, into a Python `datetime`
+NASA's close approach data, into a Python `datetime`. Because it runs once per
+close approach, it slices the fixed-width format by hand and memoizes the date
+part, rather than going through the much slower `datetime.strptime`.
 
 The `datetime_to_str` function converts a Python `datetime` into a string.
 Although `datetime`s already have human-readable string representations, those
 representations display seconds, but NASA's data (and our datetimes!) don't
 provide that level of resolution, so the output format also will not.
+
+The `datetime_to_minutes` and `minutes_to_datetime` functions convert between
+a Python `datetime` and a whole number of minutes since the Unix epoch - the
+compact integer form used by the columnar storage of close approaches.
 """
 
 import datetime
+import functools
+
+# The reference point for integer timestamps, and its proleptic day ordinal.
+EPOCH = datetime.datetime(1970, 1, 1)
+EPOCH_DAY = EPOCH.toordinal()
+MINUTES_PER_DAY = 24 * 60
+
+# The English locale's abbreviated month names, as used in NASA's `cd` field.
+_MONTHS = {
+    abbr: number
+    for number, abbr in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
 
 
 def cd_to_datetime(calendar_date):
@@ -27,9 +49,38 @@ def cd_to_datetime(calendar_date):
     :param calendar_date: A calendar date in YYYY-bb-DD hh:mm format.
     :return: A naive `datetime` corresponding to the given calendar date and time.
     """
+    if (
+        len(calendar_date) == 17
+        and calendar_date[11] == " "
+        and calendar_date[14] == ":"
+    ):
+        try:
+            year, month, day = _cd_date(calendar_date[:11])
+            return datetime.datetime(
+                year, month, day, int(calendar_date[12:14]), int(calendar_date[15:17])
+            )
+        except (KeyError, ValueError):
+            pass
+    # Let strptime handle (and report) anything unusual.
     return datetime.datetime.strptime(calendar_date, "%Y-%b-%d %H:%M")
 
 
+@functools.lru_cache(maxsize=1 << 17)
+def _cd_date(date_part):
+    """Split the YYYY-bb-DD date part of a NASA calendar date into numbers.
+
+    Many close approaches share a date, so the results are memoized.
+
+    :param date_part: The first 11 characters of a `cd` field value.
+    :return: A tuple of the year, month and day numbers.
+    :raises KeyError: If the month abbreviation is unknown.
+    :raises ValueError: If the date part is malformed.
+    """
+    if date_part[4] != "-" or date_part[8] != "-":
+        raise ValueError(f"Malformed date {date_part!r}")
+    return int(date_part[:4]), _MONTHS[date_part[5:8]], int(date_part[9:11])
+
+
 def datetime_to_str(dt):
     """Convert a naive Python datetime into a human-readable string.
 
@@ -42,4 +93,23 @@ def datetime_to_str(dt):
     :param dt: A naive Python datetime.
     :return: That datetime, as a human-readable string without seconds.
     """
-    return datetime.datetime.strftime(dt, "%Y-%m-%d %H:%M")
+    return dt.isoformat(" ", "minutes")
+
+
+def datetime_to_minutes(dt):
+    """Convert a naive Python datetime into a whole number of minutes since the epoch.
+
+    :param dt: A naive Python datetime.
+    :return: The number of minutes between the Unix epoch and `dt`, which is
+        negative for datetimes before 1970.
+    """
+    return (dt.toordinal() - EPOCH_DAY) * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+def minutes_to_datetime(minutes):
+    """Convert a whole number of minutes since the epoch into a naive Python datetime.
+
+    :param minutes: The number of minutes since the Unix epoch.
+    :return: The corresponding naive `datetime`.
+    """
+    return EPOCH + datetime.timedelta(minutes=minutes)
@@ -0,0 +1,268 @@
+"""Auxiliary indexes that speed up lookups in an `NEODatabase`.
+
+The `TimeIndex` class orders the close approaches of a database by the day on
+which they occur. Each day is represented by its proleptic Gregorian ordinal
+(as returned by `datetime.date.toordinal`) and stored in a compact integer
+array, so that a range of dates can be resolved with two binary searches into
+a contiguous slice of approach row numbers.
+
+The `NameIndex` class finds NEOs by name while ignoring case, accents and
+spacing: by exact name, by the start of their name (with binary searches into
+the sorted, normalized names), or approximately, by the trigrams (3-character
+substrings) they share with the searched text.
+
+The `NEODatabase` constructor builds these indexes once. Its `query` method uses
+the time index to avoid scanning every close approach for narrow date queries,
+and its `find_neos_by_name` and `suggest_names` methods use the name index.
+"""
+
+import bisect
+import unicodedata
+from array import array
+from collections import Counter
+
+# The ways `NameIndex.find` can match names.
+NAME_MATCHES = ("exact", "prefix", "fuzzy")
+
+# The default number of fuzzy matches returned, and the minimum similarity
+# (Dice coefficient of the trigrams) of a fuzzy match.
+FUZZY_LIMIT = 5
+FUZZY_THRESHOLD = 0.3
+
+
+class TimeIndex:
+    """A sorted index of close approaches by the day on which they occur.
+
+    The index holds two parallel arrays: `keys`, the sorted day ordinals, and
+    `rows`, the position of the corresponding approach in the database's
+    internal collection. Approaches without a known time sort before every
+    real date, so they never fall inside a bounded date range.
+    """
+
+    # Sort key for approaches with an unknown time.
+    MISSING = -1
+
+    def __init__(self, days):
+        """Create a new `TimeIndex` from the day ordinal of each approach.
+
+        Args:
+            days: A sequence of day ordinals, one per approach row, in internal
+                order. Use `TimeIndex.MISSING` for approaches without a time.
+        """
+        rows = sorted(range(len(days)), key=days.__getitem__)
+        self.rows = array("q", rows)
+        self.keys = array("q", (days[row] for row in rows))
+
+    @classmethod
+    def from_approaches(cls, approaches):
+        """Build a `TimeIndex` from a collection of `CloseApproach` objects.
+
+        Args:
+            approaches: A sequence of CloseApproaches, in internal order.
+
+        Returns:
+            TimeIndex: An index over the approaches' days of occurrence.
+        """
+        return cls(
+            [
+                approach.time.toordinal() if approach.time else cls.MISSING
+                for approach in approaches
+            ]
+        )
+
+    @classmethod
+    def restore(cls, rows, keys):
+        """Rebuild a `TimeIndex` from the arrays of an existing one, without sorting.
+
+        Args:
+            rows: The `rows` array of an index, or any sequence of the same rows.
+            keys: The `keys` array of the same index.
+
+        Returns:
+            TimeIndex: An index over the same rows and days.
+        """
+        index = cls.__new__(cls)
+        index.rows, index.keys = rows, keys
+        return index
+
+    def __len__(self):
+        """Return the number of indexed approaches."""
+        return len(self.keys)
+
+    def span(self, start=None, end=None):
+        """Locate the slice of the index covering an inclusive range of days.
+
+        Args:
+            start: The first day ordinal to include, or None for no lower bound.
+            end: The last day ordinal to include, or None for no upper bound.
+
+        Returns:
+            tuple: The (lo, hi) bounds of the matching slice of `self.rows`. Only
+                a range without either bound includes the approaches without
+                a known time.
+        """
+        lo = 0 if start is None else bisect.bisect_left(self.keys, start)
+        if start is not None or end is not None:
+            # A bounded range never includes the approaches without a known time.
+            lo = max(lo, bisect.bisect_right(self.keys, self.MISSING))
+        hi = len(self.keys) if end is None else bisect.bisect_right(self.keys, end)
+        return lo, max(lo, hi)
+
+    def lookup(self, start=None, end=None):
+        """Return the rows of the approaches within an inclusive range of days.
+
+        Args:
+            start: The first day ordinal to include, or None for no lower bound.
+            end: The last day ordinal to include, or None for no upper bound.
+
+        Returns:
+            array: The matching approach rows, in time order.
+        """
+        lo, hi = self.span(start, end)
+        return self.rows[lo:hi]
+
+
+def normalize_name(name):
+    """Normalize a name for case-, accent- and spacing-insensitive comparisons.
+
+    Args:
+        name: A name, such as "Jörmungandr" or " halley ".
+
+    Returns:
+        str: The casefolded name without accents, with single spaces between words.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(key):
+    """Return the set of trigrams of a normalized name, padded with spaces.
+
+    Padding makes the start and the end of a name count as trigrams too, so
+    that even names and queries shorter than 3 characters have some.
+    """
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """An index of NEOs by normalized name, for exact, prefix and fuzzy lookups.
+
+    The index holds the normalized names in sorted order (`keys`), with the
+    NEO of each (`neos`), and maps each trigram to the positions of the names
+    that contain it.
+    """
+
+    def __init__(self, neos):
+        """Create a new `NameIndex` of the named NEOs of a collection.
+
+        Args:
+            neos: A collection of NearEarthObjects. Those without a name are skipped.
+        """
+        entries = sorted(
+            ((normalize_name(neo.name), neo) for neo in neos if neo.name),
+            key=lambda entry: (entry[0], entry[1].name),
+        )
+        self.keys = [key for key, _ in entries]
+        self.neos = [neo for _, neo in entries]
+        self._exact = {}
+        for key, neo in entries:
+            self._exact.setdefault(key, neo)
+
+        self._sizes = array("q")
+        self._postings = {}
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, array("q")).append(position)
+
+    def __len__(self):
+        """Return the number of indexed names."""
+        return len(self.keys)
+
+    def get(self, name):
+        """Find the NEO whose name matches a name, ignoring case, accents and spacing.
+
+        Args:
+            name: The name to search for.
+
+        Returns:
+            NearEarthObject: The matching NEO, or None.
+        """
+        return self._exact.get(normalize_name(name))
+
+    def prefix(self, text, limit=None):
+        """Find the NEOs whose name starts with some text.
+
+        Args:
+            text: The start of the names to search for.
+            limit: The maximum number of NEOs to return, or None for all.
+
+        Returns:
+            list: The matching NearEarthObjects, in order of normalized name.
+        """
+        key = normalize_name(text)
+        lo = bisect.bisect_left(self.keys, key)
+        # Every key starting with `key` sorts before `key` followed by the
+        # largest code point.
+        hi = bisect.bisect_right(self.keys, key + "\U0010ffff", lo)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.neos[lo:hi]
+
+    def fuzzy(self, text, limit=FUZZY_LIMIT, threshold=FUZZY_THRESHOLD):
+        """Find the NEOs whose name is similar to some text, most similar first.
+
+        Similarity is the Dice coefficient of the trigrams of the normalized
+        names: twice the number of shared trigrams, over the total number of
+        trigrams of both. Only names sharing a trigram with the text are scored.
+
+        Args:
+            text: The (possibly misspelled) name to search for.
+            limit: The maximum number of NEOs to return, or None for all.
+            threshold: The minimum similarity, between 0 and 1, of a match.
+
+        Returns:
+            list: Pairs of a matching NearEarthObject and its similarity.
+        """
+        grams = trigrams(normalize_name(text))
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                shared.update(postings)
+
+        sizes, size = self._sizes, len(grams)
+        scored = [
+            (2 * count / (size + sizes[position]), position)
+            for position, count in shared.items()
+        ]
+        scored = [(score, position) for score, position in scored if score >= threshold]
+        scored.sort(key=lambda match: (-match[0], match[1]))
+        if limit is not None:
+            del scored[limit:]
+        return [(self.neos[position], score) for score, position in scored]
+
+    def find(self, text, match="exact", limit=None):
+        """Find the NEOs whose name matches some text, in one of `NAME_MATCHES` ways.
+
+        Args:
+            text: The name, or start of a name, to search for.
+            match: "exact", "prefix" or "fuzzy".
+            limit: The maximum number of NEOs to return. None means every exact
+                or prefix match, and `FUZZY_LIMIT` fuzzy matches.
+
+        Returns:
+            list: The matching NearEarthObjects, best match first.
+        """
+        if match == "exact":
+            neo = self.get(text)
+            return [neo] if neo is not None else []
+        if match == "prefix":
+            return self.prefix(text, limit)
+        if match == "fuzzy":
+            matches = self.fuzzy(text, FUZZY_LIMIT if limit is None else limit)
+            return [neo for neo, _ in matches]
+        raise ValueError(f"Unknown kind of name match {match!r}.")
@@ -0,0 +1,216 @@
+"""Load an `NEODatabase` in the background, so that a session can start at once.
+
+Loading the close approach data takes seconds, but looking up an NEO only needs
+the much smaller NEO data file. A `BackgroundLoader` loads the data in a
+daemon thread, in two stages:
+
+1. The NEOs are loaded, and an NEO-only database (without close approaches) is
+   published: it answers lookups by designation or by name.
+2. The close approaches are loaded and linked with the NEOs, and the complete
+   database is published.
+
+`BackgroundLoader.wait` blocks until the stage a command needs is published,
+optionally displaying the progress of loading while it waits. The interactive
+shell uses it so that its prompt appears immediately, `inspect` works as soon as
+the NEOs are loaded, and `query` only waits as long as the approaches take.
+
+The loading thread competes with the main thread for the interpreter, so
+commands run while approaches are loading are somewhat slower.
+"""
+
+import threading
+import time
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos, read_approach_count
+from profiling import Profiler, phase
+from snapshot import load_database
+
+# How often, in seconds, the progress of loading is displayed while waiting.
+PROGRESS_INTERVAL = 0.2
+
+
+class BackgroundLoader:
+    """Load an `NEODatabase` from data files in a background thread, NEOs first.
+
+    Attributes:
+        loaded: The number of close approaches read so far.
+        expected: The number of close approaches announced by the data file,
+            or None if unknown.
+        error: The exception that stopped loading, or None.
+    """
+
+    def __init__(
+        self,
+        neo_csv_path,
+        cad_json_path,
+        columnar=False,
+        use_snapshot=False,
+        workers=1,
+        setup=None,
+        profiler=None,
+    ):
+        """Create a new `BackgroundLoader`; loading starts with `start`.
+
+        Args:
+            neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+            cad_json_path: A path to a JSON file containing data about close approaches.
+            columnar: Whether to keep the close approaches in columnar storage.
+            use_snapshot: Whether to read and write a snapshot of the loaded data,
+                in which case both stages are published at once.
+            workers: The number of processes parsing the close approach data file.
+            setup: A function called with each database before it is published,
+                such as to configure its cache, or None.
+            profiler: A `profiling.Profiler` to whose history the measurements
+                of loading are added once it finishes, or None.
+        """
+        self._neo_csv_path = neo_csv_path
+        self._cad_json_path = cad_json_path
+        self._columnar = columnar
+        self._use_snapshot = use_snapshot
+        self._workers = workers
+        self._setup = setup
+        self._profiler = profiler
+
+        self.loaded = 0
+        self.expected = None
+        self.error = None
+        self._stage = "Loading NEOs"
+        self._neo_database = None
+        self._database = None
+        self._neos_published = threading.Event()
+        self._published = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="neo-loader", daemon=True)
+
+    def start(self):
+        """Start loading in the background, and return this loader."""
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self):
+        """Return whether loading is over, whether it succeeded or not."""
+        return self._published.is_set()
+
+    def status(self):
+        """Return a one-line description of the progress of loading."""
+        if self.error is not None:
+            return f"Loading failed: {self.error}"
+        if self._database is not None:
+            return "Loading complete."
+        if self._stage != "Loading close approaches":
+            return f"{self._stage}..."
+        if self.expected:
+            share = min(self.loaded / self.expected, 1.0)
+            return (
+                f"Loading close approaches: {self.loaded:,} of "
+                f"{self.expected:,} ({share:.0%})"
+            )
+        return f"Loading close approaches: {self.loaded:,}"
+
+    def wait(self, approaches=True, indicator=None, timeout=None):
+        """Wait until the database is loaded enough, and return it.
+
+        Args:
+            approaches: Whether the close approaches are needed, or only the NEOs.
+            indicator: A text stream, such as `sys.stderr`, on which to display
+                the progress of loading while waiting, or None.
+            timeout: The maximum number of seconds to wait, or None to wait
+                as long as needed.
+
+        Returns:
+            NEODatabase: The complete database, or, if only the NEOs are needed
+                and the approaches are still loading, a database of the NEOs
+                without any close approach. None if the timeout expired first.
+
+        Raises:
+            Exception: The error that stopped loading, if any.
+        """
+        published = self._published if approaches else self._neos_published
+        deadline = None if timeout is None else time.monotonic() + timeout
+        width = 0
+        while not published.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if indicator is not None:
+                line = self.status()
+                indicator.write(f"\r{line:<{width}}")
+                indicator.flush()
+                width = len(line)
+            published.wait(min(PROGRESS_INTERVAL, remaining or PROGRESS_INTERVAL))
+        if width:
+            indicator.write(f"\r{'':<{width}}\r")
+            indicator.flush()
+
+        if self.error is not None:
+            raise self.error
+        if not published.is_set():
+            return None
+        return self._database or self._neo_database
+
+    def _publish(self, database, complete):
+        """Make a database available to `wait`."""
+        if self._setup is not None:
+            self._setup(database)
+        if complete:
+            self._database = database
+            self._published.set()
+        else:
+            self._neo_database = database
+        self._neos_published.set()
+
+    def _progress(self, loaded):
+        """Record how many close approaches have been read."""
+        self.loaded = loaded
+
+    def _run(self):
+        """Load the database, one stage after the other."""
+        profiler = Profiler()
+        try:
+            with profiler.command("load"):
+                if self._use_snapshot:
+                    self._stage = "Loading the snapshot"
+                    database = load_database(
+                        self._neo_csv_path,
+                        self._cad_json_path,
+                        columnar=self._columnar,
+                        use_snapshot=True,
+                        workers=self._workers,
+                        profiler=profiler,
+                    )
+                    self._publish(database, complete=True)
+                    return
+
+                with phase(profiler, "load_neos"):
+                    neos = load_neos(self._neo_csv_path)
+                with phase(profiler, "link"):
+                    # The NEOs stay unlinked, so the complete database can link them later.
+                    neo_database = NEODatabase(
+                        neos, ApproachColumns() if self._columnar else []
+                    )
+                    self._publish(neo_database, complete=False)
+
+                self._stage = "Loading close approaches"
+                self.expected = read_approach_count(self._cad_json_path)
+                with phase(profiler, "load_approaches"):
+                    approaches = load_approaches(
+                        self._cad_json_path,
+                        columnar=self._columnar,
+                        workers=self._workers,
+                        progress=self._progress,
+                    )
+                self._stage = "Linking close approaches"
+                with phase(profiler, "link"):
+                    # The lookups of NEOs built for the first stage are reused.
+                    database = neo_database.with_approaches(approaches)
+                self._publish(database, complete=True)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._neos_published.set()
+            self._published.set()
+            if self._profiler is not None and profiler.last is not None:
+                # Appending to a list is atomic, so the session's history is safe.
+                self._profiler.history.append(profiler.last)
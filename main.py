@@ -5,7 +5,7 @@ See `README.md` for a detailed discussion of this project.
 
 This script can be invoked from the command line::
 
-    $ python3 main.py {inspect,query,interactive} [args]
+    $ python3 main.py {inspect,query,stats,interactive,serve} [args]
 
 The `inspect` subcommand looks up an NEO by name or by primary designation, and
 optionally lists all of that NEO's known close approaches:
@@ -14,6 +14,13 @@ optionally lists all of that NEO's known close approaches:
     $ python3 main.py inspect --name Halley
     $ python3 main.py inspect --verbose --name Halley
 
+Names are matched regardless of case and accents. A name can also be matched
+by its start, or approximately, and similar names are suggested when no NEO
+matches:
+
+    $ python3 main.py inspect --prefix --name apo
+    $ python3 main.py inspect --fuzzy --name Hallley
+
 The `query` subcommand searches for close approaches that match given criteria:
 
     $ python3 main.py query --date 1969-07-29
@@ -23,37 +30,111 @@ The `query` subcommand searches for close approaches that match given criteria:
     $ python3 main.py query --start-date 2000-01-01 --max-diameter 0.1 --not-hazardous
     $ python3 main.py query --hazardous --max-distance 0.05 --min-velocity 30
 
-The set of results can be limited in size and/or saved to an output file in CSV
-or JSON format:
+The set of results can be limited in size and/or saved to an output file in CSV,
+JSON or JSON Lines (one object per line) format:
 
     $ python3 main.py query --limit 5 --outfile results.csv
     $ python3 main.py query --limit 15 --outfile results.json
+    $ python3 main.py query --limit 15 --outfile results.jsonl
+
+Results can be ordered by date, distance, velocity or diameter with `--sort-by`,
+from the largest value down with `--desc`. Combined with `--limit`, this finds
+the top matches without sorting all of them:
+
+    $ python3 main.py query --start-date 2020-01-01 --sort-by distance --limit 5
+    $ python3 main.py query --hazardous --sort-by velocity --desc --limit 10
+
+Data files and output files can be compressed with gzip, bzip2 or xz, as in
+`--cadfile data/cad.json.xz` or `--outfile results.csv.gz`.
+
+The `--explain` option prints how a query would be answered - the index used and
+the order in which filters are evaluated - with estimated row counts:
+
+    $ python3 main.py query --explain --start-date 2020-01-01 --max-distance 0.025
+
+The `stats` subcommand accepts the same filters as `query`, and counts and
+summarizes the matching close approaches (min, mean, max and percentiles of their
+distance, velocity and diameter) without building an object for each of them,
+optionally grouped by year, month, NEO, or hazardousness:
+
+    $ python3 main.py stats --hazardous --min-velocity 30
+    $ python3 main.py stats --group-by year --count --start-date 2020-01-01
+    $ python3 main.py stats --group-by hazardous --column velocity --percentile 90
 
 The `interactive` subcommand loads the NEO database and spawns an interactive
-command shell that can repeatedly execute `inspect` and `query` commands without
+command shell that can repeatedly execute `inspect`, `query` and `stats` commands without
 having to wait to reload the database each time. However, it doesn't hot-reload.
+The prompt appears at once, while the data loads in the background: `inspect`
+works as soon as the NEOs are loaded, and `query` and `stats` wait (showing the
+progress of loading) until the close approaches are.
+
+The `serve` subcommand also loads the database once, and then answers `inspect`
+and `query` requests from other programs over HTTP with JSON responses (see
+`server.py`):
+
+    $ python3 main.py serve --port 8642
 
 If needed, the script can load data from data files other than the default with
-`--neofile` or `--cadfile`.
+`--neofile` or `--cadfile`. The `--storage columnar` option keeps close
+approaches in compact typed arrays instead of one object per approach, and the
+`--snapshot` option caches the loaded data in a binary snapshot for fast startup.
+When NumPy is installed, queries on columnar storage evaluate each filter on
+whole columns at once, rather than one row at a time (see `vectorized.py`).
+With `--workers N`, the close approach data file is parsed by N processes.
+The results of repeated queries are cached within a session; the interactive
+`cache` command shows how often the cache was hit.
+
+To find out where the time goes, `--metrics` prints how long each phase of
+loading and of the command took (reading each file, linking the database,
+planning and running the query, writing the results), how many rows were
+scanned and yielded, and the peak memory allocated; `--metrics-file` saves the
+same measurements as JSON. `--profile` runs the whole script under `cProfile`:
+
+    $ python3 main.py --metrics query --hazardous --max-distance 0.01
+    $ python3 main.py --metrics-file metrics.json query --sort-by velocity --limit 5
+    $ python3 main.py --profile query.prof query --limit 1000 --outfile results.csv
+    $ python3 -m pstats query.prof
+
+In the interactive shell, the `metrics` command shows these measurements.
 """
 
 import argparse
 import cmd
+import contextlib
 import datetime
+import json
+import math
 import pathlib
 import shlex
 import sys
 import time
 
-from database import NEODatabase
-from extract import load_approaches, load_neos
-from filters import create_filters, limit
+from aggregate import (
+    DEFAULT_PERCENTILES,
+    GROUP_KEYS,
+    SUMMARY_COLUMNS,
+    Aggregate,
+    group_order,
+)
+from cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, QueryCache
+from compression import format_suffix
+from database import SORT_KEYS
+from filters import create_filters
+from loading import BackgroundLoader
+from profiling import Profiler, cprofile, phase, timed
+from server import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_WORKERS, serve
+from snapshot import load_database
 from validation import (
     handle_validation_error,
     validate_file_path,
     validate_query_arguments,
 )
-from write import write_to_csv, write_to_json, write_to_json_streaming
+from write import (
+    write_to_csv,
+    write_to_json,
+    write_to_json_streaming,
+    write_to_ndjson,
+)
 
 # Paths to the root of the project and the `data` subfolder.
 PROJECT_ROOT = pathlib.Path(__file__).parent.resolve()
@@ -86,57 +167,36 @@ def date_fromisoformat(date_string):
         ) from None
 
 
-def make_parser():
-    """Create an ArgumentParser for this script.
+def percentile(text):
+    """Return a percentile between 0 and 100 given as a string.
+
+    Args:
+        text: A number between 0 and 100, such as "50" or "99.9".
 
     Returns:
-        tuple: A tuple of the top-level, inspect, and query parsers.
+        float: The percentile.
+
+    Raises:
+        argparse.ArgumentTypeError: If the text isn't a number between 0 and 100.
     """
-    parser = argparse.ArgumentParser(
-        description="Explore past and future close approaches of near-Earth objects."
-    )
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not 0 <= value <= 100:
+        raise argparse.ArgumentTypeError(
+            f"'{text}' is not a valid percentile. Use a number between 0 and 100."
+        )
+    return value
 
-    # Add arguments for custom data files.
-    parser.add_argument(
-        "--neofile",
-        default=(DATA_ROOT / "neos.csv"),
-        type=pathlib.Path,
-        help="Path to CSV file of near-Earth objects.",
-    )
-    parser.add_argument(
-        "--cadfile",
-        default=(DATA_ROOT / "cad.json"),
-        type=pathlib.Path,
-        help="Path to JSON file of close approach data.",
-    )
-    subparsers = parser.add_subparsers(dest="cmd")
 
-    # Add the `inspect` subcommand parser.
-    inspect = subparsers.add_parser(
-        "inspect", description="Inspect an NEO by primary designation or by name."
-    )
-    inspect.add_argument(
-        "-v",
-        "--verbose",
-        action="store_true",
-        help="Additionally, print all known close approaches of this NEO.",
-    )
-    inspect_id = inspect.add_mutually_exclusive_group(required=True)
-    inspect_id.add_argument(
-        "-p",
-        "--pdes",
-        help="The primary designation of the NEO to inspect (e.g. '433').",
-    )
-    inspect_id.add_argument(
-        "-n", "--name", help="The IAU name of the NEO to inspect (e.g. 'Halley')."
-    )
+def add_filter_arguments(parser):
+    """Add the options that filter close approaches to a subcommand's parser.
 
-    # Add the `query` subcommand parser.
-    query = subparsers.add_parser(
-        "query",
-        description="Query for close approaches that match a collection of filters.",
-    )
-    filters = query.add_argument_group(
+    Args:
+        parser: The parser of the `query` or `stats` subcommand.
+    """
+    filters = parser.add_argument_group(
         "Filters",
         description="Filter close approaches by their attributes "
         "or the attributes of their NEOs.",
@@ -222,6 +282,128 @@ def make_parser():
         help="If specified, only return close approaches of NEOs that "
         "are not potentially hazardous.",
     )
+
+
+def make_parser():
+    """Create an ArgumentParser for this script.
+
+    Returns:
+        tuple: A tuple of the top-level, inspect, query, and stats parsers.
+    """
+    parser = argparse.ArgumentParser(
+        description="Explore past and future close approaches of near-Earth objects."
+    )
+
+    # Add arguments for custom data files.
+    parser.add_argument(
+        "--neofile",
+        default=(DATA_ROOT / "neos.csv"),
+        type=pathlib.Path,
+        help="Path to CSV file of near-Earth objects.",
+    )
+    parser.add_argument(
+        "--cadfile",
+        default=(DATA_ROOT / "cad.json"),
+        type=pathlib.Path,
+        help="Path to JSON file of close approach data.",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=("objects", "columnar"),
+        default="objects",
+        help="How to store close approaches in memory. The columnar engine "
+        "uses several times less memory, and materializes approaches on demand; "
+        "with NumPy installed, its queries are vectorized.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Load the data from a binary snapshot next to the data files, "
+        "creating or refreshing the snapshot if the data files changed.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes parsing the close approach data file "
+        "in parallel. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="How many distinct queries to cache the results of. "
+        f"0 disables the cache. Defaults to {DEFAULT_MAX_ENTRIES}.",
+    )
+    parser.add_argument(
+        "--cache-memory",
+        type=float,
+        default=DEFAULT_MAX_BYTES / 2**20,
+        help="In MiB. The memory budget of the query result cache. "
+        f"Defaults to {DEFAULT_MAX_BYTES // 2**20}.",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Print the time of each phase of loading and of the command, the "
+        "rows scanned and yielded, and the peak memory allocated, to stderr.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=pathlib.Path,
+        help="Save the measurements of --metrics to a JSON file.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=pathlib.Path,
+        help="Run under cProfile, and save its statistics to a file "
+        "(read with `python -m pstats FILE`).",
+    )
+    subparsers = parser.add_subparsers(dest="cmd")
+
+    # Add the `inspect` subcommand parser.
+    inspect = subparsers.add_parser(
+        "inspect", description="Inspect an NEO by primary designation or by name."
+    )
+    inspect.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Additionally, print all known close approaches of this NEO.",
+    )
+    inspect_id = inspect.add_mutually_exclusive_group(required=True)
+    inspect_id.add_argument(
+        "-p",
+        "--pdes",
+        help="The primary designation of the NEO to inspect (e.g. '433').",
+    )
+    inspect_id.add_argument(
+        "-n", "--name", help="The IAU name of the NEO to inspect (e.g. 'Halley')."
+    )
+    name_match = inspect.add_mutually_exclusive_group()
+    name_match.add_argument(
+        "--prefix",
+        dest="match",
+        action="store_const",
+        const="prefix",
+        default="exact",
+        help="With --name, list every NEO whose name starts with the given text.",
+    )
+    name_match.add_argument(
+        "--fuzzy",
+        dest="match",
+        action="store_const",
+        const="fuzzy",
+        default="exact",
+        help="With --name, list the NEOs with the most similar names.",
+    )
+
+    # Add the `query` subcommand parser.
+    query = subparsers.add_parser(
+        "query",
+        description="Query for close approaches that match a collection of filters.",
+    )
+    add_filter_arguments(query)
     query.add_argument(
         "-l",
         "--limit",
@@ -229,12 +411,73 @@ def make_parser():
         help="The maximum number of matches to return. "
         "Defaults to 10 if no --outfile is given.",
     )
+    query.add_argument(
+        "--sort-by",
+        choices=SORT_KEYS,
+        help="Order the results by the time of approach, the approach distance or "
+        "velocity, or the diameter of the NEO, from the smallest value up. With "
+        "--limit, only the best matches are kept while the query runs.",
+    )
+    query.add_argument(
+        "--desc",
+        action="store_true",
+        help="With --sort-by, order the results from the largest value down.",
+    )
     query.add_argument(
         "-o",
         "--outfile",
         type=pathlib.Path,
-        help="File in which to save structured results. "
-        "If omitted, results are printed to standard output.",
+        help="File in which to save structured results, as CSV (.csv), JSON "
+        "(.json) or JSON Lines (.jsonl, .ndjson), optionally compressed "
+        "(.gz, .bz2, .xz). If omitted, results are printed to standard output.",
+    )
+    query.add_argument(
+        "--explain",
+        action="store_true",
+        help="Instead of running the query, print the chosen query plan "
+        "with estimated row counts.",
+    )
+
+    # Add the `stats` subcommand parser.
+    stats = subparsers.add_parser(
+        "stats",
+        description="Count and summarize the close approaches that match "
+        "a collection of filters, optionally in groups.",
+    )
+    add_filter_arguments(stats)
+    stats.add_argument(
+        "-g",
+        "--group-by",
+        choices=GROUP_KEYS,
+        help="Summarize the matches separately for each year or month of "
+        "approach, for each NEO, or for hazardous and other NEOs.",
+    )
+    stats.add_argument(
+        "--column",
+        dest="columns",
+        action="append",
+        choices=tuple(SUMMARY_COLUMNS),
+        help="A column to summarize; may be repeated. Defaults to every column.",
+    )
+    stats.add_argument(
+        "-p",
+        "--percentile",
+        dest="percentiles",
+        action="append",
+        type=percentile,
+        help="A percentile (0-100) of each column to report; may be repeated. "
+        "Defaults to the median.",
+    )
+    stats.add_argument(
+        "-c",
+        "--count",
+        action="store_true",
+        help="Only count the matches, without summarizing any column.",
+    )
+    stats.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the statistics as a JSON document.",
     )
 
     repl = subparsers.add_parser(
@@ -248,71 +491,107 @@ def make_parser():
         action="store_true",
         help="If specified, kill the session whenever a project file is modified.",
     )
-    return parser, inspect, query
+
+    server = subparsers.add_parser(
+        "serve",
+        description="Answer `inspect` and `query` requests over HTTP "
+        "with JSON responses, loading the database only once.",
+    )
+    server.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"The address to listen on. Defaults to {DEFAULT_HOST}.",
+    )
+    server.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"The port to listen on. Defaults to {DEFAULT_PORT}.",
+    )
+    server.add_argument(
+        "--threads",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="The number of threads answering requests concurrently. "
+        f"Defaults to {DEFAULT_WORKERS}.",
+    )
+    server.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="If specified, log every request to standard error.",
+    )
+    return parser, inspect, query, stats
 
 
-def inspect(database, pdes=None, name=None, verbose=False):
+def inspect(database, pdes=None, name=None, verbose=False, match="exact"):
     """Perform the inspect subcommand.
 
     This function fetches an NEO by designation or by name. If a matching NEO is
     found, information about the NEO is printed (additionally, information for
     all of the NEO's known close approaches is printed if verbose=True).
-    Otherwise, a message is printed noting that there are no matching NEOs.
+    Otherwise, a message is printed noting that there are no matching NEOs,
+    followed by the names of similar NEOs, if any.
 
     At least one of pdes and name must be given. If both are given, prefer
-    to look up the NEO by the primary designation.
+    to look up the NEO by the primary designation. Names are first matched
+    exactly, then regardless of case, accents and spacing. With a `match` of
+    "prefix" or "fuzzy", every NEO whose name starts with (or resembles) the
+    given name is printed instead.
 
     Args:
         database: The NEODatabase containing data on NEOs and their close approaches.
         pdes: The primary designation of an NEO for which to search.
         name: The name of an NEO for which to search.
         verbose: Whether to additionally print all of a matching NEO's close approaches.
+        match: How to match the name: "exact", "prefix" or "fuzzy".
 
     Returns:
-        NearEarthObject: The matching NEO, or None if not found.
+        NearEarthObject: The matching NEO, or None if not found. With a `match`
+            of "prefix" or "fuzzy", the list of matching NEOs instead.
     """
-    # Fetch the NEO of interest.
-    if pdes:
-        neo = database.get_neo_by_designation(pdes)
-    else:
-        neo = database.get_neo_by_name(name)
+    # Fetch the NEO(s) of interest.
+    profiler = database.profiler
+    with phase(profiler, "lookup"):
+        if pdes:
+            neos = [database.get_neo_by_designation(pdes)]
+        elif match == "exact":
+            neos = [database.get_neo_by_name(name)]
+            if neos[0] is None:
+                neos = database.find_neos_by_name(name)
+        else:
+            neos = database.find_neos_by_name(name, match)
 
     # Ensure that we have received an NEO.
-    if not neo:
+    neos = [neo for neo in neos if neo is not None]
+    if not neos:
         print("No matching NEOs exist in the database.", file=sys.stderr)
-        return None
+        with phase(profiler, "suggest"):
+            suggestions = database.suggest_names(name) if name and not pdes else []
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?", file=sys.stderr)
+        return [] if match != "exact" and not pdes else None
 
-    # Display information about this NEO, and optionally its close approaches if verbose.
-    print(neo)
-    if verbose:
-        for approach in neo.approaches:
-            print(f"- {approach}")
-    return neo
+    # Display information about each NEO, and optionally its close approaches if verbose.
+    with phase(profiler, "write"):
+        for neo in neos:
+            print(neo)
+            if verbose:
+                for approach in timed(profiler, neo.approaches, "approaches"):
+                    print(f"- {approach}")
+    return neos if match != "exact" and not pdes else neos[0]
 
 
-def query(database, args):
-    """Perform the query subcommand.
-
-    Create a collection of filters with create_filters and supply them to the
-    database's query method to produce a stream of matching results.
-
-    If an output file wasn't given, print these results to stdout, limiting to
-    10 entries if no limit was specified. If an output file was given, use the
-    file's extension to infer whether the file should hold CSV or JSON data, and
-    then write the results to the output file in that format.
+def filters_from_arguments(args):
+    """Construct a collection of filters from the filter options of a subcommand.
 
     Args:
-        database: The NEODatabase containing data on NEOs and their close approaches.
-        args: All arguments from the command line, as parsed by the top-level parser.
-    """
-    # Validate arguments before processing
-    try:
-        validate_query_arguments(args)
-    except Exception as e:
-        handle_validation_error(e)
+        args: The arguments of the `query` or `stats` subcommand.
 
-    # Construct a collection of filters from arguments supplied at the command line.
-    filters = create_filters(
+    Returns:
+        list: The filters, as returned by `create_filters`.
+    """
+    return create_filters(
         date=args.date,
         start_date=args.start_date,
         end_date=args.end_date,
@@ -324,32 +603,162 @@ def query(database, args):
         diameter_max=args.diameter_max,
         hazardous=args.hazardous,
     )
-    # Query the database with the collection of filters.
-    results = database.query(filters)
+
+
+def query(database, args):
+    """Perform the query subcommand.
+
+    Create a collection of filters with create_filters and supply them to the
+    database's query method to produce a stream of matching results.
+
+    If an output file wasn't given, print these results to stdout, limiting to
+    10 entries if no limit was specified. If an output file was given, use the
+    file's extension to infer whether the file should hold CSV, JSON or JSON
+    Lines data, and then write the results to the output file in that format.
+
+    Args:
+        database: The NEODatabase containing data on NEOs and their close approaches.
+        args: All arguments from the command line, as parsed by the top-level parser.
+    """
+    profiler = database.profiler
+    with phase(profiler, "filters"):
+        # Validate arguments before processing
+        try:
+            validate_query_arguments(args)
+        except Exception as e:
+            handle_validation_error(e)
+
+        # Construct a collection of filters from arguments supplied at the command line.
+        filters = filters_from_arguments(args)
+    if args.explain:
+        with phase(profiler, "plan"):
+            print(database.plan(filters))
+        return
+
+    # Query the database with the collection of filters, limiting to 10 entries
+    # if not specified when writing to stdout. The time spent producing each
+    # result is charged to the `query` phase, the rest to the `write` phase.
+    count = args.limit or (None if args.outfile else 10)
+    results = database.query(
+        filters, sort_by=args.sort_by, descending=args.desc, limit=count
+    )
+    results = timed(profiler, results, "query")
 
     if not args.outfile:
-        # Write the results to stdout, limiting to 10 entries if not specified.
-        for result in limit(results, args.limit or 10):
-            print(result)
+        # Write the results to stdout.
+        with phase(profiler, "write"):
+            for result in results:
+                print(result)
     else:
         # Write the results to a file.
-        try:
-            if args.outfile.suffix == ".csv":
-                write_to_csv(limit(results, args.limit), args.outfile)
-            elif args.outfile.suffix == ".json":
-                # Use streaming JSON for large datasets
-                if args.limit and args.limit > 1000:
-                    write_to_json_streaming(limit(results, args.limit), args.outfile)
+        with phase(profiler, "write"):
+            try:
+                suffix = format_suffix(args.outfile)
+                if suffix == ".csv":
+                    write_to_csv(results, args.outfile)
+                elif suffix == ".json":
+                    # Use streaming JSON for large datasets
+                    if args.limit and args.limit > 1000:
+                        write_to_json_streaming(results, args.outfile)
+                    else:
+                        write_to_json(results, args.outfile)
+                elif suffix in (".jsonl", ".ndjson"):
+                    write_to_ndjson(results, args.outfile)
                 else:
-                    write_to_json(limit(results, args.limit), args.outfile)
-            else:
-                print(
-                    "Please use an output file that ends with `.csv` or `.json`.",
-                    file=sys.stderr,
-                )
+                    print(
+                        "Please use an output file that ends with `.csv`, `.json`, "
+                        "`.jsonl` or `.ndjson`, optionally followed by `.gz`, `.bz2` "
+                        "or `.xz`.",
+                        file=sys.stderr,
+                    )
+            except Exception as e:
+                print(f"Error writing to file: {e}", file=sys.stderr)
+                sys.exit(1)
+
+
+def stats(database, args):
+    """Perform the stats subcommand.
+
+    Create a collection of filters with create_filters and supply them to the
+    database's aggregate method (or its count method, with --count), then print
+    the count of matches and a summary of each column, for each group.
+
+    Args:
+        database: The NEODatabase containing data on NEOs and their close approaches.
+        args: All arguments from the command line, as parsed by the top-level parser.
+
+    Returns:
+        dict: The `aggregate.Aggregate` of each group.
+    """
+    profiler = database.profiler
+    with phase(profiler, "filters"):
+        try:
+            validate_query_arguments(args)
         except Exception as e:
-            print(f"Error writing to file: {e}", file=sys.stderr)
-            sys.exit(1)
+            handle_validation_error(e)
+        filters = filters_from_arguments(args)
+
+    percentiles = args.percentiles or DEFAULT_PERCENTILES
+    if args.count and args.group_by is None:
+        # A plain count needs neither a group nor any column value.
+        with phase(profiler, "aggregate"):
+            count = database.count(filters)
+        if profiler is not None:
+            profiler.count("yielded", count)
+        print(json.dumps({"count": count}) if args.json else count)
+        return {None: Aggregate(count, {})}
+
+    columns = () if args.count else args.columns or tuple(SUMMARY_COLUMNS)
+    with phase(profiler, "aggregate"):
+        groups = database.aggregate(filters, group_by=args.group_by, columns=columns)
+    if profiler is not None:
+        profiler.count("yielded", sum(group.count for group in groups.values()))
+    with phase(profiler, "write"):
+        print_stats(groups, args.group_by, percentiles, args.json)
+    return groups
+
+
+def print_stats(groups, group_by, percentiles, as_json=False):
+    """Print the statistics of the groups of matching close approaches.
+
+    Args:
+        groups: The `aggregate.Aggregate` of each group.
+        group_by: How the matches were grouped, or None.
+        percentiles: The percentiles of each column to print.
+        as_json: Whether to print a JSON document rather than text.
+    """
+    keys = sorted(groups, key=group_order)
+
+    if as_json:
+        document = {
+            "group_by": group_by,
+            "groups": [
+                {"group": key, **groups[key].serialize(percentiles)} for key in keys
+            ],
+        }
+        print(json.dumps(document, indent=2))
+        return
+
+    if not groups:
+        print("No matching close approaches.")
+    for key in keys:
+        group = groups[key]
+        if group_by is None:
+            heading = f"{group.count} matching close approaches"
+        else:
+            heading = f"{'(unknown)' if key is None else key}: {group.count} close approaches"
+        print(heading)
+        for column, summary in group.summaries.items():
+            values = [
+                f"min {summary.min:.4g}",
+                f"mean {summary.mean:.4g}",
+                f"max {summary.max:.4g}",
+            ]
+            values += [f"p{q:g} {summary.percentile(q):.4g}" for q in percentiles]
+            line = f"  {column} ({SUMMARY_COLUMNS[column]}): {', '.join(values)}"
+            if summary.missing:
+                line += f" ({summary.missing} unknown)"
+            print(line)
 
 
 class NEOShell(cmd.Cmd):
@@ -362,7 +771,8 @@ class NEOShell(cmd.Cmd):
 
     The primary purpose of this shell is to allow users to repeatedly perform
     inspect and query commands, while only loading the data (which can be quite
-    slow) once.
+    slow) once. With a `loading.BackgroundLoader`, the session starts while the
+    data loads: each command only waits for the part of the data it needs.
     """
 
     intro = (
@@ -372,23 +782,79 @@ class NEOShell(cmd.Cmd):
     prompt = "(neo) "
 
     def __init__(
-        self, database, inspect_parser, query_parser, aggressive=False, **kwargs
+        self,
+        database,
+        inspect_parser,
+        query_parser,
+        stats_parser=None,
+        aggressive=False,
+        profiler=None,
+        show_metrics=False,
+        loader=None,
+        **kwargs,
     ):
         """Create a new `NEOShell`.
 
         Creating this object doesn't start the session - for that, use `.cmdloop()`.
 
-        :param database: The `NEODatabase` containing data on NEOs and their close approaches.
+        :param database: The `NEODatabase` containing data on NEOs and their close
+            approaches, or None if it is loaded by `loader`.
         :param inspect_parser: The subparser for the `inspect` subcommand.
         :param query_parser: The subparser for the `query` subcommand.
+        :param stats_parser: The subparser for the `stats` subcommand, if available.
         :param aggressive: Whether to kill the session whenever a project file is changed.
+        :param profiler: The `profiling.Profiler` measuring each command, if any.
+        :param show_metrics: Whether to print the measurements after each command.
+        :param loader: A started `loading.BackgroundLoader` of the database, if any.
         :param kwargs: A dictionary of excess keyword arguments passed to the superclass.
         """
         super().__init__(**kwargs)
         self.db = database
         self.inspect = inspect_parser
         self.query = query_parser
+        self.stats = stats_parser
         self.aggressive = aggressive
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.show_metrics = show_metrics
+        self.loader = loader
+        if self.db is not None and self.db.profiler is None:
+            self.db.profiler = self.profiler
+        if loader is not None:
+            self.intro += "(The data is loading in the background.)\n"
+
+    def database(self, approaches=True):
+        """Return the database, once it is loaded enough for a command.
+
+        While waiting, the progress of loading is displayed on a terminal.
+
+        :param approaches: Whether the command needs the close approaches, or only the NEOs.
+        :return: The `NEODatabase`, or None if the data couldn't be loaded.
+        """
+        if self.loader is None:
+            return self.db
+        indicator = sys.stderr if sys.stderr.isatty() else None
+        try:
+            with phase(self.profiler, "wait"):
+                database = self.loader.wait(approaches, indicator)
+        except Exception as e:
+            print(f"Error loading data: {e}", file=sys.stderr)
+            return None
+        if database.profiler is None:
+            database.profiler = self.profiler
+        self.db = database
+        return database
+
+    @contextlib.contextmanager
+    def measured(self, command, arg):
+        """Measure a command run within a `with` block, then optionally print its metrics.
+
+        :param command: The name of the command.
+        :param arg: The additional text supplied after the command.
+        """
+        with self.profiler.command(command, arg.strip()):
+            yield
+        if self.show_metrics:
+            print(self.profiler.last, file=sys.stderr)
 
     @classmethod
     def parse_arg_with(cls, arg, parser):
@@ -432,13 +898,28 @@ class NEOShell(cmd.Cmd):
         Additionally, list all known close approaches:
 
             (neo) inspect --verbose --name Eros
+
+        Names are matched regardless of case. List the NEOs whose name starts
+        with some text, or whose name is similar to a misspelled one:
+
+            (neo) inspect --prefix --name ap
+            (neo) inspect --fuzzy --name Apolo
         """
         args = self.parse_arg_with(arg, self.inspect)
         if not args:
             return
 
-        # Run the `inspect` subcommand.
-        inspect(self.db, pdes=args.pdes, name=args.name, verbose=args.verbose)
+        # Run the `inspect` subcommand, which only needs the approaches if verbose.
+        with self.measured("inspect", arg):
+            database = self.database(approaches=args.verbose)
+            if database is not None:
+                inspect(
+                    database,
+                    pdes=args.pdes,
+                    name=args.name,
+                    verbose=args.verbose,
+                    match=args.match,
+                )
 
     def do_q(self, arg):
         """Shorthand for `query`."""
@@ -460,18 +941,110 @@ class NEOShell(cmd.Cmd):
 
             (neo) query --limit 2
 
+        The results can be ordered with `--sort-by` (and `--desc`):
+
+            (neo) query --sort-by distance --limit 5
+            (neo) query --hazardous --sort-by diameter --desc --limit 5
+
         The results can be saved to a file (instead of displayed to stdout) with
         `--outfile`:
 
             (neo) query --limit 5 --outfile results.csv
             (neo) query --limit 5 --outfile results.json
+            (neo) query --limit 5 --outfile results.jsonl
         """
         args = self.parse_arg_with(arg, self.query)
         if not args:
             return
 
-        # Run the `inspect` subcommand.
-        query(self.db, args)
+        # Run the `query` subcommand.
+        with self.measured("query", arg):
+            database = self.database()
+            if database is not None:
+                query(database, args)
+
+    def do_stats(self, arg):
+        """Perform the `stats` subcommand within the REPL session.
+
+        This command behaves the same as the `stats` subcommand from the command
+        line, and accepts the same filters as `query`. For example, to count
+        the close approaches of hazardous NEOs by year, or to summarize the
+        distance of the approaches of 2020:
+
+            (neo) stats --hazardous --group-by year --count
+            (neo) stats --start-date 2020-01-01 --end-date 2020-12-31 --column distance
+        """
+        if self.stats is None:
+            print("The `stats` command isn't available.", file=sys.stderr)
+            return
+        args = self.parse_arg_with(arg, self.stats)
+        if not args:
+            return
+
+        # Run the `stats` subcommand.
+        with self.measured("stats", arg):
+            database = self.database()
+            if database is not None:
+                stats(database, args)
+
+    def do_metrics(self, arg):
+        """Show how long the phases of the last command took, and how many rows it scanned.
+
+            (neo) metrics
+
+        Show the measurements of every command of the session, including the
+        loading of the data, or save them to a JSON file:
+
+            (neo) metrics all
+            (neo) metrics save metrics.json
+
+        Print the measurements after every command, including the peak memory
+        allocated (which slows commands down), or stop printing them:
+
+            (neo) metrics on
+            (neo) metrics off
+        """
+        try:
+            words = shlex.split(arg)
+        except ValueError as err:
+            print(err, file=sys.stderr)
+            return
+        if words in (["on"], ["off"]):
+            self.show_metrics = self.profiler.trace_memory = words == ["on"]
+        elif len(words) == 2 and words[0] == "save":
+            try:
+                self.profiler.dump(words[1])
+            except OSError as err:
+                print(f"Error writing to file: {err}", file=sys.stderr)
+        elif words == ["all"]:
+            for metrics in self.profiler.history:
+                print(metrics)
+        elif not words:
+            if self.profiler.last is None:
+                print("No command has been measured yet.")
+            else:
+                print(self.profiler.last)
+        else:
+            print("Usage: metrics [all | on | off | save FILE]", file=sys.stderr)
+
+    def do_cache(self, arg):
+        """Show the usage of the query result cache, or empty it.
+
+            (neo) cache
+            (neo) cache clear
+        """
+        database = self.database()
+        if database is None:
+            return
+        if database.cache is None:
+            print("The query result cache is disabled.")
+            return
+        if arg.strip() == "clear":
+            database.cache.clear()
+        elif arg.strip():
+            print("Usage: cache [clear]", file=sys.stderr)
+            return
+        print(database.cache)
 
     def do_EOF(self, _arg):
         """Exit the interactive session."""
@@ -506,7 +1079,7 @@ class NEOShell(cmd.Cmd):
 
 def main():
     """Run the main script."""
-    parser, inspect_parser, query_parser = make_parser()
+    parser, inspect_parser, query_parser, stats_parser = make_parser()
     args = parser.parse_args()
 
     # Validate input files before loading data
@@ -516,22 +1089,103 @@ def main():
     except Exception as e:
         handle_validation_error(e)
 
+    # Measure every phase; tracing memory is only worth its cost on request.
+    profiler = Profiler(trace_memory=args.metrics or args.metrics_file is not None)
+    try:
+        with cprofile(args.profile):
+            run(args, profiler, inspect_parser, query_parser, stats_parser)
+    finally:
+        if args.metrics and args.cmd != "interactive":
+            for metrics in profiler.history:
+                print(metrics, file=sys.stderr)
+        if args.metrics_file is not None:
+            profiler.dump(args.metrics_file)
+
+
+def run(args, profiler, inspect_parser, query_parser, stats_parser):
+    """Load the database, and run the chosen subcommand.
+
+    Args:
+        args: All arguments from the command line, as parsed by the top-level parser.
+        profiler: The `profiling.Profiler` measuring loading and the subcommand.
+        inspect_parser: The subparser for the `inspect` subcommand.
+        query_parser: The subparser for the `query` subcommand.
+        stats_parser: The subparser for the `stats` subcommand.
+    """
+
+    def configure(database):
+        """Give a loaded database the query cache chosen on the command line."""
+        database.cache = (
+            QueryCache(args.cache_entries, int(args.cache_memory * 2**20))
+            if args.cache_entries > 0
+            else None
+        )
+
+    if args.cmd == "interactive":
+        # Start the session at once, and load the data in the background.
+        loader = BackgroundLoader(
+            args.neofile,
+            args.cadfile,
+            columnar=args.storage == "columnar",
+            use_snapshot=args.snapshot,
+            workers=args.workers,
+            setup=configure,
+            profiler=profiler,
+        )
+        NEOShell(
+            None,
+            inspect_parser,
+            query_parser,
+            stats_parser,
+            aggressive=args.aggressive,
+            profiler=profiler,
+            show_metrics=args.metrics,
+            loader=loader.start(),
+        ).cmdloop()
+        return
+
     # Extract data from the data files into structured Python objects.
     try:
-        database = NEODatabase(load_neos(args.neofile), load_approaches(args.cadfile))
+        with profiler.command("load"):
+            database = load_database(
+                args.neofile,
+                args.cadfile,
+                columnar=args.storage == "columnar",
+                use_snapshot=args.snapshot,
+                workers=args.workers,
+                profiler=profiler,
+            )
     except Exception as e:
         print(f"Error loading data: {e}", file=sys.stderr)
         sys.exit(1)
+    configure(database)
 
     # Run the chosen subcommand.
+    if args.cmd in ("inspect", "query", "stats"):
+        database.profiler = profiler
     if args.cmd == "inspect":
-        inspect(database, pdes=args.pdes, name=args.name, verbose=args.verbose)
+        with profiler.command("inspect"):
+            inspect(
+                database,
+                pdes=args.pdes,
+                name=args.name,
+                verbose=args.verbose,
+                match=args.match,
+            )
     elif args.cmd == "query":
-        query(database, args)
-    elif args.cmd == "interactive":
-        NEOShell(
-            database, inspect_parser, query_parser, aggressive=args.aggressive
-        ).cmdloop()
+        with profiler.command("query"):
+            query(database, args)
+    elif args.cmd == "stats":
+        with profiler.command("stats"):
+            stats(database, args)
+    elif args.cmd == "serve":
+        serve(
+            database,
+            host=args.host,
+            port=args.port,
+            workers=args.threads,
+            verbose=args.verbose,
+        )
 
 
 if __name__ == "__main__":
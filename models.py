@@ -15,10 +15,23 @@ The functions that construct these objects use information extracted from the
 data files from NASA, so these objects should be able to handle all of the
 quirks of the data set, such as missing names and unknown diameters.
 
+Hundreds of thousands of these objects are kept in memory at once, so both
+classes declare `__slots__` instead of carrying a per-instance `__dict__`, and
+primary designations are interned so that every approach shares its NEO's
+string.
+
 You'll edit this file in Task 1.
 """
 
-from helpers import cd_to_datetime, datetime_to_str
+import datetime
+import sys
+
+from helpers import (
+    cd_to_datetime,
+    datetime_to_minutes,
+    datetime_to_str,
+    minutes_to_datetime,
+)
 
 
 class NearEarthObject:
@@ -34,24 +47,55 @@ class NearEarthObject:
     `NEODatabase` constructor.
     """
 
+    __slots__ = (
+        "designation",
+        "name",
+        "diameter",
+        "hazardous",
+        "magnitude",
+        "albedo",
+        "moid",
+        "orbit_class",
+        "approaches",
+    )
+
     def __init__(
-        self, designation="", name=None, diameter=float("nan"), hazardous=False
+        self,
+        designation="",
+        name=None,
+        diameter=float("nan"),
+        hazardous=False,
+        magnitude=None,
+        albedo=None,
+        moid=None,
+        orbit_class=None,
     ):
         """Create a new NearEarthObject.
 
+        The optional orbital and physical parameters are only known if they
+        were requested from `extract.load_neos`; otherwise they are None.
+
         Args:
             designation: The primary designation of the NEO (required).
             name: The IAU name of the NEO (optional).
             diameter: The diameter in kilometers (optional, use float('nan') if unknown).
             hazardous: Whether the NEO is potentially hazardous.
+            magnitude: The absolute magnitude parameter H (optional).
+            albedo: The geometric albedo (optional).
+            moid: The Earth minimum orbit intersection distance in au (optional).
+            orbit_class: The orbit classification, such as 'APO' (optional).
         """
         # Assign information from the arguments passed to the constructor
-        self.designation = str(designation) if designation else ""
+        self.designation = sys.intern(str(designation)) if designation else ""
         self.name = name if name and name.strip() else None
         self.diameter = (
             float(diameter) if diameter and str(diameter).strip() else float("nan")
         )
         self.hazardous = bool(hazardous)
+        self.magnitude = magnitude
+        self.albedo = albedo
+        self.moid = moid
+        self.orbit_class = orbit_class
 
         # Create an empty initial collection of linked approaches.
         self.approaches = []
@@ -95,6 +139,17 @@ class NearEarthObject:
             "potentially_hazardous": self.hazardous,
         }
 
+    def serialize_row(self):
+        """Return a flat tuple representation of this NEO for serialization.
+
+        The values are those of `serialize`, in the order of its keys, without
+        building a dictionary.
+
+        Returns:
+            tuple: The designation, name, diameter and hazardous flag of this NEO.
+        """
+        return (self.designation, self.name or "", self.diameter, self.hazardous)
+
 
 class CloseApproach:
     """A close approach to Earth by an NEO.
@@ -108,9 +163,24 @@ class CloseApproach:
     initially, this information (the NEO's primary designation) is saved in a
     private attribute, but the referenced NEO is eventually replaced in the
     `NEODatabase` constructor.
+
+    The time of approach is stored in one of two forms: as a `datetime`, set
+    through `time`, or compactly, as a whole number of minutes since the epoch,
+    set through `minutes` (or with `compact_time`). Both attributes can be read
+    whatever the form; reading `time` from the compact form creates a new
+    `datetime`. Only these two setters write the underlying `_time` slot.
     """
 
-    def __init__(self, designation="", time=None, distance=0.0, velocity=0.0):
+    __slots__ = ("_designation", "_time", "distance", "velocity", "neo")
+
+    def __init__(
+        self,
+        designation="",
+        time=None,
+        distance=0.0,
+        velocity=0.0,
+        compact_time=False,
+    ):
         """Create a new CloseApproach.
 
         Args:
@@ -118,16 +188,63 @@ class CloseApproach:
             time: The time of close approach (NASA format string).
             distance: The nominal approach distance in astronomical units.
             velocity: The relative approach velocity in kilometers per second.
+            compact_time: Whether to store the time as an integer number of minutes.
         """
         # Assign information from the arguments passed to the constructor
-        self._designation = str(designation) if designation else ""
+        self._designation = sys.intern(str(designation)) if designation else ""
         self.time = cd_to_datetime(time) if time else None
+        if compact_time:
+            self.minutes = self.minutes
         self.distance = float(distance) if distance else 0.0
         self.velocity = float(velocity) if velocity else 0.0
 
         # Create an attribute for the referenced NEO, originally None.
         self.neo = None
 
+    @property
+    def time(self):
+        """Return the time of close approach.
+
+        Returns:
+            datetime: The naive (UTC) datetime of closest approach, or None.
+        """
+        time = self._time
+        return minutes_to_datetime(time) if type(time) is int else time
+
+    @time.setter
+    def time(self, value):
+        """Set the time of close approach to a datetime, or to None.
+
+        Raises:
+            TypeError: If the value is neither a datetime nor None.
+        """
+        if value is not None and not isinstance(value, datetime.datetime):
+            raise TypeError(f"The time of approach must be a datetime, not {value!r}.")
+        self._time = value
+
+    @property
+    def minutes(self):
+        """Return the time of close approach in whole minutes since the epoch.
+
+        Returns:
+            int: The minutes since the Unix epoch of closest approach, or None.
+        """
+        time = self._time
+        if time is None or type(time) is int:
+            return time
+        return datetime_to_minutes(time)
+
+    @minutes.setter
+    def minutes(self, value):
+        """Store the time of close approach compactly, as minutes since the epoch.
+
+        Raises:
+            TypeError: If the value is neither an int nor None.
+        """
+        if value is not None and type(value) is not int:
+            raise TypeError(f"The minutes of approach must be an int, not {value!r}.")
+        self._time = value
+
     @property
     def time_str(self):
         """Return a formatted representation of this CloseApproach's approach time.
@@ -144,7 +261,8 @@ class CloseApproach:
         Returns:
             str: Formatted datetime string.
         """
-        return datetime_to_str(self.time) if self.time else ""
+        time = self.time
+        return datetime_to_str(time) if time else ""
 
     def __str__(self):
         """Return string representation of this CloseApproach.
@@ -174,3 +292,25 @@ class CloseApproach:
                 "potentially_hazardous": False,
             },
         }
+
+    def serialize_row(self):
+        """Return a flat tuple representation of this CloseApproach for serialization.
+
+        The values are those of `serialize`, with the nested NEO dictionary
+        flattened in place, as in a row of the CSV output. No dictionary is built.
+
+        Returns:
+            tuple: The time, distance and velocity of this approach, followed by
+                the values of `NearEarthObject.serialize_row` for its NEO.
+        """
+        if self.neo:
+            return (self.time_str, self.distance, self.velocity, *self.neo.serialize_row())
+        return (
+            self.time_str,
+            self.distance,
+            self.velocity,
+            self._designation,
+            "",
+            float("nan"),
+            False,
+        )
@@ -0,0 +1,290 @@
+"""Plan how an `NEODatabase` answers a query.
+
+The `QueryPlanner` keeps a few statistics about each filterable column of a
+database, gathered from a systematic sample of its close approaches when the
+database is constructed: the range of values, an equi-depth histogram, the
+fraction of missing (NaN) values, and - for booleans such as whether an NEO is
+potentially hazardous - the ratio of true values.
+
+From these statistics, it estimates the selectivity of each `AttributeFilter`
+(the fraction of approaches that pass it) and combines it with a rough cost of
+evaluating the filter, to choose:
+
+- an access path: a range scan of the time index when the query has date
+  criteria, or a full scan otherwise;
+- an evaluation order for the remaining filters, so that cheap and highly
+  selective filters reject most approaches before expensive ones run.
+
+The resulting `QueryPlan` describes itself (with estimated row counts) when
+printed, which is how `main.py query --explain` reports it.
+"""
+
+import bisect
+import datetime
+import math
+import operator
+
+from filters import COLUMN_FILTERS, DateFilter
+
+# Comparators of date criteria that the time index can answer directly.
+_DATE_OPS = (operator.eq, operator.ge, operator.le)
+
+# The relative cost of evaluating a filter on each column. Dates need a
+# conversion, and NEO attributes need to follow a reference to the NEO.
+COLUMN_COSTS = {
+    "day": 3.0,
+    "distance": 1.0,
+    "velocity": 1.0,
+    "diameter": 2.0,
+    "hazardous": 2.0,
+}
+
+# The cost and selectivity assumed for filters without a known column.
+DEFAULT_COST = 5.0
+DEFAULT_SELECTIVITY = 1 / 3
+
+# The maximum number of rows sampled, and of buckets in each histogram.
+SAMPLE_SIZE = 20_000
+HISTOGRAM_BUCKETS = 64
+
+
+class ColumnStats:
+    """Summary statistics about the values of a column.
+
+    The histogram is equi-depth: `bounds` holds the values at evenly spaced
+    quantiles of the (non-missing) sampled values, so each bucket holds the
+    same share of them.
+    """
+
+    def __init__(self, values):
+        """Summarize a sample of the values of a column.
+
+        Args:
+            values: A collection of sampled values, where NaN means missing.
+        """
+        present = sorted(value for value in values if value == value)
+        self.count = len(values)
+        self.missing = (self.count - len(present)) / self.count if self.count else 0.0
+        self.min = present[0] if present else None
+        self.max = present[-1] if present else None
+        self.distinct = len(set(present))
+        self.true_ratio = sum(map(bool, present)) / len(present) if present else 0.0
+
+        buckets = min(HISTOGRAM_BUCKETS, len(present) - 1)
+        self.bounds = present[:1]
+        if buckets > 0:
+            step = (len(present) - 1) / buckets
+            self.bounds = [present[round(i * step)] for i in range(buckets + 1)]
+
+    def fraction_below(self, value, inclusive):
+        """Estimate the fraction of non-missing values below (or at) a value.
+
+        Args:
+            value: The reference value.
+            inclusive: Whether values equal to the reference count as below.
+
+        Returns:
+            float: An estimated fraction between 0 and 1.
+        """
+        bounds = self.bounds
+        if not bounds:
+            return 0.0
+        if value < bounds[0] or (value == bounds[0] and not inclusive):
+            return 0.0
+        if value > bounds[-1] or (value == bounds[-1] and inclusive):
+            return 1.0
+        find = bisect.bisect_right if inclusive else bisect.bisect_left
+        i = find(bounds, value)
+        lo, hi = bounds[i - 1], bounds[i]
+        within = (value - lo) / (hi - lo) if hi > lo else 0.0
+        return (i - 1 + within) / (len(bounds) - 1)
+
+    def selectivity(self, op, value):
+        """Estimate the fraction of rows whose value satisfies `value_of_row OP value`.
+
+        Args:
+            op: A 2-argument comparator from the `operator` module.
+            value: The reference value, in the column's representation.
+
+        Returns:
+            float: An estimated fraction between 0 and 1.
+        """
+        present = 1.0 - self.missing
+        if isinstance(value, bool):
+            share = self.true_ratio if value else 1.0 - self.true_ratio
+            if op is operator.eq:
+                return share * present
+            if op is operator.ne:
+                return (1.0 - share) * present
+        if op is operator.eq:
+            if self.min is None or not self.min <= value <= self.max:
+                return 0.0
+            return present / max(self.distinct, 1)
+        if op is operator.ne:
+            return present
+        if op in (operator.le, operator.lt):
+            return present * self.fraction_below(value, op is operator.le)
+        if op in (operator.ge, operator.gt):
+            return present * (1.0 - self.fraction_below(value, op is operator.gt))
+        return DEFAULT_SELECTIVITY
+
+
+class PlannedFilter:
+    """A filter of a query plan, with its estimated selectivity and cost."""
+
+    def __init__(self, filter_obj, selectivity, cost):
+        """Create a new `PlannedFilter`.
+
+        Args:
+            filter_obj: The filter to evaluate.
+            selectivity: The estimated fraction of rows that pass the filter.
+            cost: The relative cost of evaluating the filter on a row.
+        """
+        self.filter = filter_obj
+        self.selectivity = selectivity
+        self.cost = cost
+
+    @property
+    def rank(self):
+        """Return the ordering key: the cost per row rejected by this filter."""
+        rejected = 1.0 - self.selectivity
+        return self.cost / rejected if rejected > 0 else math.inf
+
+
+class QueryPlan:
+    """How a query is answered: which rows are scanned, and in what order filters run.
+
+    Attributes:
+        rows: The candidate rows, in scan order.
+        index_range: The inclusive (start, end) day ordinals of a time index
+            scan, or None for a full scan.
+        steps: The `PlannedFilter`s, in evaluation order.
+        total_rows: The number of rows in the database.
+    """
+
+    def __init__(self, rows, index_range, steps, total_rows):
+        """Create a new `QueryPlan`."""
+        self.rows = rows
+        self.index_range = index_range
+        self.steps = steps
+        self.total_rows = total_rows
+
+    @property
+    def full_scan(self):
+        """Return whether this plan scans every row."""
+        return self.index_range is None
+
+    @property
+    def filters(self):
+        """Return the filters to evaluate on each candidate row, in order."""
+        return [step.filter for step in self.steps]
+
+    @property
+    def estimated_rows(self):
+        """Return the estimated number of rows that match the whole query."""
+        estimate = len(self.rows)
+        for step in self.steps:
+            estimate *= step.selectivity
+        return estimate
+
+    def __str__(self):
+        """Describe this plan, one step per line, with estimated row counts."""
+        if self.full_scan:
+            lines = [f"Full scan of {self.total_rows} close approaches"]
+        else:
+            start, end = (
+                "-" if day is None else datetime.date.fromordinal(day).isoformat()
+                for day in self.index_range
+            )
+            lines = [
+                f"Time index range scan [{start} .. {end}]: {len(self.rows)} rows"
+            ]
+        estimate = len(self.rows)
+        for number, step in enumerate(self.steps, start=1):
+            estimate *= step.selectivity
+            lines.append(
+                f"  {number}. {step.filter!r}: selectivity {step.selectivity:.4f}, "
+                f"cost {step.cost:g} -> ~{round(estimate)} rows"
+            )
+        lines.append(f"Estimated matches: ~{round(estimate)}")
+        return "\n".join(lines)
+
+
+class QueryPlanner:
+    """Choose query plans for the close approaches of a database."""
+
+    def __init__(self, getter, total_rows, time_index):
+        """Gather column statistics and prepare to plan queries.
+
+        Args:
+            getter: A function from a column name to a function from a row to
+                that row's value in the column's representation.
+            total_rows: The number of close approaches in the database.
+            time_index: The database's `index.TimeIndex`.
+        """
+        self.total_rows = total_rows
+        self.time_index = time_index
+        sample = range(0, total_rows, max(1, total_rows // SAMPLE_SIZE))
+        self.stats = {
+            column: ColumnStats([get(row) for row in sample])
+            for column, get in ((column, getter(column)) for column in COLUMN_FILTERS)
+        }
+
+    def plan(self, filters=()):
+        """Plan a query for the close approaches that match all of a collection of filters.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            QueryPlan: The chosen plan.
+        """
+        start, end, remaining = split_date_filters(filters)
+        if start is None and end is None:
+            rows, index_range = range(self.total_rows), None
+        else:
+            rows, index_range = self.time_index.lookup(start, end), (start, end)
+
+        steps = [self._estimate(filter_obj) for filter_obj in remaining]
+        steps.sort(key=lambda step: step.rank)
+        return QueryPlan(rows, index_range, steps, self.total_rows)
+
+    def _estimate(self, filter_obj):
+        """Estimate the selectivity and cost of a filter."""
+        column = filter_obj.column
+        if column not in self.stats:
+            return PlannedFilter(filter_obj, DEFAULT_SELECTIVITY, DEFAULT_COST)
+        value = filter_obj.key(filter_obj.value)
+        return PlannedFilter(
+            filter_obj,
+            self.stats[column].selectivity(filter_obj.op, value),
+            COLUMN_COSTS[column],
+        )
+
+
+def split_date_filters(filters):
+    """Separate the date criteria that can be answered by the time index.
+
+    Equality, lower-bound and upper-bound `DateFilter`s are combined into a
+    single inclusive range of day ordinals. Every other filter is returned
+    untouched, to be evaluated on the approaches within that range.
+
+    Args:
+        filters: A collection of filters capturing user-specified criteria.
+
+    Returns:
+        tuple: The (start, end) day ordinals (either may be None) and a list
+            of the remaining filters.
+    """
+    start = end = None
+    remaining = []
+    for filter_obj in filters:
+        if type(filter_obj) is not DateFilter or filter_obj.op not in _DATE_OPS:
+            remaining.append(filter_obj)
+            continue
+        day = filter_obj.key(filter_obj.value)
+        if filter_obj.op is not operator.le:
+            start = day if start is None else max(start, day)
+        if filter_obj.op is not operator.ge:
+            end = day if end is None else min(end, day)
+    return start, end, remaining
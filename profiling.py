@@ -0,0 +1,306 @@
+"""Measure where the time and memory of a command go.
+
+A `Profiler` records one `Metrics` per command (`load`, `inspect`, `query`,
+`stats`): the wall time of each of its phases, how many rows were scanned and
+how many results were yielded, and - when memory tracing is on - the peak
+memory allocated while it ran, as measured by `tracemalloc`.
+
+Phases are timed exclusively: the time spent in a phase nested in another one
+is only charged to the inner phase. This matters because queries are lazy -
+while results are written, the time spent generating each one (checking
+filters, building `CloseApproach` objects) is charged to the `query` phase with
+`Profiler.timed`, and only the rest of the time to the `write` phase.
+
+Timing costs a couple of clock reads per phase or result, so the timing layer
+is always on; memory tracing slows Python down noticeably, so it is opt-in.
+For a function-level breakdown, `cprofile` runs a whole program under
+`cProfile` and dumps its statistics, to be read with `pstats` or `snakeviz`.
+
+The module-level `phase`, `timed` and `counted` functions accept a `None`
+profiler, in which case they measure nothing and cost nothing.
+"""
+
+import contextlib
+import cProfile
+import json
+import time
+import tracemalloc
+
+
+class Metrics:
+    """The measurements of one command.
+
+    Attributes:
+        command: The name of the command, such as "query".
+        arguments: The arguments of the command, as typed.
+        total: The wall time of the whole command, in seconds.
+        phases: A dictionary from phase name to its exclusive wall time, in
+            seconds, in the order in which the phases first ran.
+        rows: A dictionary of row counters, such as "scanned" and "yielded".
+        peak_memory: The peak memory allocated during the command, in bytes,
+            or None if memory wasn't traced.
+    """
+
+    __slots__ = ("command", "arguments", "total", "phases", "rows", "peak_memory")
+
+    def __init__(self, command, arguments=""):
+        """Create a new, empty `Metrics` for a command."""
+        self.command = command
+        self.arguments = arguments
+        self.total = 0.0
+        self.phases = {}
+        self.rows = {}
+        self.peak_memory = None
+
+    @property
+    def other(self):
+        """Return the time of the command that wasn't spent in any phase, in seconds."""
+        return max(self.total - sum(self.phases.values()), 0.0)
+
+    def serialize(self):
+        """Produce a dictionary of these measurements, with times in seconds."""
+        return {
+            "command": self.command,
+            "arguments": self.arguments,
+            "total": self.total,
+            "phases": dict(self.phases, other=self.other),
+            "rows": dict(self.rows),
+            "peak_memory": self.peak_memory,
+        }
+
+    def __str__(self):
+        """Return a multi-line, human-readable summary of these measurements."""
+        heading = f"{self.command} {self.arguments}".rstrip()
+        lines = [f"{heading}: {self.total * 1000:.1f} ms"]
+        phases = dict(self.phases, other=self.other)
+        width = max(map(len, phases))
+        for name, seconds in phases.items():
+            share = seconds / self.total if self.total else 0.0
+            lines.append(f"  {name:<{width}} {seconds * 1000:10.1f} ms {share:6.1%}")
+        if self.rows:
+            lines.append(
+                "  rows: " + ", ".join(f"{count:,} {name}" for name, count in self.rows.items())
+            )
+        if self.peak_memory is not None:
+            lines.append(f"  peak memory: {self.peak_memory / 2**20:.1f} MiB")
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Record the `Metrics` of a sequence of commands.
+
+    Attributes:
+        trace_memory: Whether to measure the peak memory of each command.
+        history: The `Metrics` of every finished command, oldest first.
+        current: The `Metrics` of the running command, or None.
+    """
+
+    def __init__(self, trace_memory=False):
+        """Create a new `Profiler`.
+
+        Args:
+            trace_memory: Whether to measure the peak memory of each command with
+                `tracemalloc`, which slows the commands down.
+        """
+        self.trace_memory = trace_memory
+        self.history = []
+        self.current = None
+        # The time spent in nested phases, for each phase being timed.
+        self._nested = []
+
+    @property
+    def last(self):
+        """Return the `Metrics` of the last finished command, or None."""
+        return self.history[-1] if self.history else None
+
+    @contextlib.contextmanager
+    def command(self, name, arguments=""):
+        """Measure a command, for the duration of a `with` block.
+
+        Commands don't nest: a command started while another one runs is
+        measured as part of it.
+
+        Args:
+            name: The name of the command.
+            arguments: The arguments of the command, as typed.
+
+        Yields:
+            Metrics: The measurements of the command, complete at the end of the block.
+        """
+        if self.current is not None:
+            yield self.current
+            return
+        metrics = self.current = Metrics(name, arguments)
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        start = self._enter()
+        try:
+            yield metrics
+        finally:
+            self._nested.pop()
+            metrics.total = time.perf_counter() - start
+            if self.trace_memory:
+                metrics.peak_memory = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            self.current = None
+            self.history.append(metrics)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Charge the time of a `with` block to a phase of the running command.
+
+        Args:
+            name: The name of the phase. A phase may run several times; its
+                times add up.
+        """
+        if self.current is None:
+            yield
+            return
+        start = self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name, start)
+
+    def timed(self, iterable, name):
+        """Generate the items of an iterable, charging the time to produce them to a phase.
+
+        The items are counted as "yielded" rows.
+
+        Args:
+            iterable: The iterable, such as the results of a lazy query.
+            name: The name of the phase.
+
+        Yields:
+            The items of the iterable.
+        """
+        if self.current is None:
+            yield from iterable
+            return
+        # This is the hot path of writing results, so `_enter` and `_exit` are
+        # inlined, and the phase is only charged once.
+        iterator, nested, clock = iter(iterable), self._nested, time.perf_counter
+        yielded, spent = 0, 0.0
+        try:
+            while True:
+                nested.append(0.0)
+                start = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = clock() - start
+                    spent += elapsed - nested.pop()
+                    if nested:
+                        nested[-1] += elapsed
+                yielded += 1
+                yield item
+        finally:
+            if self.current is not None:
+                phases = self.current.phases
+                phases[name] = phases.get(name, 0.0) + spent
+            self.count("yielded", yielded)
+
+    def counted(self, iterable, name="scanned"):
+        """Generate the items of an iterable, adding how many were consumed to a counter.
+
+        Args:
+            iterable: The iterable, such as the candidate rows of a query.
+            name: The name of the row counter.
+
+        Yields:
+            The items of the iterable.
+        """
+        consumed = 0
+        try:
+            for consumed, item in enumerate(iterable, 1):
+                yield item
+        finally:
+            self.count(name, consumed)
+
+    def count(self, name, rows):
+        """Add a number of rows to a row counter of the running command.
+
+        Args:
+            name: The name of the counter, such as "scanned".
+            rows: The number of rows to add.
+        """
+        if self.current is not None:
+            self.current.rows[name] = self.current.rows.get(name, 0) + rows
+
+    def _enter(self):
+        """Start timing a phase, and return its start time."""
+        self._nested.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, name, start):
+        """Stop timing a phase, charging its exclusive time to it."""
+        elapsed = time.perf_counter() - start
+        nested = self._nested.pop()
+        if self._nested:
+            self._nested[-1] += elapsed
+        if self.current is not None:
+            phases = self.current.phases
+            phases[name] = phases.get(name, 0.0) + elapsed - nested
+
+    def serialize(self):
+        """Produce a dictionary of the measurements of every finished command."""
+        return {"commands": [metrics.serialize() for metrics in self.history]}
+
+    def dump(self, path):
+        """Write the measurements of every finished command to a JSON file.
+
+        Args:
+            path: The path of the JSON file.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.serialize(), file, indent=2)
+            file.write("\n")
+
+
+def phase(profiler, name):
+    """Return a context manager charging its block to a phase, if there is a profiler."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+def timed(profiler, iterable, name):
+    """Return an iterable whose production time is charged to a phase, if there is a profiler."""
+    if profiler is None:
+        return iterable
+    return profiler.timed(iterable, name)
+
+
+def counted(profiler, iterable, name="scanned"):
+    """Return an iterable whose consumed items are counted, if there is a profiler."""
+    if profiler is None or profiler.current is None:
+        return iterable
+    return profiler.counted(iterable, name)
+
+
+@contextlib.contextmanager
+def cprofile(path):
+    """Run the body of a `with` block under `cProfile`, if a path is given.
+
+    The statistics are written to the path when the block exits, even with an
+    error, and can be read with ``python -m pstats PATH``.
+
+    Args:
+        path: The path of the statistics file, or None not to profile.
+    """
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
@@ -0,0 +1,300 @@
+"""Answer `inspect` and `query` requests over HTTP from a database kept in memory.
+
+Loading the data files takes seconds, which scripts that call `main.py` once per
+request pay every time. The `serve` subcommand loads an `NEODatabase` once and
+then serves requests over HTTP on a local port, with a pool of worker threads so
+that concurrent clients don't wait for each other::
+
+    $ python3 main.py serve --port 8642
+    $ curl 'http://127.0.0.1:8642/inspect?name=Halley&verbose=1'
+    $ curl 'http://127.0.0.1:8642/query?start-date=2020-01-01&max-distance=0.025&limit=5'
+
+The query parameters of `/query` have the same names and meanings as the options
+of the `query` subcommand (without the leading dashes); `hazardous`,
+`not-hazardous` and `desc` take no value. Like the `query` subcommand printing
+to the terminal, `/query` returns 10 matches without `limit`; a request can ask
+for at most `MAX_QUERY_LIMIT` matches.
+
+Every response is a strict JSON document. NEOs and close approaches are
+represented by the dictionaries of their `serialize` methods, as in the JSON
+output files, except that missing diameters are `null` rather than `NaN`.
+Errors are reported with a 4xx status and an `{"error": message}` body.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from database import SORT_KEYS
+from filters import create_filters
+from validation import ValidationError, validate_query_arguments
+
+# The default address and number of worker threads of the server.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+DEFAULT_WORKERS = 8
+
+# How many matches `/query` returns without a `limit`, and the largest `limit`.
+DEFAULT_QUERY_LIMIT = 10
+MAX_QUERY_LIMIT = 1000
+
+# The query parameters accepted by `/query`: the `create_filters` argument each
+# one sets, and how to convert its value.
+QUERY_PARAMETERS = {
+    "date": ("date", datetime.date.fromisoformat),
+    "start-date": ("start_date", datetime.date.fromisoformat),
+    "end-date": ("end_date", datetime.date.fromisoformat),
+    "min-distance": ("distance_min", float),
+    "max-distance": ("distance_max", float),
+    "min-velocity": ("velocity_min", float),
+    "max-velocity": ("velocity_max", float),
+    "min-diameter": ("diameter_min", float),
+    "max-diameter": ("diameter_max", float),
+}
+
+
+class RequestError(Exception):
+    """A request can't be answered because of its path or parameters."""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        """Create a new `RequestError` with the HTTP status to respond with."""
+        super().__init__(message)
+        self.status = status
+
+
+def inspect_response(database, params):
+    """Answer an `/inspect` request.
+
+    Args:
+        database: The NEODatabase containing data on NEOs and their close approaches.
+        params: A dictionary from parameter names to lists of values.
+
+    Returns:
+        dict: The serialized NEO, with its serialized close approaches if the
+            `verbose` parameter is given.
+
+    Raises:
+        RequestError: If neither `pdes` nor `name` is given, or no NEO matches;
+            the message then suggests similar names, if any.
+    """
+    pdes, name = _single(params, "pdes"), _single(params, "name")
+    if pdes:
+        neo = database.get_neo_by_designation(pdes)
+    elif name:
+        neo = database.get_neo_by_name(name)
+        if neo is None:
+            # Fall back to a match regardless of case, accents and spacing.
+            neo = next(iter(database.find_neos_by_name(name)), None)
+    else:
+        raise RequestError("One of `pdes` or `name` is required.")
+    if not neo:
+        message = "No matching NEOs exist in the database."
+        suggestions = database.suggest_names(name) if name and not pdes else []
+        if suggestions:
+            message += f" Did you mean: {', '.join(suggestions)}?"
+        raise RequestError(message, HTTPStatus.NOT_FOUND)
+
+    response = {"neo": neo.serialize()}
+    if "verbose" in params:
+        response["approaches"] = [
+            {key: value for key, value in approach.serialize().items() if key != "neo"}
+            for approach in neo.approaches
+        ]
+    return response
+
+
+def query_response(database, params):
+    """Answer a `/query` request.
+
+    Args:
+        database: The NEODatabase containing data on NEOs and their close approaches.
+        params: A dictionary from parameter names to lists of values.
+
+    Returns:
+        dict: The number of results and the serialized matching close approaches.
+
+    Raises:
+        RequestError: If a parameter is unknown, malformed or inconsistent, or
+            `limit` is over `MAX_QUERY_LIMIT`.
+    """
+    criteria = dict.fromkeys(name for name, _ in QUERY_PARAMETERS.values())
+    criteria["hazardous"] = None
+    count, sort_by = DEFAULT_QUERY_LIMIT, None
+    descending = False
+    for parameter in params:
+        value = _single(params, parameter)
+        try:
+            if parameter in QUERY_PARAMETERS:
+                name, convert = QUERY_PARAMETERS[parameter]
+                criteria[name] = convert(value)
+            elif parameter in ("hazardous", "not-hazardous"):
+                criteria["hazardous"] = parameter == "hazardous"
+            elif parameter == "limit":
+                count = int(value)
+            elif parameter == "sort-by":
+                if value not in SORT_KEYS:
+                    raise ValueError(value)
+                sort_by = value
+            elif parameter == "desc":
+                descending = True
+            else:
+                raise RequestError(f"Unknown query parameter `{parameter}`.")
+        except ValueError:
+            raise RequestError(
+                f"Invalid value {value!r} for query parameter `{parameter}`."
+            ) from None
+
+    try:
+        validate_query_arguments(
+            argparse.Namespace(**criteria, limit=count, sort_by=sort_by, desc=descending)
+        )
+    except ValidationError as e:
+        raise RequestError(str(e)) from None
+    if count > MAX_QUERY_LIMIT:
+        raise RequestError(f"Limit {count} must be at most {MAX_QUERY_LIMIT}.")
+
+    results = [
+        approach.serialize()
+        for approach in database.query(
+            create_filters(**criteria), sort_by=sort_by, descending=descending, limit=count
+        )
+    ]
+    return {"count": len(results), "results": results}
+
+
+def _strict(value):
+    """Replace the NaN floats of a JSON-serializable object with None, recursively."""
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, dict):
+        return {key: _strict(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_strict(item) for item in value]
+    return value
+
+
+def _single(params, name):
+    """Return the last value of a query parameter, or None if it isn't given."""
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+# The response function of each path served.
+ROUTES = {
+    "/inspect": inspect_response,
+    "/query": query_response,
+}
+
+
+class NEORequestHandler(BaseHTTPRequestHandler):
+    """Handle HTTP requests against the database of an `NEOServer`."""
+
+    server_version = "NEOServer/1.0"
+
+    def do_GET(self):
+        """Answer a GET request with a JSON document."""
+        url = urlsplit(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        status = HTTPStatus.OK
+        try:
+            if url.path == "/health":
+                response = {"status": "ok"}
+            elif url.path in ROUTES:
+                response = ROUTES[url.path](self.server.database, params)
+            else:
+                raise RequestError(f"Unknown path `{url.path}`.", HTTPStatus.NOT_FOUND)
+        except RequestError as e:
+            response, status = {"error": str(e)}, e.status
+        except Exception:
+            # Unexpected errors are logged, and still answered with a JSON body.
+            print(f"Error answering {self.path}:", file=sys.stderr)
+            traceback.print_exc()
+            response = {"error": "Internal server error."}
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+        self.send_json(response, status)
+
+    def send_json(self, document, status=HTTPStatus.OK):
+        """Send a response whose body is a strict JSON document.
+
+        Args:
+            document: A JSON-serializable object. NaN values are sent as `null`.
+            status: The HTTP status of the response.
+        """
+        body = json.dumps(_strict(document), allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Log requests only if the server is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class NEOServer(HTTPServer):
+    """An HTTP server that answers requests from a pool of worker threads.
+
+    The standard `ThreadingHTTPServer` starts a new thread for every request;
+    this server instead hands accepted connections to a fixed-size pool, which
+    bounds the number of concurrent queries against the shared database.
+    """
+
+    def __init__(self, address, database, workers=DEFAULT_WORKERS, verbose=False):
+        """Create a new `NEOServer` and bind it to an address.
+
+        Args:
+            address: A (host, port) pair to listen on. Port 0 picks a free port.
+            database: The NEODatabase to answer requests from.
+            workers: The number of worker threads.
+            verbose: Whether to log every request to stderr.
+        """
+        super().__init__(address, NEORequestHandler)
+        self.database = database
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="neo-server")
+
+    def process_request(self, request, client_address):
+        """Handle a connection in a worker thread."""
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        """Handle a connection, then close it, like `ThreadingMixIn`."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Stop listening, and wait for the requests in progress to finish."""
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def serve(database, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, verbose=False):
+    """Serve requests against a database until interrupted.
+
+    Args:
+        database: The NEODatabase containing data on NEOs and their close approaches.
+        host: The host name or address to listen on.
+        port: The port to listen on.
+        workers: The number of worker threads.
+        verbose: Whether to log every request to stderr.
+    """
+    with NEOServer((host, port), database, workers, verbose) as server:
+        host, port = server.server_address[:2]
+        print(f"Serving NEO database on http://{host}:{port}/ (Ctrl-C to stop)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,496 @@
+"""Share one loaded data set, read-only, between many processes.
+
+Every process that builds its own `NEODatabase` pays the cost of loading the
+data files and holds its own copy of the NEOs and close approaches. Instead, one
+process can copy a loaded database into a single `multiprocessing.shared_memory`
+block with a `SharedStore`, and any number of worker processes can attach to the
+block by name with `SharedDatabase`, a read-only `NEODatabase` that views the
+block without copying it:
+
+    # In the process that loads the data:
+    store = SharedStore.load(neo_csv_path, cad_json_path)
+    ... start the workers, passing them `store.name` ...
+    store.close()
+
+    # In each worker:
+    with SharedDatabase(name) as database:
+        database.get_neo_by_designation("433")
+        database.query(create_filters(hazardous=True), limit=10)
+
+The block holds the close approaches in the columnar layout of
+`columnar.ApproachColumns`, along with their day ordinals and time index, and
+the NEOs as columns too: their attributes, their designations and names packed
+as UTF-8 text, the order in which to binary-search them by designation or name,
+and the rows of each NEO's close approaches. A worker therefore doesn't build
+any per-row or per-NEO structure; `NearEarthObject` and `CloseApproach` objects
+are only materialized as they are looked up or generated. The memory of the
+data set is paid once, however many workers attach to it.
+
+Materialized objects are copies: changing them doesn't change the shared data.
+Each lookup materializes a new `NearEarthObject`, so the same NEO may be
+represented by several, equal but distinct, objects.
+"""
+
+import bisect
+import functools
+import os
+import pickle
+import warnings
+import weakref
+from array import array
+from collections.abc import Sequence
+from multiprocessing.shared_memory import SharedMemory
+
+from columnar import ApproachColumns, ApproachView
+from database import NEODatabase
+from index import NameIndex, TimeIndex
+from models import NearEarthObject
+from snapshot import load_database
+
+# Identify shared blocks, and the version of their layout.
+SHARED_MAGIC = b"NEOSHARE"
+SHARED_VERSION = 1
+
+# The header: magic, version, and the offset and length of the manifest.
+_HEADER_SIZE = 32
+
+# The boundary to which each column is aligned within the block.
+_ALIGNMENT = 8
+
+
+class SharedStoreError(Exception):
+    """A shared memory block doesn't hold a data set that can be attached."""
+
+
+class _Block(SharedMemory):
+    """A shared memory block whose mapping can outlive it while it is viewed.
+
+    Closing a `SharedMemory` fails with a `BufferError` while views of its
+    mapping exist, such as the NEOs and close approaches materialized by a
+    `SharedDatabase`, and then leaves its file descriptor open. A `_Block`
+    instead closes its file descriptor and leaves the mapping to those views:
+    it is unmapped when the last of them is released. As this may also be a
+    leak, it is reported with a `ResourceWarning`.
+    """
+
+    def close(self):
+        """Close access to the block from this instance.
+
+        Warns:
+            ResourceWarning: If views of the block are still alive.
+
+        Raises:
+            BufferError: If the block's own buffer can't be released.
+        """
+        try:
+            super().close()
+        except BufferError:
+            if self._buf is not None:
+                # The buffer itself is exported, which no view of this module does.
+                raise
+            # Only the mapping failed to close: views of it are still alive.
+            warnings.warn(
+                f"Shared memory block {self.name} is still viewed; it stays "
+                "mapped until every view of it is released.",
+                ResourceWarning,
+                stacklevel=2,
+            )
+            self._mmap = None
+            if getattr(self, "_fd", -1) >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+
+class SharedStore:
+    """The shared memory block of a data set, owned by the process that created it.
+
+    The block is removed by `close` (or at the end of a `with` block), after
+    which no new process can attach to it; processes that are already attached
+    keep their view of the data until they close it.
+    """
+
+    def __init__(self, database, name=None):
+        """Copy a database into a new shared memory block.
+
+        Args:
+            database: An `NEODatabase` whose close approaches are in columnar storage.
+            name: The name of the block, or None for a unique, generated name.
+
+        Raises:
+            ValueError: If the database's close approaches aren't in columnar storage.
+        """
+        if not database._columnar:
+            raise ValueError("Only a database in columnar storage can be shared.")
+        columns, orphans = _layout(database)
+
+        offset, placement = _HEADER_SIZE, {}
+        for column, values in columns.items():
+            view = memoryview(values)
+            placement[column] = (view.format, offset, view.nbytes)
+            offset += -(-view.nbytes // _ALIGNMENT) * _ALIGNMENT
+        manifest = pickle.dumps(
+            {"columns": placement, "orphans": orphans, "neos": len(database._neos)},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+        self._block = SharedMemory(name=name, create=True, size=offset + len(manifest))
+        buffer = self._block.buf
+        try:
+            for column, values in columns.items():
+                _, start, nbytes = placement[column]
+                buffer[start : start + nbytes] = memoryview(values).cast("B")
+            buffer[offset : offset + len(manifest)] = manifest
+            buffer[:_HEADER_SIZE] = (
+                SHARED_MAGIC
+                + SHARED_VERSION.to_bytes(8, "little")
+                + offset.to_bytes(8, "little")
+                + len(manifest).to_bytes(8, "little")
+            )
+        finally:
+            buffer.release()
+
+    @classmethod
+    def load(cls, neo_csv_path, cad_json_path, use_snapshot=False, workers=1, name=None):
+        """Load a data set from data files straight into a new shared memory block.
+
+        The database built to load the data is discarded once it is copied.
+
+        Args:
+            neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+            cad_json_path: A path to a JSON file containing data about close approaches.
+            use_snapshot: Whether to read and write a snapshot of the loaded data.
+            workers: The number of processes parsing the close approach data file.
+            name: The name of the block, or None for a unique, generated name.
+
+        Returns:
+            SharedStore: The store of the loaded data set.
+        """
+        database = load_database(
+            neo_csv_path,
+            cad_json_path,
+            columnar=True,
+            use_snapshot=use_snapshot,
+            workers=workers,
+        )
+        return cls(database, name)
+
+    @property
+    def name(self):
+        """Return the name by which other processes attach to the block."""
+        return self._block.name
+
+    @property
+    def nbytes(self):
+        """Return the size of the block, in bytes."""
+        return self._block.size
+
+    def attach(self):
+        """Attach to the block from this process.
+
+        Returns:
+            SharedDatabase: A read-only database of the shared data set.
+        """
+        return SharedDatabase(self.name)
+
+    def close(self):
+        """Close and remove the block. Closing it again does nothing."""
+        if self._block is None:
+            return
+        self._block.close()
+        self._block.unlink()
+        self._block = None
+
+    def __enter__(self):
+        """Use the store as a context manager that removes the block when done."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close and remove the block."""
+        self.close()
+
+
+def _layout(database):
+    """Lay a columnar database out as named typed arrays.
+
+    Args:
+        database: An `NEODatabase` whose close approaches are in columnar storage.
+
+    Returns:
+        tuple: A dictionary from column name to typed array, and the mapping from
+            row to designation of the approaches of unknown NEOs.
+    """
+    approaches, neos = database._approaches, database._neos
+    index = database._time_index
+    designations = [neo.designation for neo in neos]
+    names = [neo.name or "" for neo in neos]
+
+    # The approaches of each NEO are consecutive in `approach_rows`, in internal order.
+    approach_rows = array("q", sorted(range(len(approaches)), key=approaches.neo.__getitem__))
+    counts = [0] * (len(neos) + 1)
+    for neo_row in approaches.neo:
+        counts[neo_row] += 1
+    approach_offsets = array("q", [0])
+    for neo_row in range(len(neos)):
+        approach_offsets.append(approach_offsets[-1] + counts[neo_row])
+
+    designation_offsets, designation_text = _pack(designations)
+    name_offsets, name_text = _pack(names)
+    columns = {
+        "time": approaches.time,
+        "distance": approaches.distance,
+        "velocity": approaches.velocity,
+        "neo": approaches.neo,
+        "day": array("q", approaches.days()),
+        "index_rows": index.rows,
+        "index_keys": index.keys,
+        "neo_diameter": approaches.neo_diameter,
+        "neo_hazardous": approaches.neo_hazardous,
+        "designation_offsets": designation_offsets,
+        "designation_text": designation_text,
+        "name_offsets": name_offsets,
+        "name_text": name_text,
+        "by_designation": array("q", sorted(range(len(neos)), key=designations.__getitem__)),
+        "by_name": array(
+            "q", sorted((row for row in range(len(neos)) if names[row]), key=names.__getitem__)
+        ),
+        "approach_offsets": approach_offsets,
+        "approach_rows": approach_rows,
+    }
+    return columns, dict(approaches.orphans)
+
+
+def _pack(strings):
+    """Pack strings as UTF-8 text, and the offsets of each one's start and end.
+
+    Args:
+        strings: A sequence of strings.
+
+    Returns:
+        tuple: An array of len(strings) + 1 offsets, and an array of bytes.
+    """
+    offsets, text = array("q", [0]), array("B")
+    for string in strings:
+        text.frombytes(string.encode("utf-8"))
+        offsets.append(len(text))
+    return offsets, text
+
+
+class SharedDatabase(NEODatabase):
+    """A read-only `NEODatabase` of a data set in a shared memory block.
+
+    A `SharedDatabase` supports the lookups and queries of an `NEODatabase`
+    whose close approaches are in columnar storage, reading the columns from
+    the block without copying them. Its query cache, planner statistics and
+    (when it is first used) name index are the only data kept per process.
+
+    Close it (or use it as a context manager) to detach from the block.
+    """
+
+    def __init__(self, name):
+        """Attach to a shared memory block created by a `SharedStore`.
+
+        Args:
+            name: The name of the block.
+
+        Raises:
+            FileNotFoundError: If there is no block with this name.
+            SharedStoreError: If the block doesn't hold a shared data set.
+        """
+        try:
+            block = _Block(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13, attached blocks are always tracked.
+            block = _Block(name=name)
+        try:
+            columns, manifest = _read(block)
+        except SharedStoreError:
+            block.close()
+            raise
+
+        approaches = ApproachColumns.restore(
+            columns["time"],
+            columns["distance"],
+            columns["velocity"],
+            columns["neo"],
+            manifest["orphans"],
+        )
+        approaches.neo_diameter = columns["neo_diameter"]
+        approaches.neo_hazardous = columns["neo_hazardous"]
+        approaches._neos = _SharedNEOs(columns, manifest["neos"], approaches)
+
+        self._block = block
+        self._index_neos(approaches._neos)
+        # The shared approaches are already linked and indexed.
+        self._attach(
+            approaches,
+            TimeIndex.restore(columns["index_rows"], columns["index_keys"]),
+            days=columns["day"],
+        )
+
+    def _index_neos(self, neos):
+        """Look the shared NEOs up by binary search in their stored orders.
+
+        The name index is only built when names are first searched.
+
+        Args:
+            neos: The `_SharedNEOs` of the shared data set.
+        """
+        self._neos = neos
+        self._by_designation = neos.by_designation
+        self._by_name = neos.by_name
+
+    def get_neo_by_designation(self, designation):
+        """Find and return an NEO by its primary designation, or None.
+
+        Args:
+            designation: The primary designation of the NEO to search for.
+
+        Returns:
+            NearEarthObject: A new NEO with the desired primary designation, or None.
+        """
+        neos, rows = self._neos, self._by_designation
+        position = bisect.bisect_left(rows, designation, key=neos.designation)
+        if position < len(rows) and neos.designation(rows[position]) == designation:
+            return neos[rows[position]]
+        return None
+
+    def get_neo_by_name(self, name):
+        """Find and return an NEO by its exact name, or None.
+
+        As with an `NEODatabase`, the last of several NEOs with the same name is
+        the one found.
+
+        Args:
+            name: The name, as a string, of the NEO to search for.
+
+        Returns:
+            NearEarthObject: A new NEO with the desired name, or None.
+        """
+        if not name:
+            return None
+        neos, rows = self._neos, self._by_name
+        position = bisect.bisect_right(rows, name, key=neos.name) - 1
+        if position >= 0 and neos.name(rows[position]) == name:
+            return neos[rows[position]]
+        return None
+
+    @functools.cached_property
+    def _name_index(self):
+        """Index the names of the NEOs, the first time they are searched."""
+        return NameIndex(self._neos)
+
+    def close(self):
+        """Detach from the shared memory block.
+
+        The database can't be used afterwards. The block stays mapped until the
+        objects materialized from it, such as NEOs and their approaches, are
+        released too; closing then warns with a `ResourceWarning`.
+        """
+        block = self.__dict__.pop("_block", None)
+        if block is None:
+            return
+        # Release the views of the block held by this database before the block.
+        self.__dict__.clear()
+        block.close()
+
+    def __enter__(self):
+        """Use the database as a context manager that detaches when done."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Detach from the shared memory block."""
+        self.close()
+
+
+def _read(block):
+    """Read the columns and manifest of a shared memory block, as read-only views.
+
+    Args:
+        block: A `SharedMemory` block created by a `SharedStore`.
+
+    Returns:
+        tuple: A dictionary from column name to memoryview, and the manifest.
+
+    Raises:
+        SharedStoreError: If the block doesn't hold a shared data set.
+    """
+    buffer = block.buf.toreadonly()
+    header = bytes(buffer[:_HEADER_SIZE])
+    if len(header) < _HEADER_SIZE or header[: len(SHARED_MAGIC)] != SHARED_MAGIC:
+        buffer.release()
+        raise SharedStoreError(f"{block.name} is not a shared data set")
+    version = int.from_bytes(header[8:16], "little")
+    if version != SHARED_VERSION:
+        buffer.release()
+        raise SharedStoreError(f"{block.name} has an unsupported version {version}")
+    offset = int.from_bytes(header[16:24], "little")
+    length = int.from_bytes(header[24:32], "little")
+    manifest = pickle.loads(buffer[offset : offset + length])
+    columns = {
+        column: buffer[start : start + nbytes].cast(typecode)
+        for column, (typecode, start, nbytes) in manifest["columns"].items()
+    }
+    return columns, manifest
+
+
+class _SharedNEOs(Sequence):
+    """The NEOs of a shared data set, materialized on demand from their columns."""
+
+    def __init__(self, columns, count, approaches):
+        """Create a sequence of the NEOs stored in a shared data set's columns.
+
+        Args:
+            columns: The columns of the shared data set.
+            count: The number of NEOs.
+            approaches: The `ApproachColumns` viewing the shared close approaches.
+        """
+        self._count = count
+        # The approaches refer to their NEOs, so a strong reference would be a
+        # cycle, keeping the block viewed after the database is closed.
+        self._approaches = weakref.ref(approaches)
+        self._diameter = columns["neo_diameter"]
+        self._hazardous = columns["neo_hazardous"]
+        self._designation_offsets = columns["designation_offsets"]
+        self._designation_text = columns["designation_text"]
+        self._name_offsets = columns["name_offsets"]
+        self._name_text = columns["name_text"]
+        self._approach_offsets = columns["approach_offsets"]
+        self._approach_rows = columns["approach_rows"]
+
+        # The rows of the NEOs in order of designation, and of the named NEOs by name.
+        self.by_designation = columns["by_designation"]
+        self.by_name = columns["by_name"]
+
+    def __len__(self):
+        """Return the number of NEOs."""
+        return self._count
+
+    def __getitem__(self, row):
+        """Materialize the NEO stored in a given row, with a view of its approaches."""
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self._count))]
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError("NEO row out of range")
+        neo = NearEarthObject(
+            self.designation(row),
+            self.name(row),
+            self._diameter[row],
+            self._hazardous[row],
+        )
+        offsets = self._approach_offsets
+        neo.approaches = ApproachView(
+            self._approaches(), self._approach_rows[offsets[row] : offsets[row + 1]]
+        )
+        return neo
+
+    def designation(self, row):
+        """Return the primary designation of the NEO in a given row."""
+        offsets = self._designation_offsets
+        return str(self._designation_text[offsets[row] : offsets[row + 1]], "utf-8")
+
+    def name(self, row):
+        """Return the name of the NEO in a given row, or None if it has none."""
+        offsets = self._name_offsets
+        return str(self._name_text[offsets[row] : offsets[row + 1]], "utf-8") or None
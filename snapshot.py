@@ -0,0 +1,316 @@
+"""Save and restore a fully loaded data set as a versioned binary snapshot.
+
+Parsing `data/cad.json` and `data/neos.csv` takes seconds, even though the data
+rarely changes. The `load_database` function builds an `NEODatabase` from the
+CSV and JSON data files like the main module always has, but can additionally
+write a binary snapshot of the loaded data next to the close approach file, and
+read it back on the next run instead of parsing the data files again.
+
+A snapshot stores the close approaches in the columnar layout of
+`columnar.ApproachColumns`, already linked to their NEOs, as the raw bytes of
+each typed array. The NEOs, the designations of approaches of unknown NEOs and
+the layout of the columns are described by a JSON header. Reading a snapshot
+never runs code from it, so a snapshot file is no more trusted than the data
+files themselves.
+
+A snapshot is keyed by a fingerprint (size, modification time and a hash of the
+head and tail) of each data file, so it is discarded and rebuilt automatically
+whenever either source file changes, or when the snapshot format version
+changes.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from columnar import MISSING_TIME, ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from helpers import minutes_to_datetime
+from models import CloseApproach, NearEarthObject
+from profiling import phase
+
+# Identify snapshot files, and the version of their layout.
+SNAPSHOT_MAGIC = b"NEOSNAP\0"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".neosnap"
+
+# The columns stored after the header, in order, with their array typecodes.
+_COLUMNS = (("time", "q"), ("distance", "d"), ("velocity", "d"), ("neo", "q"))
+
+# The entries of a snapshot's header.
+_HEADER_KEYS = frozenset(("byteorder", "sources", "rows", "neos", "orphans"))
+
+# How many bytes from each end of a data file contribute to its fingerprint.
+_FINGERPRINT_SAMPLE = 1 << 16
+
+
+class SnapshotError(Exception):
+    """A snapshot is missing, corrupt, outdated, or doesn't match its sources."""
+
+
+def snapshot_path(neo_csv_path, cad_json_path):
+    """Return where the snapshot of a pair of data files is stored.
+
+    Args:
+        neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+        cad_json_path: A path to a JSON file containing data about close approaches.
+
+    Returns:
+        Path: A path next to the close approach data file.
+    """
+    cad_json_path = Path(cad_json_path)
+    return cad_json_path.with_name(
+        f".{cad_json_path.name}.{Path(neo_csv_path).stem}{SNAPSHOT_SUFFIX}"
+    )
+
+
+def fingerprint(path):
+    """Summarize a data file so that any change to it can be detected cheaply.
+
+    Hashing the whole of a large file would cost a large part of the time a
+    snapshot saves, so only its first and last bytes are hashed, together with
+    its size and modification time.
+
+    Args:
+        path: A path to a data file.
+
+    Returns:
+        tuple: The (size, mtime in nanoseconds, hex digest) of the file.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(_FINGERPRINT_SAMPLE))
+        if stat.st_size > _FINGERPRINT_SAMPLE:
+            file.seek(max(_FINGERPRINT_SAMPLE, stat.st_size - _FINGERPRINT_SAMPLE))
+            digest.update(file.read())
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def save_snapshot(path, neos, approaches, sources):
+    """Write a snapshot of a linked data set.
+
+    The file holds `SNAPSHOT_MAGIC`, the version and the length of the header
+    as 4- and 8-byte little-endian integers, the header as UTF-8 JSON, and
+    then the bytes of each column of `_COLUMNS`, in the machine's byte order.
+
+    The snapshot is written to a temporary file first and then moved into place,
+    so a concurrent reader never sees a partially written snapshot.
+
+    Args:
+        path: Where to write the snapshot.
+        neos: The collection of NearEarthObjects, in database order.
+        approaches: The close approaches of a database built from those NEOs,
+            as a list of linked CloseApproaches or a linked ApproachColumns.
+        sources: The fingerprints of the data files the snapshot was built from.
+    """
+    if not isinstance(approaches, ApproachColumns):
+        approaches = _columns_of(neos, approaches)
+    header = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "sources": sources,
+            "rows": len(approaches),
+            "neos": [
+                (neo.designation, neo.name, neo.diameter, neo.hazardous)
+                for neo in neos
+            ],
+            "orphans": sorted(approaches.orphans.items()),
+        }
+    ).encode("utf-8")
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            file.write(SNAPSHOT_VERSION.to_bytes(4, "little"))
+            file.write(len(header).to_bytes(8, "little"))
+            file.write(header)
+            for column, _ in _COLUMNS:
+                file.write(getattr(approaches, column).tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _columns_of(neos, approaches):
+    """Convert a list of linked close approaches into linked columns.
+
+    Args:
+        neos: The collection of NearEarthObjects, in database order.
+        approaches: A collection of CloseApproaches linked to those NEOs.
+
+    Returns:
+        ApproachColumns: The same approaches in columnar storage.
+    """
+    row_of = {id(neo): row for row, neo in enumerate(neos)}
+    missing = len(row_of)
+    unlinked = ApproachColumns.from_approaches(approaches)
+    return ApproachColumns.restore(
+        unlinked.time,
+        unlinked.distance,
+        unlinked.velocity,
+        array("q", (row_of.get(id(a.neo), missing) for a in approaches)),
+        {row: a._designation for row, a in enumerate(approaches) if a.neo is None},
+    )
+
+
+def _materialize(neos, columns):
+    """Create an unlinked `CloseApproach` for every row of restored columns.
+
+    Args:
+        neos: The collection of unlinked NearEarthObjects, in database order.
+        columns: An ApproachColumns restored from a snapshot of those NEOs.
+
+    Returns:
+        list: A collection of unlinked CloseApproaches.
+    """
+    approaches = []
+    missing, orphans = len(neos), columns.orphans
+    for row, (minutes, distance, velocity, neo_row) in enumerate(
+        zip(columns.time, columns.distance, columns.velocity, columns.neo, strict=True)
+    ):
+        designation = (
+            neos[neo_row].designation if neo_row != missing else orphans[row]
+        )
+        approach = CloseApproach(designation, None, distance, velocity)
+        if minutes != MISSING_TIME:
+            approach.time = minutes_to_datetime(minutes)
+        approaches.append(approach)
+    return approaches
+
+
+def read_snapshot(path, sources):
+    """Read the NEOs and close approach columns stored in a snapshot.
+
+    Args:
+        path: Where the snapshot is stored.
+        sources: The fingerprints of the current data files.
+
+    Returns:
+        tuple: A list of (unlinked) NearEarthObjects and an ApproachColumns.
+
+    Raises:
+        SnapshotError: If the snapshot can't be used for these data files.
+    """
+    try:
+        with open(path, "rb") as file:
+            if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise SnapshotError(f"{path} is not a snapshot")
+            version = int.from_bytes(file.read(4), "little")
+            if version != SNAPSHOT_VERSION:
+                raise SnapshotError(f"{path} has an outdated version {version}")
+            size = int.from_bytes(file.read(8), "little")
+            header = json.loads(_read_exactly(file, size, path))
+
+            # A header of another shape is treated like a stale one, and rebuilt.
+            if not isinstance(header, dict) or not _HEADER_KEYS <= header.keys():
+                raise SnapshotError(f"{path} has an unexpected layout")
+            if header["byteorder"] != sys.byteorder:
+                raise SnapshotError(f"{path} was written with another byte order")
+            if header["sources"] != [list(source) for source in sources]:
+                raise SnapshotError(f"{path} is stale")
+
+            stored = {}
+            for column, typecode in _COLUMNS:
+                stored[column] = array(typecode)
+                size = header["rows"] * stored[column].itemsize
+                stored[column].frombytes(_read_exactly(file, size, path))
+    except FileNotFoundError as e:
+        raise SnapshotError(f"{path} does not exist") from e
+    except (OSError, ValueError, TypeError) as e:
+        raise SnapshotError(f"{path} is unreadable: {e}") from e
+
+    try:
+        neos = [
+            NearEarthObject(designation, name, diameter, hazardous)
+            for designation, name, diameter, hazardous in header["neos"]
+        ]
+        orphans = {row: designation for row, designation in header["orphans"]}
+    except (TypeError, ValueError, AttributeError) as e:
+        raise SnapshotError(f"{path} has an unexpected layout: {e}") from e
+
+    # Every row refers to a stored NEO, or to the missing NEO of an orphan.
+    missing, neo = len(neos), stored["neo"]
+    if neo and (min(neo) < 0 or max(neo) > missing):
+        raise SnapshotError(f"{path} has an unexpected layout")
+    if neo.count(missing) != len(orphans) or not all(
+        0 <= row < len(neo) and neo[row] == missing for row in orphans
+    ):
+        raise SnapshotError(f"{path} has an unexpected layout")
+
+    columns = ApproachColumns.restore(
+        stored["time"], stored["distance"], stored["velocity"], neo, orphans
+    )
+    return neos, columns
+
+
+def _read_exactly(file, size, path):
+    """Read a number of bytes from a snapshot, which must hold at least that many.
+
+    Raises:
+        SnapshotError: If the snapshot is truncated.
+    """
+    data = file.read(size)
+    if len(data) != size:
+        raise SnapshotError(f"{path} is truncated")
+    return data
+
+
+def load_database(
+    neo_csv_path,
+    cad_json_path,
+    columnar=False,
+    use_snapshot=False,
+    workers=1,
+    profiler=None,
+):
+    """Build an `NEODatabase` from data files, optionally through a snapshot.
+
+    With `use_snapshot`, a valid snapshot of the data files is loaded if one
+    exists. Otherwise, the data files are parsed and a new snapshot is written
+    for next time; failing to write it only produces a warning.
+
+    Args:
+        neo_csv_path: A path to a CSV file containing data about near-Earth objects.
+        cad_json_path: A path to a JSON file containing data about close approaches.
+        columnar: Whether to keep the close approaches in columnar storage.
+        use_snapshot: Whether to read and write a snapshot of the loaded data.
+        workers: The number of processes parsing the close approach data file.
+        profiler: A `profiling.Profiler` timing the phases of loading, or None.
+
+    Returns:
+        NEODatabase: A database of the NEOs and close approaches in the files.
+    """
+    if use_snapshot:
+        path = snapshot_path(neo_csv_path, cad_json_path)
+        sources = (fingerprint(neo_csv_path), fingerprint(cad_json_path))
+        try:
+            with phase(profiler, "read_snapshot"):
+                neos, approaches = read_snapshot(path, sources)
+                if not columnar:
+                    approaches = _materialize(neos, approaches)
+        except SnapshotError:
+            pass
+        else:
+            with phase(profiler, "link"):
+                return NEODatabase(neos, approaches)
+
+    with phase(profiler, "load_neos"):
+        neos = load_neos(neo_csv_path)
+    with phase(profiler, "load_approaches"):
+        approaches = load_approaches(cad_json_path, columnar=columnar, workers=workers)
+    with phase(profiler, "link"):
+        database = NEODatabase(neos, approaches)
+    if use_snapshot:
+        try:
+            with phase(profiler, "write_snapshot"):
+                save_snapshot(path, neos, approaches, sources)
+        except OSError as e:
+            print(f"Warning: Unable to write snapshot {path}: {e}", file=sys.stderr)
+    return database
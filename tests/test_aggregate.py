@@ -0,0 +1,172 @@
+"""Check that counts and summary statistics match those computed from query results.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_aggregate
+"""
+
+import collections
+import contextlib
+import datetime
+import io
+import json
+import math
+import pathlib
+import statistics
+import unittest
+from array import array
+
+from aggregate import GROUP_KEYS, Summary, aggregate
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from main import make_parser, stats
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+# How to compute the group of a CloseApproach, for each grouping.
+GROUPS = {
+    "year": lambda approach: approach.time.year,
+    "month": lambda approach: approach.time.strftime("%Y-%m"),
+    "neo": lambda approach: approach._designation,
+    "hazardous": lambda approach: approach.neo.hazardous,
+}
+
+QUERIES = (
+    {},
+    {"distance_max": 0.1},
+    {"start_date": datetime.date(2020, 3, 1), "end_date": datetime.date(2020, 5, 31)},
+    {"hazardous": True, "velocity_min": 10},
+    {"date": datetime.date(1900, 1, 1)},
+)
+
+
+class TestSummary(unittest.TestCase):
+    def test_statistics(self):
+        summary = Summary(array("d", [4.0, 1.0, math.nan, 3.0, 2.0]))
+        self.assertEqual((summary.count, summary.missing), (4, 1))
+        self.assertEqual((summary.min, summary.max, summary.mean), (1.0, 4.0, 2.5))
+        self.assertEqual(summary.percentile(0), 1.0)
+        self.assertEqual(summary.percentile(50), 2.5)
+        self.assertEqual(summary.percentile(100), 4.0)
+        self.assertAlmostEqual(summary.percentile(25), 1.75)
+        with self.assertRaises(ValueError):
+            summary.percentile(101)
+
+    def test_missing_values_only(self):
+        summary = Summary(array("d", [math.nan, math.nan]))
+        self.assertEqual((summary.count, summary.missing), (0, 2))
+        self.assertTrue(math.isnan(summary.mean))
+        self.assertTrue(math.isnan(summary.percentile(50)))
+
+    def test_aggregate_groups(self):
+        values = [5.0, 1.0, 2.0, 8.0]
+        readers = {"value": lambda rows: map(values.__getitem__, rows)}
+        groups = aggregate(range(4), readers, group_key=lambda row: row % 2)
+        self.assertEqual(groups[0].count, 2)
+        self.assertEqual(groups[0].summaries["value"].mean, 3.5)
+        self.assertEqual(groups[1].summaries["value"].max, 8.0)
+        self.assertEqual(aggregate([], readers), {})
+
+
+class TestDatabaseAggregate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.databases = {
+            "objects": NEODatabase(cls.neos, cls.approaches),
+            "columnar": NEODatabase(
+                load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, columnar=True)
+            ),
+        }
+
+    def test_count_matches_query(self):
+        for storage, database in self.databases.items():
+            for criteria in QUERIES:
+                filters = create_filters(**criteria)
+                with self.subTest(storage=storage, criteria=criteria):
+                    expected = len(list(database.query(filters)))
+                    self.assertEqual(database.count(filters), expected)
+
+    def test_groups_match_query(self):
+        for storage, database in self.databases.items():
+            for criteria in QUERIES:
+                filters = create_filters(**criteria)
+                results = list(database.query(filters))
+                for group_by in GROUP_KEYS:
+                    with self.subTest(storage=storage, criteria=criteria, group_by=group_by):
+                        expected = collections.defaultdict(list)
+                        for approach in results:
+                            expected[GROUPS[group_by](approach)].append(approach)
+                        groups = database.aggregate(filters, group_by=group_by)
+                        self.assertEqual(
+                            {key: group.count for key, group in groups.items()},
+                            {key: len(members) for key, members in expected.items()},
+                        )
+                        for key, members in expected.items():
+                            velocities = [approach.velocity for approach in members]
+                            summary = groups[key].summaries["velocity"]
+                            self.assertAlmostEqual(summary.mean, statistics.fmean(velocities))
+                            self.assertEqual(summary.max, max(velocities))
+                            self.assertAlmostEqual(
+                                summary.percentile(50), statistics.median(velocities)
+                            )
+
+    def test_diameters_skip_unknown_values(self):
+        groups = self.databases["objects"].aggregate(columns=("diameter",))
+        summary = groups[None].summaries["diameter"]
+        diameters = [approach.neo.diameter for approach in self.approaches]
+        known = [diameter for diameter in diameters if not math.isnan(diameter)]
+        self.assertEqual(summary.count, len(known))
+        self.assertEqual(summary.missing, len(diameters) - len(known))
+        self.assertEqual(summary.min, min(known))
+
+    def test_invalid_arguments(self):
+        database = self.databases["objects"]
+        with self.assertRaises(ValueError):
+            database.aggregate(group_by="color")
+        with self.assertRaises(ValueError):
+            database.aggregate(columns=("name",))
+
+
+class TestStatsCommand(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        _, _, _, cls.parser = make_parser()
+
+    def run_stats(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats(self.db, self.parser.parse_args(argv))
+        return output.getvalue()
+
+    def test_count(self):
+        output = self.run_stats("--count", "--max-distance", "0.1")
+        self.assertEqual(int(output), self.db.count(create_filters(distance_max=0.1)))
+
+    def test_json_groups(self):
+        document = json.loads(
+            self.run_stats("--group-by", "hazardous", "--column", "distance", "-p", "90", "--json")
+        )
+        self.assertEqual(document["group_by"], "hazardous")
+        self.assertEqual([group["group"] for group in document["groups"]], [False, True])
+        self.assertEqual(
+            sum(group["count"] for group in document["groups"]), len(self.db._approaches)
+        )
+        self.assertEqual(
+            set(document["groups"][0]["distance"]),
+            {"count", "missing", "min", "max", "mean", "p90"},
+        )
+
+    def test_text_summary(self):
+        output = self.run_stats("--date", "2020-01-01")
+        self.assertIn("matching close approaches", output)
+        self.assertIn("velocity (km/s): min", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
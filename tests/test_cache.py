@@ -0,0 +1,115 @@
+"""Check that cached query results match fresh ones, and that the cache is bounded.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_cache
+"""
+
+import datetime
+import pathlib
+import unittest
+from array import array
+
+from cache import CacheEntry, QueryCache
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters, limit
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_key_ignores_order_and_duplicates(self):
+        first = create_filters(distance_max=0.1, hazardous=True)
+        second = list(reversed(first)) + first
+        self.assertEqual(QueryCache.key(first), QueryCache.key(second))
+        self.assertNotEqual(
+            QueryCache.key(first), QueryCache.key(create_filters(distance_max=0.2))
+        )
+
+    def test_dates_are_keyed_by_ordinal(self):
+        day = datetime.date(2020, 1, 1)
+        self.assertEqual(
+            QueryCache.key(create_filters(date=day)),
+            QueryCache.key(create_filters(date=datetime.datetime(2020, 1, 1).date())),
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = QueryCache(max_entries=2)
+        for key in "abc":
+            cache.put(key, CacheEntry(array("q", [1]), 1, True))
+            if key == "b":
+                cache.get("a")
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_budget_is_respected(self):
+        small = CacheEntry(array("q", range(10)), 10, True)
+        cache = QueryCache(max_bytes=2 * small.nbytes)
+        for key in range(5):
+            cache.put(key, CacheEntry(array("q", range(10)), 10, True))
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+        self.assertEqual(len(cache), 2)
+        cache.put("large", CacheEntry(array("q", range(1000)), 1000, True))
+        self.assertIsNone(cache.get("large"))
+
+    def test_less_complete_entries_do_not_replace_cached_ones(self):
+        cache = QueryCache()
+        cache.put("key", CacheEntry(array("q", [1, 2]), 5, False))
+        cache.put("key", CacheEntry(array("q", [1]), 3, False))
+        self.assertEqual(cache.get("key").position, 5)
+
+
+class TestDatabaseCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.columns = load_approaches(TEST_CAD_FILE, columnar=True)
+
+    def databases(self):
+        yield "objects", NEODatabase(self.neos, self.approaches)
+        db = NEODatabase(load_neos(TEST_NEO_FILE), self.columns)
+        # Partial scans are specific to checking filters row by row.
+        db.vectorized = None
+        yield "columnar", db
+
+    def test_repeated_query_hits_the_cache(self):
+        filters = create_filters(start_date=datetime.date(2020, 6, 1), distance_max=0.2)
+        for storage, db in self.databases():
+            with self.subTest(storage=storage):
+                expected = [str(approach) for approach in db.query(filters)]
+                self.assertEqual([str(approach) for approach in db.query(filters)], expected)
+                self.assertEqual(db.cache.hits, 1)
+                self.assertEqual(db.cache.misses, 1)
+
+    def test_limited_query_resumes_from_cached_prefix(self):
+        filters = create_filters(velocity_min=10, hazardous=False)
+        for storage, db in self.databases():
+            with self.subTest(storage=storage):
+                self.assertEqual(len(list(limit(db.query(filters), 3))), 3)
+                entry = db.cache.get(db.cache.key(filters))
+                self.assertFalse(entry.complete)
+                self.assertEqual(len(entry.rows), 3)
+
+                db.cache = QueryCache()
+                expected = [str(approach) for approach in db.query(filters)]
+                db.cache = QueryCache()
+                list(limit(db.query(filters), 3))
+                resumed = [str(approach) for approach in db.query(filters)]
+                self.assertEqual(resumed, expected)
+                self.assertEqual(db.cache.partial_hits, 1)
+                self.assertTrue(db.cache.get(db.cache.key(filters)).complete)
+
+    def test_cache_can_be_disabled(self):
+        _, db = next(self.databases())
+        db.cache = None
+        filters = create_filters(hazardous=True)
+        self.assertEqual(list(db.query(filters)), list(db.query(filters)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Check that the columnar storage engine behaves like the object storage.
+
+An `NEODatabase` built from an `ApproachColumns` should answer the same inspect
+and query requests as one built from a list of `CloseApproach` objects.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_columnar
+"""
+
+import datetime
+import math
+import pathlib
+import unittest
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from index import TimeIndex
+from models import CloseApproach, NearEarthObject
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def describe(approaches):
+    return sorted(str(approach) for approach in approaches)
+
+
+class TestApproachColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+        cls.columns = load_approaches(TEST_CAD_FILE, columnar=True)
+        cls.columnar_db = NEODatabase(load_neos(TEST_NEO_FILE), cls.columns)
+
+    def test_columnar_load_produces_columns(self):
+        self.assertIsInstance(self.columns, ApproachColumns)
+        self.assertEqual(len(self.columns), len(self.approaches))
+
+    def test_rows_materialize_linked_close_approaches(self):
+        approach = self.columns[0]
+        self.assertIsInstance(approach, CloseApproach)
+        self.assertIsNotNone(approach.neo)
+        self.assertEqual(approach.time, self.approaches[0].time)
+        self.assertEqual(approach.distance, self.approaches[0].distance)
+        self.assertEqual(approach.velocity, self.approaches[0].velocity)
+
+    def test_neos_have_views_of_their_approaches(self):
+        neo = self.columnar_db.get_neo_by_designation("2102")
+        self.assertEqual(
+            describe(neo.approaches),
+            describe(self.db.get_neo_by_designation("2102").approaches),
+        )
+
+    def test_neo_attributes_are_columns(self):
+        neo = self.columns[0].neo
+        row = self.columns.neo[0]
+        self.assertEqual(bool(self.columns.neo_hazardous[row]), neo.hazardous)
+        if math.isnan(neo.diameter):
+            self.assertTrue(math.isnan(self.columns.neo_diameter[row]))
+        else:
+            self.assertEqual(self.columns.neo_diameter[row], neo.diameter)
+
+    def test_query_matches_object_storage(self):
+        for criteria in (
+            {},
+            {"date": datetime.date(2020, 3, 2)},
+            {"start_date": datetime.date(2020, 6, 1), "distance_max": 0.2},
+            {"velocity_min": 20, "diameter_min": 0.1, "hazardous": True},
+            {"diameter_max": 1.0, "hazardous": False},
+        ):
+            with self.subTest(**criteria):
+                filters = create_filters(**criteria)
+                self.assertEqual(
+                    describe(self.columnar_db.query(filters)),
+                    describe(self.db.query(filters)),
+                )
+
+    def test_from_approaches_round_trips(self):
+        approaches = load_approaches(TEST_CAD_FILE)
+        columns = ApproachColumns.from_approaches(approaches)
+        self.assertEqual(describe(columns), describe(approaches))
+
+    def test_approaches_without_time_are_missing_from_date_ranges(self):
+        def make_approaches():
+            return [
+                CloseApproach("1", None, 0.1, 1.0),
+                CloseApproach("1", "2020-Jan-01 12:00", 0.2, 2.0),
+            ]
+
+        columns = ApproachColumns.from_approaches(make_approaches())
+        self.assertEqual(columns.days()[0], TimeIndex.MISSING)
+        end_only = create_filters(end_date=datetime.date(2020, 12, 31))
+        for approaches in (make_approaches(), columns):
+            db = NEODatabase([NearEarthObject("1")], approaches)
+            self.assertEqual(db.count(end_only), 1)
+            self.assertEqual(len(list(db.query(end_only, sort_by="date"))), 1)
+            self.assertEqual(db.count(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Check that compiled filter predicates agree with the individual filters.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_compiled_filters
+"""
+
+import datetime
+import operator
+import pathlib
+import unittest
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import (
+    AttributeFilter,
+    CompiledFilters,
+    FilterCollection,
+    VelocityFilter,
+    compile_filters,
+    create_filters,
+)
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+CRITERIA = (
+    {},
+    {"date": datetime.date(2020, 3, 2)},
+    {"start_date": datetime.date(2020, 6, 1), "end_date": datetime.date(2020, 6, 30)},
+    {"distance_min": 0.1, "distance_max": 0.2, "velocity_max": 15},
+    {"velocity_min": 20, "diameter_min": 0.1, "diameter_max": 2, "hazardous": True},
+    {"diameter_max": 1.0, "hazardous": False},
+)
+
+
+class NameLengthFilter(AttributeFilter):
+    """A filter without a column, which compiled predicates must call."""
+
+    @classmethod
+    def get(cls, approach):
+        return len(approach._designation)
+
+
+def check_all(filters, approach):
+    return all(filter_obj(approach) for filter_obj in filters)
+
+
+class TestCompiledFilters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(cls.neos, cls.approaches)
+
+    def test_create_filters_returns_a_list_of_filters(self):
+        filters = create_filters(velocity_min=20, velocity_max=30)
+        self.assertIsInstance(filters, FilterCollection)
+        self.assertIsInstance(filters, list)
+        self.assertEqual(len(filters), 2)
+
+    def test_compiled_filters_remain_iterable(self):
+        filters = create_filters(velocity_min=20, hazardous=True)
+        compiled = create_filters(velocity_min=20, hazardous=True, compiled=True)
+        self.assertIsInstance(compiled, CompiledFilters)
+        self.assertEqual(len(compiled), 2)
+        self.assertEqual(list(map(repr, compiled)), list(map(repr, filters)))
+
+    def test_compiled_predicate_matches_individual_filters(self):
+        for criteria in CRITERIA:
+            with self.subTest(**criteria):
+                compiled = create_filters(**criteria, compiled=True)
+                self.assertEqual(
+                    [compiled(approach) for approach in self.approaches],
+                    [check_all(compiled, approach) for approach in self.approaches],
+                )
+
+    def test_bounds_are_merged_into_range_checks(self):
+        compiled = create_filters(
+            start_date=datetime.date(2020, 1, 1),
+            end_date=datetime.date(2020, 12, 31),
+            velocity_min=10,
+            compiled=True,
+        )
+        self.assertEqual(compiled.source.count("toordinal()"), 1)
+        self.assertIn("_v0 <= value <= _v1", compiled.source)
+        self.assertEqual(
+            compiled.predicate.__globals__["_v0"], datetime.date(2020, 1, 1).toordinal()
+        )
+
+    def test_filters_without_a_column_are_called(self):
+        filters = [NameLengthFilter(operator.le, 4), VelocityFilter(operator.gt, 10)]
+        predicate = compile_filters(filters)
+        for approach in self.approaches:
+            self.assertEqual(predicate(approach), check_all(filters, approach))
+
+    def test_database_accepts_compiled_filters(self):
+        for criteria in CRITERIA:
+            with self.subTest(**criteria):
+                self.assertEqual(
+                    list(self.db.query(create_filters(**criteria, compiled=True))),
+                    list(self.db.query(create_filters(**criteria))),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Check that data and result files can be compressed transparently.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_compression
+"""
+
+import bz2
+import gzip
+import lzma
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from compression import CODECS, compression_of, format_suffix, open_file
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from write import write_to_csv, write_to_json, write_to_ndjson
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def describe(approaches):
+    return [str(approach) for approach in approaches]
+
+
+class TestCompression(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        NEODatabase(cls.neos, cls.approaches)
+
+    def setUp(self):
+        self.tmpdir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def compress(self, source, suffix, name=None):
+        compress = {
+            ".gz": lambda data: gzip.compress(data, compresslevel=1),
+            ".bz2": lambda data: bz2.compress(data, compresslevel=1),
+            ".xz": lambda data: lzma.compress(data, preset=0),
+        }[suffix]
+        path = self.tmpdir / (name or source.name + suffix)
+        path.write_bytes(compress(source.read_bytes()))
+        return path
+
+    def test_format_suffix_ignores_compression(self):
+        self.assertEqual(format_suffix("results.csv.gz"), ".csv")
+        self.assertEqual(format_suffix("results.jsonl.xz"), ".jsonl")
+        self.assertEqual(format_suffix("results.json"), ".json")
+
+    def test_compressed_data_files_load_like_plain_ones(self):
+        for suffix in CODECS:
+            with self.subTest(suffix=suffix):
+                neos = load_neos(self.compress(TEST_NEO_FILE, suffix))
+                approaches = load_approaches(self.compress(TEST_CAD_FILE, suffix))
+                NEODatabase(neos, approaches)
+                self.assertEqual(len(neos), len(self.neos))
+                self.assertEqual(describe(approaches), describe(self.approaches))
+
+    def test_compression_is_detected_from_magic_bytes(self):
+        for suffix in CODECS:
+            with self.subTest(suffix=suffix):
+                path = self.compress(TEST_CAD_FILE, suffix, name=f"cad{suffix}.json")
+                self.assertEqual(compression_of(path), None)
+                self.assertEqual(compression_of(path, sniff=True), suffix)
+                approaches = load_approaches(path)
+                self.assertEqual(len(approaches), len(self.approaches))
+
+    def test_plain_files_with_misleading_suffix_are_read_as_is(self):
+        path = self.tmpdir / "cad.json.gz"
+        shutil.copy(TEST_CAD_FILE, path)
+        self.assertEqual(len(load_approaches(path)), len(self.approaches))
+
+    def test_writers_compress_by_suffix(self):
+        for write, name in (
+            (write_to_csv, "results.csv"),
+            (write_to_json, "results.json"),
+            (write_to_ndjson, "results.jsonl"),
+        ):
+            plain = self.tmpdir / name
+            approaches = self.approaches[:500]
+            write(approaches, plain)
+            for suffix in CODECS:
+                with self.subTest(name=name, suffix=suffix):
+                    path = self.tmpdir / (name + suffix)
+                    write(approaches, path)
+                    self.assertEqual(compression_of(path, sniff=True), suffix)
+                    with open_file(path, "rb") as file:
+                        self.assertEqual(file.read(), plain.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
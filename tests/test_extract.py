@@ -13,11 +13,23 @@ These tests should pass when Task 2 is complete.
 
 import collections.abc
 import datetime
+import json
 import math
 import pathlib
+import tempfile
 import unittest
 
-from extract import load_approaches, load_neos
+from extract import (
+    _data_ranges,
+    _parse_data_range,
+    iter_approach_batches,
+    iter_approaches,
+    iter_cad_rows,
+    load_approaches,
+    load_columns_parallel,
+    load_neos,
+    read_approach_count,
+)
 from models import CloseApproach, NearEarthObject
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
@@ -78,6 +90,29 @@ class TestLoadNEOs(unittest.TestCase):
         self.assertEqual(neo.hazardous, True)
 
 
+class TestLoadNEOExtraFields(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        neos = load_neos(TEST_NEO_FILE, extra_fields=("H", "albedo", "moid", "class"))
+        cls.neos_by_designation = {neo.designation: neo for neo in neos}
+
+    def test_extra_fields_are_typed(self):
+        adonis = self.neos_by_designation["2101"]
+        self.assertEqual(adonis.magnitude, 18.8)
+        self.assertTrue(math.isnan(adonis.albedo))
+        self.assertEqual(adonis.moid, 0.0115889)
+        self.assertIsInstance(adonis.orbit_class, str)
+
+    def test_extra_fields_default_to_none(self):
+        neo = next(iter(load_neos(TEST_NEO_FILE)))
+        self.assertIsNone(neo.magnitude)
+        self.assertIsNone(neo.orbit_class)
+
+    def test_unknown_extra_field_raises(self):
+        with self.assertRaises(KeyError):
+            load_neos(TEST_NEO_FILE, extra_fields=("spec_B",))
+
+
 class TestLoadApproaches(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -118,5 +153,101 @@ class TestLoadApproaches(unittest.TestCase):
         self.assertIsInstance(approach.velocity, float)
 
 
+class TestStreamApproaches(unittest.TestCase):
+    def write_document(self, text):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False, encoding="utf-8"
+        ) as file:
+            file.write(text)
+        self.addCleanup(pathlib.Path(file.name).unlink)
+        return file.name
+
+    def test_rows_match_json_load(self):
+        with open(TEST_CAD_FILE, encoding="utf-8") as file:
+            data = json.load(file)
+        index = data["fields"].index("des")
+        expected = [(row[index],) for row in data["data"]]
+        for chunk_size in (7, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                rows = list(iter_cad_rows(TEST_CAD_FILE, ("des",), chunk_size))
+                self.assertEqual(rows, expected)
+
+    def test_rows_before_fields_are_supported(self):
+        path = self.write_document(
+            '{"data": [["1", 2.5e3], ["2", null]], "fields": ["des", "dist"]}'
+        )
+        rows = list(iter_cad_rows(path, ("dist", "des"), chunk_size=3))
+        self.assertEqual(rows, [(2500.0, "1"), (None, "2")])
+
+    def test_missing_fields_raise(self):
+        path = self.write_document('{"data": []}')
+        with self.assertRaises(ValueError):
+            list(iter_cad_rows(path, ("des",)))
+
+    def test_iter_approaches_is_lazy(self):
+        approaches = iter_approaches(TEST_CAD_FILE)
+        self.assertIsInstance(approaches, collections.abc.Iterator)
+        self.assertIsInstance(next(approaches), CloseApproach)
+
+    def test_batches_cover_all_approaches(self):
+        batches = list(iter_approach_batches(TEST_CAD_FILE, batch_size=1000))
+        self.assertEqual([len(batch) for batch in batches], [1000] * 4 + [700])
+
+    def test_progress_is_reported(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                reports = []
+                approaches = load_approaches(
+                    TEST_CAD_FILE, columnar=columnar, progress=reports.append
+                )
+                self.assertEqual(reports, [len(approaches)])
+        reports = []
+        empty = self.write_document('{"fields": ["des", "cd", "dist", "v_rel"], "data": []}')
+        load_approaches(empty, progress=reports.append)
+        self.assertEqual(reports, [0])
+
+    def test_announced_count(self):
+        self.assertEqual(read_approach_count(TEST_CAD_FILE), 4700)
+        documents = {
+            '{"signature": {"version": "1.1"}, "count": "2", "data": [[], []]}': 2,
+            '{"data": [], "count": "0"}': None,
+            '{"fields": ["des"]}': None,
+            '{"count": "many"}': None,
+        }
+        for text, expected in documents.items():
+            with self.subTest(text=text):
+                self.assertEqual(read_approach_count(self.write_document(text)), expected)
+
+
+class TestParallelLoad(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = [str(approach) for approach in load_approaches(TEST_CAD_FILE)]
+
+    def test_ranges_cover_every_row(self):
+        fields, ranges = _data_ranges(TEST_CAD_FILE, 17)
+        self.assertEqual(len(ranges), 17)
+        indices = [fields.index(name) for name in ("des", "cd", "dist", "v_rel")]
+        count = sum(
+            len(_parse_data_range(TEST_CAD_FILE, start, end, indices)[0])
+            for start, end in ranges
+        )
+        self.assertEqual(count, len(self.expected))
+
+    def test_parallel_load_matches_sequential_load(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                approaches = load_approaches(TEST_CAD_FILE, columnar=columnar, workers=2)
+                self.assertEqual([str(approach) for approach in approaches], self.expected)
+
+    def test_unsplittable_documents_are_not_loaded_in_parallel(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False, encoding="utf-8"
+        ) as file:
+            file.write('{"data": [["433", "1900-Jan-01 00:00", "0.1", "5"]]}')
+        self.addCleanup(pathlib.Path(file.name).unlink)
+        self.assertIsNone(load_columns_parallel(file.name, 2))
+
+
 if __name__ == "__main__":
     unittest.main()
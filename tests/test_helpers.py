@@ -0,0 +1,50 @@
+"""Check that NASA calendar dates are converted to and from datetimes correctly.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_helpers
+"""
+
+import datetime
+import unittest
+
+from helpers import cd_to_datetime, datetime_to_str
+
+
+class TestCalendarDates(unittest.TestCase):
+    def test_cd_to_datetime_every_month(self):
+        for month, abbr in enumerate(
+            "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), start=1
+        ):
+            with self.subTest(month=abbr):
+                self.assertEqual(
+                    cd_to_datetime(f"2020-{abbr}-09 07:05"),
+                    datetime.datetime(2020, month, 9, 7, 5),
+                )
+
+    def test_cd_to_datetime_matches_strptime(self):
+        for calendar_date in ("1900-Jan-01 00:11", "2020-Dec-31 12:00", "2200-Feb-29 23:59"):
+            with self.subTest(calendar_date=calendar_date):
+                try:
+                    expected = datetime.datetime.strptime(
+                        calendar_date, "%Y-%b-%d %H:%M"
+                    )
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        cd_to_datetime(calendar_date)
+                else:
+                    self.assertEqual(cd_to_datetime(calendar_date), expected)
+
+    def test_cd_to_datetime_rejects_malformed_dates(self):
+        for calendar_date in ("2020-Foo-01 00:00", "2020-Feb-30 00:00", "2020-01-01"):
+            with self.subTest(calendar_date=calendar_date):
+                with self.assertRaises(ValueError):
+                    cd_to_datetime(calendar_date)
+
+    def test_datetime_to_str_omits_seconds(self):
+        dt = datetime.datetime(2020, 1, 2, 3, 4, 59, 123)
+        self.assertEqual(datetime_to_str(dt), "2020-01-02 03:04")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Check that the auxiliary indexes of an `NEODatabase` locate the right approaches and NEOs.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_index
+"""
+
+import datetime
+import pathlib
+import unittest
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from index import NameIndex, TimeIndex, normalize_name
+from models import NearEarthObject
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TimeIndex([5, 3, TimeIndex.MISSING, 3, 9])
+
+    def test_keys_are_sorted(self):
+        self.assertEqual(list(self.index.keys), [-1, 3, 3, 5, 9])
+
+    def test_lookup_inclusive_range(self):
+        self.assertEqual(sorted(self.index.lookup(3, 5)), [0, 1, 3])
+
+    def test_lookup_open_ranges(self):
+        self.assertEqual(list(self.index.lookup(start=6)), [4])
+        self.assertEqual(sorted(self.index.lookup(end=3)), [1, 3])
+
+    def test_only_unbounded_lookups_include_missing_times(self):
+        self.assertEqual(sorted(self.index.lookup()), [0, 1, 2, 3, 4])
+        for start, end in ((None, 9), (-5, None), (-5, 9)):
+            with self.subTest(start=start, end=end):
+                self.assertNotIn(2, self.index.lookup(start, end))
+
+    def test_lookup_empty_range(self):
+        self.assertEqual(list(self.index.lookup(6, 5)), [])
+        self.assertEqual(list(self.index.lookup(10)), [])
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        names = ["Apollo", "Apophis", "Halley", "Hartley", "Jörmungandr", "Eros", "Apollo"]
+        self.neos = [
+            NearEarthObject(f"{number}", name, None, False)
+            for number, name in enumerate(names)
+        ]
+        self.neos.append(NearEarthObject("1999 AA", None, None, False))
+        self.index = NameIndex(self.neos)
+
+    def names(self, neos):
+        return [neo.name for neo in neos]
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  Jörmungandr \t"), "jormungandr")
+        self.assertEqual(normalize_name("Van  Gogh"), "van gogh")
+
+    def test_unnamed_neos_are_skipped(self):
+        self.assertEqual(len(self.index), 7)
+
+    def test_get_ignores_case_and_accents(self):
+        self.assertIs(self.index.get("halley"), self.neos[2])
+        self.assertIs(self.index.get("JORMUNGANDR"), self.neos[4])
+        self.assertIs(self.index.get("apollo"), self.neos[0])
+        self.assertIsNone(self.index.get("hal"))
+
+    def test_prefix(self):
+        self.assertEqual(self.names(self.index.prefix("apo")), ["Apollo", "Apollo", "Apophis"])
+        self.assertEqual(self.names(self.index.prefix("APOP")), ["Apophis"])
+        self.assertEqual(self.names(self.index.prefix("apo", limit=1)), ["Apollo"])
+        self.assertEqual(self.index.prefix("zz"), [])
+        self.assertEqual(len(self.index.prefix("")), 7)
+
+    def test_fuzzy_ranks_the_closest_name_first(self):
+        matches = self.index.fuzzy("Hallley")
+        self.assertEqual(matches[0][0].name, "Halley")
+        scores = [score for _, score in matches]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(all(0 < score <= 1 for score in scores))
+        self.assertEqual(self.index.fuzzy("xyzzy"), [])
+
+    def test_find(self):
+        self.assertEqual(self.names(self.index.find("EROS")), ["Eros"])
+        self.assertEqual(self.index.find("Ero"), [])
+        self.assertEqual(self.names(self.index.find("Ero", "prefix")), ["Eros"])
+        self.assertEqual(self.names(self.index.find("Apohpis", "fuzzy", limit=1)), ["Apophis"])
+        with self.assertRaises(ValueError):
+            self.index.find("Eros", "regex")
+
+
+class TestDatabaseNameLookup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def test_exact_lookup_is_unchanged(self):
+        self.assertIsNone(self.db.get_neo_by_name("lemmon"))
+
+    def test_find_neos_by_name(self):
+        lemmon = self.db.get_neo_by_name("Lemmon")
+        self.assertEqual(self.db.find_neos_by_name("lemmon"), [lemmon])
+        self.assertIn(lemmon, self.db.find_neos_by_name("Lem", "prefix"))
+        self.assertIn(lemmon, self.db.find_neos_by_name("Lemon", "fuzzy"))
+
+    def test_suggest_names(self):
+        self.assertIn("Jormungandr", self.db.suggest_names("Jormungand"))
+        self.assertEqual(self.db.suggest_names("qqqqqqqq"), [])
+
+
+class TestIndexedQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), cls.approaches)
+
+    def assertMatchesScan(self, **criteria):
+        filters = create_filters(**criteria)
+        expected = [a for a in self.approaches if all(f(a) for f in filters)]
+        received = list(self.db.query(filters))
+        self.assertGreater(len(expected), 0)
+        self.assertCountEqual(expected, received)
+
+    def test_indexed_date_query_matches_scan(self):
+        self.assertMatchesScan(date=datetime.date(2020, 3, 2))
+
+    def test_indexed_date_range_with_other_filters_matches_scan(self):
+        self.assertMatchesScan(
+            start_date=datetime.date(2020, 3, 1),
+            end_date=datetime.date(2020, 6, 30),
+            distance_max=0.3,
+            hazardous=False,
+        )
+
+    def test_conflicting_date_criteria_match_nothing(self):
+        filters = create_filters(
+            date=datetime.date(2020, 3, 2), start_date=datetime.date(2020, 3, 3)
+        )
+        self.assertEqual(list(self.db.query(filters)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
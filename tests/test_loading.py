@@ -0,0 +1,110 @@
+"""Check that the database loads in the background, NEOs first.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_loading
+"""
+
+import contextlib
+import io
+import pathlib
+import unittest
+
+from extract import load_approaches
+from loading import BackgroundLoader
+from main import NEOShell, make_parser
+from profiling import Profiler
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class TestBackgroundLoader(unittest.TestCase):
+    def test_stages_are_published_in_order(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                configured = []
+                loader = BackgroundLoader(
+                    TEST_NEO_FILE, TEST_CAD_FILE, columnar=columnar, setup=configured.append
+                ).start()
+                neos = loader.wait(approaches=False)
+                self.assertEqual(neos.get_neo_by_designation("1685").name, "Toro")
+
+                database = loader.wait()
+                self.assertTrue(loader.ready)
+                expected = len(load_approaches(TEST_CAD_FILE))
+                self.assertEqual(len(list(database.query())), expected)
+                self.assertGreater(len(database.get_neo_by_name("Toro").approaches), 0)
+                self.assertIs(loader.wait(approaches=False), database)
+                self.assertEqual((loader.loaded, loader.expected), (4700, 4700))
+                self.assertEqual(loader.status(), "Loading complete.")
+                self.assertIs(configured[-1], database)
+
+                # The complete database reuses the lookups of the NEO-only one.
+                self.assertIs(database._name_index, neos._name_index)
+                self.assertIs(database._neos_by_designation, neos._neos_by_designation)
+                self.assertEqual(neos.find_neos_by_name("toro")[0].name, "Toro")
+                self.assertEqual(list(neos.query()), [])
+
+    def test_progress_is_displayed_while_waiting(self):
+        loader = BackgroundLoader(TEST_NEO_FILE, TEST_CAD_FILE)
+        indicator = io.StringIO()
+        # The loader isn't started, so waiting times out.
+        self.assertIsNone(loader.wait(approaches=False, indicator=indicator, timeout=0.3))
+        self.assertIn("\rLoading NEOs...", indicator.getvalue())
+        self.assertTrue(indicator.getvalue().endswith("\r"))
+
+        loader.loaded, loader.expected, loader._stage = 10, 40, "Loading close approaches"
+        self.assertEqual(loader.status(), "Loading close approaches: 10 of 40 (25%)")
+
+    def test_errors_are_raised_when_waiting(self):
+        loader = BackgroundLoader(TEST_NEO_FILE, TESTS_ROOT / "missing.json").start()
+        self.assertIsNotNone(loader.wait(approaches=False))
+        with self.assertRaises(FileNotFoundError):
+            loader.wait()
+        self.assertIn("Loading failed", loader.status())
+
+    def test_loading_is_measured(self):
+        profiler = Profiler()
+        BackgroundLoader(TEST_NEO_FILE, TEST_CAD_FILE, profiler=profiler).start().wait()
+        metrics = profiler.last
+        self.assertEqual(metrics.command, "load")
+        self.assertEqual(list(metrics.phases), ["load_neos", "link", "load_approaches"])
+
+
+class TestShellWithLoader(unittest.TestCase):
+    def setUp(self):
+        _, inspect_parser, query_parser, stats_parser = make_parser()
+        self.loader = BackgroundLoader(TEST_NEO_FILE, TEST_CAD_FILE).start()
+        self.shell = NEOShell(
+            None, inspect_parser, query_parser, stats_parser, loader=self.loader
+        )
+
+    def run_command(self, line):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.shell.onecmd(line)
+        return output.getvalue()
+
+    def test_commands_wait_for_what_they_need(self):
+        self.assertIn("loading in the background", self.shell.intro)
+        self.assertIn("Toro", self.run_command("inspect --pdes 1685"))
+        self.assertEqual(len(self.run_command("query --limit 3").splitlines()), 3)
+        self.assertTrue(self.loader.ready)
+        self.assertIn("wait", self.shell.profiler.last.phases)
+        self.assertIn("Toro", self.run_command("inspect --verbose --name toro"))
+        self.assertIn("queries cached", self.run_command("cache"))
+
+    def test_loading_errors_are_reported(self):
+        _, inspect_parser, query_parser, stats_parser = make_parser()
+        loader = BackgroundLoader(TESTS_ROOT / "missing.csv", TEST_CAD_FILE).start()
+        shell = NEOShell(None, inspect_parser, query_parser, stats_parser, loader=loader)
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors), contextlib.redirect_stdout(io.StringIO()):
+            shell.onecmd("query --limit 3")
+        self.assertIn("Error loading data", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
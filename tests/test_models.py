@@ -0,0 +1,71 @@
+"""Check the compact in-memory representation of NEOs and close approaches.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_models
+"""
+
+import datetime
+import unittest
+
+from models import CloseApproach, NearEarthObject
+
+
+class TestCompactModels(unittest.TestCase):
+    def test_models_have_no_instance_dict(self):
+        self.assertFalse(hasattr(NearEarthObject("433"), "__dict__"))
+        self.assertFalse(hasattr(CloseApproach("433", "2020-Jan-01 00:00"), "__dict__"))
+
+    def test_designations_are_interned(self):
+        neo = NearEarthObject("".join(["20", "20 AB"]))
+        approach = CloseApproach("".join(["2020", " AB"]), "2020-Jan-01 00:00")
+        self.assertIs(neo.designation, approach._designation)
+
+    def test_compact_time_behaves_like_datetime(self):
+        regular = CloseApproach("433", "1969-Jul-29 13:37", 0.1, 10)
+        compact = CloseApproach("433", "1969-Jul-29 13:37", 0.1, 10, compact_time=True)
+        self.assertEqual(compact.time, datetime.datetime(1969, 7, 29, 13, 37))
+        self.assertEqual(compact.time, regular.time)
+        self.assertEqual(compact.time_str, regular.time_str)
+        self.assertEqual(str(compact.serialize()), str(regular.serialize()))
+
+    def test_time_forms_are_checked(self):
+        approach = CloseApproach("433", "1969-Jul-29 13:37")
+        minutes = approach.minutes
+        self.assertIsInstance(minutes, int)
+        with self.assertRaises(TypeError):
+            approach.time = minutes
+        with self.assertRaises(TypeError):
+            approach.minutes = approach.time
+        approach.minutes = minutes
+        self.assertEqual(approach.minutes, minutes)
+        self.assertEqual(approach.time, datetime.datetime(1969, 7, 29, 13, 37))
+        approach.minutes = None
+        self.assertIsNone(approach.time)
+
+    def test_missing_time(self):
+        approach = CloseApproach("433", None, compact_time=True)
+        self.assertIsNone(approach.time)
+        self.assertEqual(approach.time_str, "")
+
+
+class TestSerializeRow(unittest.TestCase):
+    def flatten(self, approach):
+        data = approach.serialize()
+        neo = data.pop("neo")
+        return tuple(map(str, (*data.values(), *neo.values())))
+
+    def test_row_matches_flattened_serialize(self):
+        neo = NearEarthObject("433", "Eros", 16.84, False)
+        approach = CloseApproach("433", "1969-Jul-29 13:37", 0.1, 10)
+        approach.neo = neo
+        self.assertEqual(neo.serialize_row(), tuple(neo.serialize().values()))
+        self.assertEqual(tuple(map(str, approach.serialize_row())), self.flatten(approach))
+
+    def test_row_of_unlinked_approach(self):
+        approach = CloseApproach("2020 AB", "2020-Jan-01 00:00", 0.1, 10)
+        self.assertEqual(tuple(map(str, approach.serialize_row())), self.flatten(approach))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Check that the query planner estimates selectivity and orders filters sensibly.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_planner
+"""
+
+import datetime
+import operator
+import pathlib
+import unittest
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import DistanceFilter, create_filters
+from models import CloseApproach, NearEarthObject
+from planner import ColumnStats
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class TestColumnStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = ColumnStats([float(value) for value in range(100)] + [float("nan")] * 100)
+
+    def test_missing_values_are_counted(self):
+        self.assertEqual(self.stats.missing, 0.5)
+        self.assertEqual((self.stats.min, self.stats.max), (0.0, 99.0))
+
+    def test_range_selectivity(self):
+        self.assertAlmostEqual(self.stats.selectivity(operator.le, 49.5), 0.25, places=2)
+        self.assertAlmostEqual(self.stats.selectivity(operator.ge, 49.5), 0.25, places=2)
+        self.assertEqual(self.stats.selectivity(operator.le, -1), 0.0)
+        self.assertEqual(self.stats.selectivity(operator.ge, -1), 0.5)
+
+    def test_boolean_selectivity(self):
+        stats = ColumnStats([True, False, False, False])
+        self.assertEqual(stats.selectivity(operator.eq, True), 0.25)
+        self.assertEqual(stats.selectivity(operator.eq, False), 0.75)
+
+
+class TestQueryPlanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+
+    def test_date_criteria_use_the_time_index(self):
+        plan = self.db.plan(create_filters(date=datetime.date(2020, 3, 2)))
+        self.assertFalse(plan.full_scan)
+        self.assertEqual(plan.steps, [])
+        self.assertIn("Time index", str(plan))
+
+    def test_selective_filter_runs_first(self):
+        plan = self.db.plan(
+            create_filters(velocity_min=1, hazardous=False, distance_max=0.001)
+        )
+        self.assertTrue(plan.full_scan)
+        self.assertIsInstance(plan.filters[0], DistanceFilter)
+        self.assertEqual(len(plan.filters), 3)
+
+    def test_estimates_are_within_bounds(self):
+        plan = self.db.plan(create_filters(velocity_min=10, diameter_max=1))
+        for step in plan.steps:
+            self.assertGreaterEqual(step.selectivity, 0)
+            self.assertLessEqual(step.selectivity, 1)
+        self.assertLessEqual(plan.estimated_rows, len(plan.rows))
+
+
+class TestApproachesWithoutTime(unittest.TestCase):
+    def make_approaches(self):
+        return [
+            CloseApproach(designation="1", time=None, distance=0.1, velocity=1.0),
+            CloseApproach(
+                designation="1", time="2020-Jan-01 12:00", distance=0.2, velocity=2.0
+            ),
+        ]
+
+    def test_databases_are_built_and_queried(self):
+        for storage in ("objects", "columnar"):
+            with self.subTest(storage=storage):
+                approaches = self.make_approaches()
+                if storage == "columnar":
+                    approaches = ApproachColumns.from_approaches(approaches)
+                db = NEODatabase([NearEarthObject(designation="1")], approaches)
+                self.assertEqual(db._planner.stats["day"].missing, 0.5)
+                self.assertEqual(len(list(db.query())), 2)
+                self.assertEqual(db.count(create_filters(distance_max=0.15)), 1)
+                self.assertEqual(
+                    db.count(create_filters(start_date=datetime.date(2020, 1, 1))), 1
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+"""Check that commands are timed phase by phase, with their row counts and memory.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_profiling
+"""
+
+import contextlib
+import io
+import json
+import pathlib
+import pstats
+import tempfile
+import unittest
+from unittest import mock
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from main import NEOShell, make_parser, query
+from profiling import Profiler, counted, cprofile, timed
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def clock(*times):
+    """Patch the clock of `profiling` to return the given times, in order."""
+    return mock.patch("profiling.time.perf_counter", side_effect=times)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_phases_are_timed_exclusively(self):
+        profiler = Profiler()
+        with clock(0.0, 1.0, 2.0, 5.0, 6.0, 10.0):
+            with profiler.command("query", "--limit 5") as metrics:
+                with profiler.phase("write"):
+                    with profiler.phase("query"):
+                        pass
+        self.assertEqual(metrics.total, 10.0)
+        self.assertEqual(metrics.phases, {"query": 3.0, "write": 2.0})
+        self.assertEqual(metrics.other, 5.0)
+        self.assertIs(profiler.last, metrics)
+        self.assertEqual(metrics.serialize()["arguments"], "--limit 5")
+
+    def test_timed_items_are_charged_and_counted(self):
+        profiler = Profiler()
+        with clock(0.0, 1.0, 2.0, 3.0, 5.0, 6.0, 6.5, 7.0, 8.0, 9.0):
+            with profiler.command("query") as metrics:
+                with profiler.phase("write"):
+                    self.assertEqual(list(profiler.timed("ab", "query")), ["a", "b"])
+        self.assertEqual(metrics.phases, {"query": 2.5, "write": 4.5})
+        self.assertEqual(metrics.rows, {"yielded": 2})
+
+    def test_abandoned_iterables_count_what_was_consumed(self):
+        profiler = Profiler()
+        with profiler.command("query") as metrics:
+            rows = counted(profiler, range(100))
+            self.assertEqual(next(rows), 0)
+            self.assertEqual(next(rows), 1)
+            rows.close()
+            results = timed(profiler, iter("abc"), "query")
+            next(results)
+            results.close()
+        self.assertEqual(metrics.rows, {"scanned": 2, "yielded": 1})
+
+    def test_nothing_is_measured_outside_of_commands(self):
+        profiler = Profiler()
+        rows = range(3)
+        self.assertIs(counted(profiler, rows), rows)
+        self.assertIs(counted(None, rows), rows)
+        self.assertEqual(list(timed(profiler, rows, "query")), [0, 1, 2])
+        with profiler.phase("write"):
+            profiler.count("scanned", 3)
+        self.assertEqual(profiler.history, [])
+
+    def test_peak_memory_is_traced_on_request(self):
+        profiler = Profiler()
+        with profiler.command("inspect") as metrics:
+            pass
+        self.assertIsNone(metrics.peak_memory)
+
+        profiler.trace_memory = True
+        with profiler.command("query") as metrics:
+            data = [bytearray(1024) for _ in range(1024)]
+            del data
+        self.assertGreaterEqual(metrics.peak_memory, 2**20)
+        self.assertIn("peak memory", str(metrics))
+
+    def test_measurements_are_saved_as_json(self):
+        profiler = Profiler()
+        with profiler.command("load"):
+            with profiler.phase("load_neos"):
+                pass
+        with profiler.command("query"):
+            profiler.count("scanned", 10)
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "metrics.json"
+            profiler.dump(path)
+            document = json.loads(path.read_text())
+        self.assertEqual([c["command"] for c in document["commands"]], ["load", "query"])
+        self.assertEqual(set(document["commands"][0]["phases"]), {"load_neos", "other"})
+        self.assertEqual(document["commands"][1]["rows"], {"scanned": 10})
+
+    def test_cprofile_statistics_are_saved(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "run.prof"
+            with cprofile(path):
+                sorted(range(1000), key=str)
+            self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+
+
+class TestQueryMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.databases = {
+            "objects": NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE)),
+            "columnar": NEODatabase(
+                load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, columnar=True)
+            ),
+        }
+        # Partial scans are specific to checking filters row by row.
+        cls.databases["columnar"].vectorized = None
+        _, _, cls.parser, _ = make_parser()
+
+    def measure(self, database, filters, **options):
+        database.cache = None
+        database.profiler = profiler = Profiler()
+        try:
+            with profiler.command("query"):
+                results = list(timed(profiler, database.query(filters, **options), "query"))
+        finally:
+            database.profiler = None
+        return profiler.last, results
+
+    def test_rows_scanned_and_yielded(self):
+        for storage, database in self.databases.items():
+            filters = create_filters(distance_max=0.1)
+            candidates = len(database.plan(filters).rows)
+            with self.subTest(storage=storage):
+                metrics, results = self.measure(database, filters)
+                self.assertEqual(metrics.rows, {"scanned": candidates, "yielded": len(results)})
+                self.assertLess(len(results), candidates)
+                self.assertIn("plan", metrics.phases)
+
+                metrics, results = self.measure(database, filters, limit=1)
+                self.assertEqual(metrics.rows["yielded"], 1)
+                self.assertLess(metrics.rows["scanned"], candidates)
+
+                metrics, results = self.measure(database, (), sort_by="date")
+                self.assertEqual(metrics.rows["scanned"], len(database._approaches))
+                self.assertEqual(metrics.rows["yielded"], len(results))
+
+    def test_query_command_phases(self):
+        database = self.databases["objects"]
+        database.profiler = profiler = Profiler()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                with profiler.command("query"):
+                    query(database, self.parser.parse_args(["--max-distance", "0.1"]))
+        finally:
+            database.profiler = None
+        metrics = profiler.last
+        self.assertEqual(list(metrics.phases), ["filters", "plan", "query", "write"])
+        self.assertEqual(metrics.rows["yielded"], 10)
+
+
+class TestShellMetrics(unittest.TestCase):
+    def setUp(self):
+        database = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        _, inspect_parser, query_parser, stats_parser = make_parser()
+        self.shell = NEOShell(database, inspect_parser, query_parser, stats_parser)
+
+    def run_command(self, line):
+        output, errors = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            self.shell.onecmd(line)
+        return output.getvalue(), errors.getvalue()
+
+    def test_metrics_of_the_last_command(self):
+        output, _ = self.run_command("metrics")
+        self.assertIn("No command", output)
+        self.run_command("query --limit 3")
+        output, _ = self.run_command("metrics")
+        self.assertTrue(output.startswith("query --limit 3:"))
+        self.assertIn("3 yielded", output)
+
+    def test_metrics_after_every_command(self):
+        self.run_command("metrics on")
+        _, errors = self.run_command("inspect --pdes 1685")
+        self.assertIn("lookup", errors)
+        self.assertIn("peak memory", errors)
+        self.run_command("metrics off")
+        _, errors = self.run_command("inspect --pdes 1685")
+        self.assertEqual(errors, "")
+        output, _ = self.run_command("metrics all")
+        self.assertEqual(output.count("inspect --pdes 1685:"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
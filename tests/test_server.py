@@ -0,0 +1,168 @@
+"""Check that the query server answers requests like the command line does.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_server
+"""
+
+import contextlib
+import datetime
+import io
+import json
+import math
+import pathlib
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from server import DEFAULT_QUERY_LIMIT, MAX_QUERY_LIMIT, NEOServer
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} isn't valid JSON")
+
+
+def strict_json(text):
+    return json.loads(text, parse_constant=reject_constant)
+
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        cls.server = NEOServer(("127.0.0.1", 0), cls.db, workers=4)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def get(self, path):
+        with urllib.request.urlopen(self.url + path) as response:
+            self.assertEqual(response.headers["Content-Type"], "application/json")
+            return strict_json(response.read())
+
+    def get_error(self, path):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(self.url + path)
+        return context.exception.code, strict_json(context.exception.read())
+
+    def test_inspect_by_name_and_designation(self):
+        by_name = self.get("/inspect?name=Adonis")
+        self.assertEqual(by_name["neo"]["designation"], "2101")
+        self.assertNotIn("approaches", by_name)
+        by_pdes = self.get("/inspect?pdes=2101&verbose")
+        self.assertEqual(by_pdes["neo"], by_name["neo"])
+        self.assertEqual(
+            len(by_pdes["approaches"]),
+            len(self.db.get_neo_by_designation("2101").approaches),
+        )
+
+    def test_inspect_unknown_neo(self):
+        status, body = self.get_error("/inspect?name=Not-A-Real-Name")
+        self.assertEqual(status, 404)
+        self.assertIn("error", body)
+
+    def test_inspect_name_ignores_case_and_suggests_names(self):
+        self.assertEqual(self.get("/inspect?name=adonis")["neo"]["designation"], "2101")
+        status, body = self.get_error("/inspect?name=Adoniss")
+        self.assertEqual(status, 404)
+        self.assertIn("Did you mean: Adonis", body["error"])
+
+    def test_query_matches_database(self):
+        body = self.get("/query?start-date=2020-06-01&max-distance=0.2&hazardous&limit=5")
+        filters = create_filters(
+            start_date=datetime.date(2020, 6, 1), distance_max=0.2, hazardous=True
+        )
+        expected = [approach.serialize() for approach in self.db.query(filters)][:5]
+        self.assertEqual(body["count"], len(expected))
+        self.assertEqual(
+            [result["datetime_utc"] for result in body["results"]],
+            [result["datetime_utc"] for result in expected],
+        )
+
+    def test_query_limits(self):
+        body = self.get("/query?hazardous")
+        self.assertEqual(body["count"], DEFAULT_QUERY_LIMIT)
+        self.assertEqual(
+            [result["datetime_utc"] for result in body["results"]],
+            [
+                approach.time_str
+                for approach in self.db.query(create_filters(hazardous=True), limit=10)
+            ],
+        )
+        body = self.get(f"/query?limit={MAX_QUERY_LIMIT}")
+        self.assertEqual(body["count"], MAX_QUERY_LIMIT)
+        status, body = self.get_error(f"/query?limit={MAX_QUERY_LIMIT + 1}")
+        self.assertEqual(status, 400)
+        self.assertIn(str(MAX_QUERY_LIMIT), body["error"])
+
+    def test_unknown_diameters_are_null(self):
+        body = self.get(f"/query?limit={MAX_QUERY_LIMIT}")
+        diameters = [result["neo"]["diameter_km"] for result in body["results"]]
+        self.assertIn(None, diameters)
+        self.assertTrue(any(isinstance(diameter, float) for diameter in diameters))
+        neo = next(neo for neo in self.db._neos if math.isnan(neo.diameter))
+        body = self.get(f"/inspect?pdes={neo.designation}")
+        self.assertIsNone(body["neo"]["diameter_km"])
+
+    def test_sorted_query(self):
+        body = self.get("/query?max-distance=0.1&sort-by=velocity&desc&limit=4")
+        velocities = [result["velocity_km_s"] for result in body["results"]]
+        self.assertEqual(len(velocities), 4)
+        self.assertEqual(velocities, sorted(velocities, reverse=True))
+        fastest = max(
+            approach.velocity
+            for approach in self.db.query(create_filters(distance_max=0.1))
+        )
+        self.assertEqual(velocities[0], fastest)
+
+    def test_invalid_requests_are_rejected(self):
+        for path in (
+            "/query?sort-by=name",
+            "/query?desc",
+            "/query?date=yesterday",
+            "/query?min-distance=2&max-distance=1",
+            "/query?color=red",
+            "/inspect",
+        ):
+            with self.subTest(path=path):
+                status, body = self.get_error(path)
+                self.assertEqual(status, 400)
+                self.assertIn("error", body)
+        self.assertEqual(self.get_error("/nowhere")[0], 404)
+
+    def test_unexpected_errors_are_answered_as_json(self):
+        def fail(database, params):
+            raise RuntimeError("boom")
+
+        errors = io.StringIO()
+        with mock.patch.dict("server.ROUTES", {"/query": fail}):
+            with contextlib.redirect_stderr(errors):
+                status, body = self.get_error("/query")
+        self.assertEqual(status, 500)
+        self.assertEqual(body, {"error": "Internal server error."})
+        self.assertIn("RuntimeError: boom", errors.getvalue())
+
+    def test_concurrent_requests(self):
+        paths = ["/query?limit=3", "/inspect?name=Adonis", "/health"] * 10
+        with ThreadPoolExecutor(8) as pool:
+            responses = list(pool.map(self.get, paths))
+        self.assertEqual(responses[:3] * 10, responses)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""Check that a database shared between processes answers like the original.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_shared
+"""
+
+import datetime
+import multiprocessing
+import pathlib
+import unittest
+import warnings
+from multiprocessing.shared_memory import SharedMemory
+
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from shared import SharedDatabase, SharedStore, SharedStoreError
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+FILTERS = (
+    create_filters(),
+    create_filters(distance_max=0.1, velocity_min=5),
+    create_filters(start_date=datetime.date(2020, 6, 1), hazardous=True),
+    create_filters(date=datetime.date(2020, 1, 1)),
+    create_filters(diameter_min=0.5, hazardous=False),
+)
+
+
+def describe(approaches):
+    return [str(approach) for approach in approaches]
+
+
+def count_hazardous_approaches(name):
+    with SharedDatabase(name) as database:
+        approaches = len(database.get_neo_by_name("Toro").approaches)
+        return database.count(create_filters(hazardous=True)), approaches
+
+
+class TestSharedDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = NEODatabase(
+            load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, columnar=True)
+        )
+        cls.store = SharedStore(cls.db)
+        cls.shared = cls.store.attach()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.shared.close()
+        cls.store.close()
+
+    def test_neos_are_found_by_designation_and_name(self):
+        for neo in self.db._neos:
+            found = self.shared.get_neo_by_designation(neo.designation)
+            self.assertEqual(str(found), str(neo))
+            self.assertEqual(describe(found.approaches), describe(neo.approaches))
+            if neo.name:
+                self.assertEqual(
+                    str(self.shared.get_neo_by_name(neo.name)),
+                    str(self.db.get_neo_by_name(neo.name)),
+                )
+        self.assertIsNone(self.shared.get_neo_by_designation("not a designation"))
+        self.assertIsNone(self.shared.get_neo_by_name("Not A Name"))
+        self.assertIsNone(self.shared.get_neo_by_name(""))
+        self.assertEqual(self.shared.find_neos_by_name("toro")[0].name, "Toro")
+
+    def test_queries_match_the_original_database(self):
+        for filters in FILTERS:
+            for options in (
+                {},
+                {"sort_by": "date", "descending": True},
+                {"sort_by": "velocity", "limit": 5},
+            ):
+                with self.subTest(filters=filters, **options):
+                    self.assertEqual(
+                        describe(self.shared.query(filters, **options)),
+                        describe(self.db.query(filters, **options)),
+                    )
+        approach = next(self.shared.query())
+        self.assertEqual(approach.neo.designation, approach._designation)
+
+    def test_state_is_set_up_like_a_database(self):
+        # Only the lookups of NEOs are set up differently.
+        lookups = {"_neos_by_designation", "_neos_by_name", "_name_index"}
+        self.assertLessEqual(vars(self.db).keys() - vars(self.shared).keys(), lookups)
+        self.assertIsNotNone(self.shared._planner)
+
+    def test_shared_data_is_read_only(self):
+        with self.assertRaises(TypeError):
+            self.shared._approaches.distance[0] = 0.0
+
+    def test_worker_processes_attach_to_the_store(self):
+        expected = (
+            self.db.count(create_filters(hazardous=True)),
+            len(self.db.get_neo_by_name("Toro").approaches),
+        )
+        with multiprocessing.get_context().Pool(2) as pool:
+            results = pool.map(count_hazardous_approaches, [self.store.name] * 2)
+        self.assertEqual(results, [expected, expected])
+
+
+class TestSharedStore(unittest.TestCase):
+    def test_only_columnar_databases_are_shared(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        with self.assertRaises(ValueError):
+            SharedStore(db)
+
+    def test_load_and_close(self):
+        with SharedStore.load(TEST_NEO_FILE, TEST_CAD_FILE) as store:
+            name = store.name
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                with store.attach() as database:
+                    self.assertGreater(database.count(create_filters(hazardous=True)), 0)
+            self.assertEqual(caught, [])
+
+            with self.assertWarns(ResourceWarning):
+                with store.attach() as database:
+                    neo = database.get_neo_by_designation("1685")
+                    self.assertEqual(neo.name, "Toro")
+            database.close()
+            # Objects materialized from the block stay usable after detaching.
+            self.assertGreater(len(describe(neo.approaches)), 0)
+        with self.assertRaises(FileNotFoundError):
+            SharedDatabase(name)
+
+    def test_other_blocks_are_rejected(self):
+        block = SharedMemory(create=True, size=64)
+        try:
+            with self.assertRaises(SharedStoreError):
+                SharedDatabase(block.name)
+        finally:
+            block.close()
+            block.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Check that a loaded data set survives a round trip through a binary snapshot.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_snapshot
+"""
+
+import json
+import pathlib
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+from filters import create_filters
+from snapshot import (
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_VERSION,
+    SnapshotError,
+    fingerprint,
+    load_database,
+    read_snapshot,
+    snapshot_path,
+)
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class Touch:
+    """An object whose unpickling creates a file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return pathlib.Path.touch, (self.path,)
+
+
+def describe(database):
+    return sorted(str(approach) for approach in database.query(create_filters()))
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.neo_file = self.tmpdir / TEST_NEO_FILE.name
+        self.cad_file = self.tmpdir / TEST_CAD_FILE.name
+        shutil.copy(TEST_NEO_FILE, self.neo_file)
+        shutil.copy(TEST_CAD_FILE, self.cad_file)
+        self.path = snapshot_path(self.neo_file, self.cad_file)
+        self.expected = describe(load_database(self.neo_file, self.cad_file))
+
+    def sources(self):
+        return (fingerprint(self.neo_file), fingerprint(self.cad_file))
+
+    def test_snapshot_is_written_next_to_data_files(self):
+        load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        self.assertTrue(self.path.exists())
+        self.assertEqual(self.path.parent, self.cad_file.parent)
+
+    def test_snapshot_round_trips_with_either_storage(self):
+        load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                database = load_database(
+                    self.neo_file, self.cad_file, columnar=columnar, use_snapshot=True
+                )
+                self.assertEqual(describe(database), self.expected)
+                neo = database.get_neo_by_name("Adonis")
+                self.assertEqual(neo.designation, "2101")
+                self.assertGreater(len(neo.approaches), 0)
+
+    def test_snapshot_is_stale_after_source_changes(self):
+        load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        with open(self.neo_file, "a", encoding="utf-8") as file:
+            file.write("\n")
+        with self.assertRaises(SnapshotError):
+            read_snapshot(self.path, self.sources())
+
+        # Loading again replaces the stale snapshot.
+        database = load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        self.assertEqual(describe(database), self.expected)
+        read_snapshot(self.path, self.sources())
+
+    def test_corrupt_snapshot_is_rebuilt(self):
+        self.path.write_bytes(b"not a snapshot")
+        with self.assertRaises(SnapshotError):
+            read_snapshot(self.path, self.sources())
+        database = load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        self.assertEqual(describe(database), self.expected)
+
+    def snapshot(self, header):
+        header = json.dumps(header).encode("utf-8")
+        return (
+            SNAPSHOT_MAGIC
+            + SNAPSHOT_VERSION.to_bytes(4, "little")
+            + len(header).to_bytes(8, "little")
+            + header
+        )
+
+    def test_snapshot_of_another_shape_is_rebuilt(self):
+        load_database(self.neo_file, self.cad_file, use_snapshot=True)
+        complete = self.path.read_bytes()
+        sources = [list(source) for source in self.sources()]
+        valid = {
+            "byteorder": sys.byteorder,
+            "sources": sources,
+            "rows": 0,
+            "neos": [],
+            "orphans": [],
+        }
+        payloads = {
+            "truncated": complete[: len(complete) // 2],
+            "foreign": self.snapshot(["not", "a", "header"]),
+            "no sources": self.snapshot({"neos": []}),
+            "bad neos": self.snapshot({**valid, "neos": [["433"]]}),
+            "missing columns": self.snapshot({**valid, "rows": 10}),
+            "bad rows": self.snapshot({**valid, "rows": 1}) + bytes(24) + (
+                (5).to_bytes(8, sys.byteorder)
+            ),
+            "bad orphans": self.snapshot({**valid, "orphans": [[0, "433"]]}),
+            "other byte order": self.snapshot(
+                {**valid, "byteorder": "big" if sys.byteorder == "little" else "little"}
+            ),
+        }
+        for name, content in payloads.items():
+            with self.subTest(payload=name):
+                self.path.write_bytes(content)
+                with self.assertRaises(SnapshotError):
+                    read_snapshot(self.path, self.sources())
+                database = load_database(self.neo_file, self.cad_file, use_snapshot=True)
+                self.assertEqual(describe(database), self.expected)
+                read_snapshot(self.path, self.sources())
+
+    def test_snapshot_never_runs_code(self):
+        marker = self.tmpdir / "unpickled"
+        header = SNAPSHOT_MAGIC + SNAPSHOT_VERSION.to_bytes(4, "little")
+        payload = pickle.dumps(Touch(marker))
+        for content in (
+            header + payload,
+            header + len(payload).to_bytes(8, "little") + payload,
+            SNAPSHOT_MAGIC + (1).to_bytes(4, "little") + payload,
+        ):
+            self.path.write_bytes(content)
+            with self.assertRaises(SnapshotError):
+                read_snapshot(self.path, self.sources())
+        self.assertFalse(marker.exists())
+
+    def test_snapshot_is_raw_columns_after_a_json_header(self):
+        database = load_database(
+            self.neo_file, self.cad_file, columnar=True, use_snapshot=True
+        )
+        content = self.path.read_bytes()
+        start = len(SNAPSHOT_MAGIC) + 4
+        size = int.from_bytes(content[start : start + 8], "little")
+        header = json.loads(content[start + 8 : start + 8 + size])
+        self.assertEqual(header["rows"], len(database._approaches))
+        self.assertEqual(len(header["neos"]), len(database._neos))
+        self.assertEqual(
+            content[start + 8 + size :][: 8 * header["rows"]],
+            database._approaches.time.tobytes(),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
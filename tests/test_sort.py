@@ -0,0 +1,125 @@
+"""Check that ordered and top-k queries match a full sort of the matches.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_sort
+"""
+
+import datetime
+import math
+import pathlib
+import unittest
+
+from database import SORT_KEYS, NEODatabase
+from extract import load_approaches, load_neos
+from filters import create_filters
+from main import make_parser
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+# How to read the value each sort key orders by, from a CloseApproach.
+VALUES = {
+    "date": lambda approach: approach.time,
+    "distance": lambda approach: approach.distance,
+    "velocity": lambda approach: approach.velocity,
+    "diameter": lambda approach: approach.neo.diameter,
+}
+
+QUERIES = (
+    {},
+    {"distance_max": 0.1},
+    {"start_date": datetime.date(2020, 3, 1), "end_date": datetime.date(2020, 5, 31)},
+    {"date": datetime.date(2020, 6, 15)},
+    {"hazardous": True, "velocity_min": 10},
+)
+
+
+def expected_order(approaches, sort_by, descending):
+    """Sort approaches in full, keeping ties in their original order."""
+    value_of = VALUES[sort_by]
+    present = [approach for approach in approaches if value_of(approach) == value_of(approach)]
+    missing = [approach for approach in approaches if value_of(approach) != value_of(approach)]
+    return sorted(present, key=value_of, reverse=descending) + missing
+
+
+class TestSortedQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.neos = load_neos(TEST_NEO_FILE)
+        cls.approaches = load_approaches(TEST_CAD_FILE)
+        cls.databases = {
+            "objects": NEODatabase(cls.neos, cls.approaches),
+            "columnar": NEODatabase(
+                load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, columnar=True)
+            ),
+        }
+        cls.position = {approach: row for row, approach in enumerate(cls.approaches)}
+        for database in cls.databases.values():
+            database.cache = None
+
+    def assertOrdered(self, received, expected):
+        # Columnar databases materialize new objects, so compare their values.
+        self.assertEqual(
+            [(approach._designation, approach.time) for approach in received],
+            [(approach._designation, approach.time) for approach in expected],
+        )
+
+    def test_sorted_queries_match_a_full_sort(self):
+        for storage, database in self.databases.items():
+            for criteria in QUERIES:
+                filters = create_filters(**criteria)
+                # Ties are ordered by internal position, not by scan order.
+                matches = sorted(
+                    self.databases["objects"].query(filters), key=self.position.__getitem__
+                )
+                for sort_by in SORT_KEYS:
+                    for descending in (False, True):
+                        expected = expected_order(matches, sort_by, descending)
+                        with self.subTest(
+                            storage=storage, criteria=criteria, sort_by=sort_by, descending=descending
+                        ):
+                            received = list(database.query(filters, sort_by, descending))
+                            self.assertOrdered(received, expected)
+                            top = list(database.query(filters, sort_by, descending, limit=7))
+                            self.assertOrdered(top, expected[:7])
+
+    def test_missing_diameters_come_last(self):
+        database = self.databases["objects"]
+        for descending in (False, True):
+            results = list(database.query(sort_by="diameter", descending=descending))
+            diameters = [approach.neo.diameter for approach in results]
+            known = sum(1 for diameter in diameters if not math.isnan(diameter))
+            self.assertGreater(known, 0)
+            self.assertTrue(all(math.isnan(diameter) for diameter in diameters[known:]))
+
+    def test_limit_without_order(self):
+        database = self.databases["objects"]
+        self.assertEqual(list(database.query(limit=5)), self.approaches[:5])
+        self.assertEqual(len(list(database.query(limit=0))), len(self.approaches))
+
+    def test_unknown_sort_key(self):
+        with self.assertRaises(ValueError):
+            list(self.databases["objects"].query(sort_by="name"))
+
+
+class TestSortArguments(unittest.TestCase):
+    def setUp(self):
+        _, _, self.query, _ = make_parser()
+
+    def test_sort_options(self):
+        args = self.query.parse_args(["--sort-by", "velocity", "--desc", "--limit", "3"])
+        self.assertEqual(args.sort_by, "velocity")
+        self.assertTrue(args.desc)
+        args = self.query.parse_args([])
+        self.assertIsNone(args.sort_by)
+        self.assertFalse(args.desc)
+
+    def test_unknown_sort_option(self):
+        with self.assertRaises(SystemExit):
+            self.query.parse_args(["--sort-by", "name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
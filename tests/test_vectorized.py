@@ -0,0 +1,188 @@
+"""Check that vectorized queries match the row-by-row engine, or fall back to it.
+
+The vectorized engine is only used when NumPy is installed; without it, the
+tests of its results are skipped, and the columnar engine checks filters one
+row at a time.
+
+To run these tests from the project root, run:
+
+    $ python3 -m unittest --verbose tests.test_vectorized
+"""
+
+import datetime
+import operator
+import pathlib
+import unittest
+from array import array
+from unittest import mock
+
+from columnar import ApproachColumns
+from database import NEODatabase
+from extract import load_approaches, load_neos
+from filters import AttributeFilter, DateFilter, compile_filters, create_filters
+from models import CloseApproach, NearEarthObject
+from vectorized import VectorColumns, numpy
+
+TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
+TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
+TEST_CAD_FILE = TESTS_ROOT / "test-cad-2020.json"
+
+
+class DesignationFilter(AttributeFilter):
+    """A filter without a column, which has to be called on each approach."""
+
+    @classmethod
+    def get(cls, approach):
+        return approach._designation
+
+
+def columnar_database():
+    return NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE, columnar=True))
+
+
+FILTERS = {
+    "none": create_filters(),
+    "distance": create_filters(distance_min=0.05, distance_max=0.2),
+    "velocity and hazardous": create_filters(velocity_min=10, hazardous=True),
+    "not hazardous": create_filters(hazardous=False, velocity_max=5),
+    "diameter": create_filters(diameter_min=0.1, diameter_max=1.5),
+    "dates": create_filters(
+        start_date=datetime.date(2020, 3, 1),
+        end_date=datetime.date(2020, 6, 30),
+        distance_max=0.1,
+    ),
+    "date": create_filters(date=datetime.date(2020, 1, 1)),
+    "every criterion": create_filters(
+        start_date=datetime.date(2020, 1, 1),
+        distance_max=0.3,
+        velocity_min=5,
+        diameter_max=10,
+        hazardous=False,
+    ),
+    "no column": [DesignationFilter(operator.eq, "2102"), *create_filters(distance_max=0.5)],
+}
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestVectorizedQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db = columnar_database()
+        cls.rows_db = columnar_database()
+        cls.rows_db.vectorized = None
+
+    def setUp(self):
+        self.db.cache.clear()
+
+    def test_queries_match_the_row_by_row_engine(self):
+        for name, filters in FILTERS.items():
+            for options in ({}, {"sort_by": "date"}, {"sort_by": "distance", "limit": 5}):
+                with self.subTest(filters=name, **options):
+                    self.assertEqual(
+                        [str(approach) for approach in self.db.query(filters, **options)],
+                        [str(approach) for approach in self.rows_db.query(filters, **options)],
+                    )
+                    self.assertEqual(self.db.count(filters), self.rows_db.count(filters))
+
+    def test_masks_of_candidate_rows(self):
+        vectors = self.db.vectorized
+        filters = create_filters(distance_max=0.1)
+        mask = vectors.mask(filters)
+        self.assertEqual(len(mask), len(vectors))
+        self.assertEqual(vectors.select(filters, range(10, 20)), [
+            row for row in range(10, 20) if mask[row]
+        ])
+        self.assertEqual(vectors.select(filters, [30, 3, 12]), [
+            row for row in (30, 3, 12) if mask[row]
+        ])
+        self.assertTrue(vectors.mask((), range(5)).all())
+
+    def test_matches_are_cached_complete(self):
+        filters = create_filters(velocity_min=20)
+        first = [str(approach) for approach in self.db.query(filters, limit=1)]
+        entry = self.db.cache.get(self.db.cache.key(filters))
+        self.assertTrue(entry.complete)
+        self.assertEqual(len(entry.rows), self.rows_db.count(filters))
+        hits = self.db.cache.hits
+        self.assertEqual([str(approach) for approach in self.db.query(filters, limit=1)], first)
+        self.assertEqual(self.db.cache.hits, hits + 1)
+
+
+class TestApproachesWithoutTime(unittest.TestCase):
+    FILTERS = {
+        "before": [DateFilter(operator.lt, datetime.date(2000, 1, 1))],
+        "until": [DateFilter(operator.le, datetime.date(2030, 1, 1))],
+        "after": [DateFilter(operator.gt, datetime.date(2000, 1, 1))],
+        "not on": [DateFilter(operator.ne, datetime.date(2020, 1, 1))],
+    }
+
+    # The approach without a time only passes `!=`, like a NaN day.
+    EXPECTED = {"before": [], "until": [1], "after": [1], "not on": [0, 1]}
+
+    def database(self, storage):
+        approaches = [
+            CloseApproach(designation="1", time=None, distance=0.1, velocity=1.0),
+            CloseApproach(
+                designation="1", time="2020-Jan-02 12:00", distance=0.2, velocity=2.0
+            ),
+        ]
+        if storage != "objects":
+            approaches = ApproachColumns.from_approaches(approaches)
+        db = NEODatabase([NearEarthObject(designation="1")], approaches)
+        if storage == "compiled":
+            db.vectorized = None
+        return db
+
+    def check(self, db, matcher):
+        for name, filters in self.FILTERS.items():
+            with self.subTest(filters=name):
+                expected = self.EXPECTED[name]
+                self.assertEqual(
+                    [approach.distance for approach in db.query(filters)],
+                    [[0.1, 0.2][row] for row in expected],
+                )
+                self.assertEqual(db.count(filters), len(expected))
+                match = matcher(filters)
+                self.assertEqual([row for row in (0, 1) if match(row)], expected)
+
+    def test_compiled_predicates(self):
+        db = self.database("objects")
+
+        def matcher(filters):
+            predicate = compile_filters(filters)
+            return lambda row: predicate(db._approaches[row])
+
+        self.check(db, matcher)
+        db = self.database("compiled")
+        self.check(db, db._approaches.matcher)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_vectorized_masks(self):
+        db = self.database("vectorized")
+        self.check(db, db.vectorized.matcher)
+        approaches = db._approaches
+        vectors = VectorColumns(approaches, days=array("q", approaches.days()))
+        self.check(db, vectors.matcher)
+
+
+class TestFallback(unittest.TestCase):
+    def test_columnar_queries_without_numpy(self):
+        with mock.patch("database.numpy", None):
+            db = columnar_database()
+        self.assertIsNone(db.vectorized)
+        filters = FILTERS["every criterion"]
+        self.assertEqual(len(list(db.query(filters))), db.count(filters))
+        self.assertGreater(db.count(filters), 0)
+
+    def test_object_storage_is_not_vectorized(self):
+        db = NEODatabase(load_neos(TEST_NEO_FILE), load_approaches(TEST_CAD_FILE))
+        self.assertIsNone(db.vectorized)
+
+    def test_vector_columns_require_numpy(self):
+        with mock.patch("vectorized.numpy", None):
+            with self.assertRaises(RuntimeError):
+                VectorColumns(load_approaches(TEST_CAD_FILE, columnar=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,7 +27,7 @@ import unittest.mock
 
 from database import NEODatabase
 from extract import load_approaches, load_neos
-from write import write_to_csv, write_to_json
+from write import write_to_csv, write_to_json, write_to_json_streaming, write_to_ndjson
 
 TESTS_ROOT = (pathlib.Path(__file__).parent).resolve()
 TEST_NEO_FILE = TESTS_ROOT / "test-neos-2020.csv"
@@ -254,5 +254,66 @@ class TestWriteToJSON(unittest.TestCase):
         self.assertIsInstance(approach["neo"]["potentially_hazardous"], bool)
 
 
+class TestJSONEncoding(unittest.TestCase):
+    def expected(self, results):
+        records = (
+            json.dumps(approach.serialize(), indent=2, separators=(",", ": "))
+            for approach in results
+        )
+        return "[\n" + ",\n".join(records) + "\n]"
+
+    def test_output_matches_json_dump(self):
+        results = build_results(50)
+        writers = {
+            "write_to_json": lambda results: write_to_json(
+                results, None, flush_interval=0, flush_bytes=1
+            ),
+            "write_to_json_streaming": lambda results: write_to_json_streaming(
+                results, None
+            ),
+        }
+        for name, write in writers.items():
+            with self.subTest(writer=name):
+                with UncloseableStringIO() as buf:
+                    with unittest.mock.patch("write.open", return_value=buf):
+                        write(results)
+                    self.assertEqual(buf.getvalue(), self.expected(results))
+                    self.assertIn("NaN", buf.getvalue())
+
+    def test_flush_is_checked_once_per_batch(self):
+        results = build_results(50)
+        with UncloseableStringIO() as buf:
+            with (
+                unittest.mock.patch("write.open", return_value=buf),
+                unittest.mock.patch("write.JSON_BATCH_SIZE", 10),
+                unittest.mock.patch.object(buf, "flush") as flush,
+            ):
+                write_to_json(results, None, flush_interval=0)
+            self.assertEqual(flush.call_count, 5)
+            self.assertEqual(buf.getvalue(), self.expected(results))
+
+    def test_ndjson_has_one_compact_object_per_line(self):
+        results = build_results(50)
+        with UncloseableStringIO() as buf:
+            with unittest.mock.patch("write.open", return_value=buf):
+                write_to_ndjson(results, None, flush_interval=0, flush_bytes=1)
+            lines = buf.getvalue().splitlines(keepends=True)
+        self.assertEqual(len(lines), len(results))
+        for line, approach in zip(lines, results):
+            self.assertEqual(
+                line, json.dumps(approach.serialize(), separators=(",", ":")) + "\n"
+            )
+        self.assertEqual(
+            [json.loads(line)["datetime_utc"] for line in lines],
+            [approach.time_str for approach in results],
+        )
+
+    def test_empty_output_is_an_empty_array(self):
+        with UncloseableStringIO() as buf:
+            with unittest.mock.patch("write.open", return_value=buf):
+                write_to_json([], None)
+            self.assertEqual(json.loads(buf.getvalue()), [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -117,6 +117,20 @@ def validate_limit(limit: int | None) -> None:
         raise ValidationError(f"Limit {limit} must be a positive integer")
 
 
+def validate_sort(sort_by: str | None, descending: bool) -> None:
+    """Validate that a descending order is only requested along with a sort key.
+
+    Args:
+        sort_by: The attribute to order results by, or None.
+        descending: Whether a descending order was requested.
+
+    Raises:
+        ValidationError: If a descending order is requested without a sort key.
+    """
+    if descending and sort_by is None:
+        raise ValidationError("--desc requires --sort-by")
+
+
 def validate_file_path(file_path: str | pathlib.Path, must_exist: bool = False) -> pathlib.Path:
     """Validate that a file path is valid and optionally exists.
 
@@ -201,7 +215,10 @@ def validate_query_arguments(args: argparse.Namespace) -> None:
     validate_diameter_range(args.diameter_min, args.diameter_max)
 
     # Validate limit
-    validate_limit(args.limit)
+    validate_limit(getattr(args, 'limit', None))
+
+    # Validate ordering
+    validate_sort(getattr(args, 'sort_by', None), getattr(args, 'desc', False))
 
     # Validate output file if provided
     if hasattr(args, 'outfile') and args.outfile:
@@ -0,0 +1,190 @@
+"""Evaluate filters on whole columns at once, with NumPy when it is installed.
+
+The columnar storage engine checks a query's filters one row at a time, with a
+compiled predicate. When NumPy is importable, a `VectorColumns` instead views
+the columns of an `ApproachColumns` as NumPy arrays - without copying them - and
+evaluates each filter as a single comparison over every candidate row:
+
+- a filter on `time`, `distance` or `velocity` compares the whole column with
+  its reference value, producing a boolean mask (the day of an approach without
+  a known time is NaN, which fails every comparison but `!=`, as in the
+  row-by-row engines);
+- a filter on a per-NEO attribute (`diameter` or `hazardous`) is compared once
+  per NEO, and the per-NEO results are gathered into a mask through the `neo`
+  column;
+- the masks of all of the filters are combined with `&`, and the matching rows
+  are resolved from the combined mask in one shot.
+
+The time spent in the interpreter is then proportional to the number of filters
+rather than to the number of rows, so a multi-criteria scan of every close
+approach takes milliseconds.
+
+NumPy is an optional dependency: without it, `numpy` is None, `NEODatabase`
+doesn't create a `VectorColumns`, and queries fall back to row predicates.
+"""
+
+import operator
+
+from columnar import MISSING_TIME
+from helpers import EPOCH_DAY, MINUTES_PER_DAY
+from index import TimeIndex
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; filters are then checked row by row.
+    numpy = None
+
+# The comparators that apply element-wise to NumPy arrays.
+VECTOR_OPERATORS = frozenset(
+    (operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge)
+)
+
+# The columns that hold an attribute of each row's NEO, indexed by the `neo` column.
+NEO_COLUMNS = ("diameter", "hazardous")
+
+
+class VectorColumns:
+    """NumPy views of the columns of an `ApproachColumns`, to filter rows in bulk.
+
+    The views share memory with the typed arrays of the `ApproachColumns`,
+    which therefore can't be resized while the views exist; build a
+    `VectorColumns` once the columns are complete and linked.
+    """
+
+    def __init__(self, columns, days=None):
+        """Create NumPy views of the columns of a linked `ApproachColumns`.
+
+        Args:
+            columns: A linked `columnar.ApproachColumns`.
+            days: The day ordinal of every row, as a typed array or memoryview
+                to view, with `TimeIndex.MISSING` for approaches without a
+                known time, or None to compute them from the `time` column.
+
+        Raises:
+            RuntimeError: If NumPy isn't installed.
+        """
+        if numpy is None:
+            raise RuntimeError("Vectorized queries require NumPy.")
+        self._columns = columns
+        if days is None:
+            # Day ordinals take a single pass to compute, and every date filter reads them.
+            time = _view(columns.time)
+            days, missing = time // MINUTES_PER_DAY + EPOCH_DAY, time == MISSING_TIME
+        else:
+            days = _view(days)
+            missing = days == TimeIndex.MISSING
+        if missing.any():
+            # Only then are the days copied, as floats, to make the missing ones NaN.
+            days = days.astype(float)
+            days[missing] = numpy.nan
+        self._values = {
+            "day": days,
+            "distance": _view(columns.distance),
+            "velocity": _view(columns.velocity),
+        }
+        self._neo_values = {
+            "diameter": _view(columns.neo_diameter),
+            "hazardous": _view(columns.neo_hazardous),
+        }
+        self._neo = _view(columns.neo)
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self._neo)
+
+    def mask(self, filters, rows=None):
+        """Compute which rows pass all of a collection of filters.
+
+        Filters that name a supported `column`, with a comparator that applies
+        element-wise, are evaluated on the columns; any other filter is called
+        on the materialized `CloseApproach` of each row.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+            rows: The candidate rows, as a `range` or an array of rows, or
+                None for every row.
+
+        Returns:
+            numpy.ndarray: One boolean per candidate row, in the order of `rows`.
+        """
+        positions = self._positions(rows)
+        mask = None
+        for filter_obj in filters:
+            passed = self._filter_mask(filter_obj, positions, rows)
+            if mask is None:
+                mask = passed
+            else:
+                mask &= passed
+        if mask is None:
+            count = len(self) if rows is None else len(rows)
+            mask = numpy.ones(count, dtype=bool)
+        return mask
+
+    def select(self, filters, rows=None):
+        """Find the rows that pass all of a collection of filters.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+            rows: The candidate rows, as a `range` or an array of rows, or
+                None for every row.
+
+        Returns:
+            list: The matching rows, as ints, in the order of `rows`.
+        """
+        matches = numpy.flatnonzero(self.mask(filters, rows))
+        if rows is None:
+            return matches.tolist()
+        if isinstance(rows, range) and rows.step == 1:
+            return (matches + rows.start).tolist()
+        return numpy.asarray(rows, dtype=numpy.int64)[matches].tolist()
+
+    def matcher(self, filters):
+        """Build a predicate on rows that checks all of a collection of filters.
+
+        Every row is checked up front, so the predicate is a list lookup.
+
+        Args:
+            filters: A collection of filters capturing user-specified criteria.
+
+        Returns:
+            callable: A 1-argument function from a row to whether it matches.
+        """
+        return self.mask(filters).tolist().__getitem__
+
+    @staticmethod
+    def _positions(rows):
+        """Return how to read the candidate rows out of a whole column.
+
+        A contiguous `range` becomes a slice, which NumPy reads without copying;
+        any other candidates become an array of rows, for a gather.
+        """
+        if rows is None:
+            return slice(None)
+        if isinstance(rows, range) and rows.step == 1:
+            return slice(rows.start, rows.stop)
+        return numpy.asarray(rows, dtype=numpy.int64)
+
+    def _filter_mask(self, filter_obj, positions, rows):
+        """Evaluate one filter on the candidate rows, as a new boolean array."""
+        column = filter_obj.column
+        if filter_obj.op not in VECTOR_OPERATORS or not (
+            column in self._values or column in NEO_COLUMNS
+        ):
+            approach_at = self._columns.__getitem__
+            candidates = range(len(self)) if rows is None else rows
+            return numpy.fromiter(
+                (bool(filter_obj(approach_at(row))) for row in candidates),
+                dtype=bool,
+                count=len(candidates),
+            )
+
+        value = filter_obj.key(filter_obj.value)
+        if column in NEO_COLUMNS:
+            # Compare once per NEO, then look each row's NEO up in the result.
+            return filter_obj.op(self._neo_values[column], value)[self._neo[positions]]
+        return numpy.asarray(filter_obj.op(self._values[column][positions], value))
+
+
+def _view(column):
+    """View a typed array as a NumPy array of the same type, without copying it."""
+    return numpy.asarray(memoryview(column))
@@ -3,21 +3,52 @@
 This module exports functions for writing close approach data to files,
 including streaming-friendly JSON output and improved error handling.
 
-The main functions are write_to_csv and write_to_json, each of
-which accept a results stream of close approaches and a path to which to
-write the data.
+The main functions are write_to_csv, write_to_json and write_to_ndjson, each
+of which accept a results stream of close approaches and a path to which to
+write the data. The NDJSON (JSON Lines) writer emits one compact JSON object
+per line, which downstream tools can stream, split and process in parallel.
 
 These functions are invoked by the main module with the output of the limit
 function and the filename supplied by the user at the command line. The file's
-extension determines which of these functions is used.
+extension determines which of these functions is used. An additional `.gz`,
+`.bz2` or `.xz` extension compresses the output with that codec.
 """
 
 import csv
 import json
 import sys
+import time
 from collections.abc import Iterable
 from pathlib import Path
 
+from compression import compression_of, open_file
+
+# The header of CSV output files, matching the values of `serialize_row`.
+CSV_FIELDS = (
+    "datetime_utc",
+    "distance_au",
+    "velocity_km_s",
+    "designation",
+    "name",
+    "diameter_km",
+    "potentially_hazardous",
+)
+
+# How many rows are buffered before each call to `csv.writer.writerows`.
+CSV_BATCH_SIZE = 4096
+
+# How JSON output is buffered: the size of the file buffer, how many records
+# are encoded per write, and when `write_to_json_streaming` flushes by default.
+JSON_BUFFER_SIZE = 1 << 20
+JSON_BATCH_SIZE = 1024
+JSON_FLUSH_INTERVAL = 1.0
+JSON_FLUSH_BYTES = 1 << 20
+
+# The encoders of the records of JSON output, laid out as by `json.dump` with
+# `indent=2`, and of the lines of JSON Lines output.
+_JSON_ENCODER = json.JSONEncoder(indent=2, separators=(",", ": "))
+_COMPACT_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
 
 def write_to_csv(results: Iterable, filename: str | Path) -> None:
     """Write an iterable of CloseApproach objects to a CSV file.
@@ -26,6 +57,10 @@ def write_to_csv(results: Iterable, filename: str | Path) -> None:
     corresponds to the information in a single close approach from the results
     stream and its associated near-Earth object.
 
+    Rows are built as flat tuples with `serialize_row` and written in batches
+    of `CSV_BATCH_SIZE` with `csv.writer.writerows`, rather than one nested
+    dictionary per approach through a `csv.DictWriter`; the output is the same.
+
     Args:
         results: An iterable of CloseApproach objects.
         filename: A Path-like object pointing to where the data should be saved.
@@ -34,43 +69,32 @@ def write_to_csv(results: Iterable, filename: str | Path) -> None:
         IOError: If the file cannot be written.
         ValueError: If the data cannot be serialized.
     """
-    fieldnames = (
-        "datetime_utc",
-        "distance_au",
-        "velocity_km_s",
-        "designation",
-        "name",
-        "diameter_km",
-        "potentially_hazardous",
-    )
-
     try:
-        with open(filename, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
+        with _open(filename, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_FIELDS)
 
+            batch = []
             for approach in results:
                 try:
-                    data = approach.serialize()
-                    # Flatten the nested neo data for CSV
-                    row = {
-                        "datetime_utc": data["datetime_utc"],
-                        "distance_au": data["distance_au"],
-                        "velocity_km_s": data["velocity_km_s"],
-                        "designation": data["neo"]["designation"],
-                        "name": data["neo"]["name"],
-                        "diameter_km": data["neo"]["diameter_km"],
-                        "potentially_hazardous": data["neo"]["potentially_hazardous"],
-                    }
-                    writer.writerow(row)
-                except (AttributeError, KeyError) as e:
+                    batch.append(approach.serialize_row())
+                except AttributeError as e:
                     print(f"Warning: Skipping invalid approach data: {e}", file=sys.stderr)
                     continue
+                if len(batch) >= CSV_BATCH_SIZE:
+                    writer.writerows(batch)
+                    batch.clear()
+            writer.writerows(batch)
     except OSError as e:
         raise OSError(f"Failed to write CSV file {filename}: {e}") from e
 
 
-def write_to_json(results: Iterable, filename: str | Path) -> None:
+def write_to_json(
+    results: Iterable,
+    filename: str | Path,
+    flush_interval: float | None = None,
+    flush_bytes: int | None = None,
+) -> None:
     """Write an iterable of CloseApproach objects to a JSON file.
 
     The precise output specification is in README.md. Roughly, the output is a
@@ -78,71 +102,164 @@ def write_to_json(results: Iterable, filename: str | Path) -> None:
     their values and the 'neo' key mapping to a dictionary of the associated
     NEO's attributes.
 
+    Records are encoded in batches of `JSON_BATCH_SIZE` with a shared
+    `json.JSONEncoder` and written through a large buffer. By default, the file
+    is only flushed when the buffer fills up or the file is closed.
+
     Args:
         results: An iterable of CloseApproach objects.
         filename: A Path-like object pointing to where the data should be saved.
+        flush_interval: If given, flush at least this often, in seconds.
+        flush_bytes: If given, flush after writing this many characters.
 
     Raises:
         IOError: If the file cannot be written.
         ValueError: If the data cannot be serialized.
     """
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write("[\n")
-            first = True
-
-            for approach in results:
-                try:
-                    if not first:
-                        file.write(",\n")
-                    else:
-                        first = False
-
-                    data = approach.serialize()
-                    json.dump(data, file, indent=2, separators=(',', ': '))
-                except (AttributeError, TypeError) as e:
-                    print(f"Warning: Skipping invalid approach data: {e}", file=sys.stderr)
-                    continue
-
-            file.write("\n]")
+        _write_records(
+            results,
+            filename,
+            _encode_records,
+            ("[\n", ",\n", "\n]"),
+            flush_interval,
+            flush_bytes,
+        )
     except OSError as e:
         raise OSError(f"Failed to write JSON file {filename}: {e}") from e
 
 
 def write_to_json_streaming(results: Iterable, filename: str | Path) -> None:
-    """Write an iterable of CloseApproach objects to a JSON file using streaming.
+    """Write an iterable of CloseApproach objects to a JSON file, flushing it regularly.
+
+    The output is exactly as written by `write_to_json`, but the file is
+    flushed every `JSON_FLUSH_INTERVAL` seconds or `JSON_FLUSH_BYTES`
+    characters, whichever comes first, so that a reader following the file
+    sees results as they are found.
+
+    Args:
+        results: An iterable of CloseApproach objects.
+        filename: A Path-like object pointing to where the data should be saved.
+    """
+    write_to_json(results, filename, JSON_FLUSH_INTERVAL, JSON_FLUSH_BYTES)
+
+
+def write_to_ndjson(
+    results: Iterable,
+    filename: str | Path,
+    flush_interval: float | None = JSON_FLUSH_INTERVAL,
+    flush_bytes: int | None = JSON_FLUSH_BYTES,
+) -> None:
+    """Write an iterable of CloseApproach objects to a JSON Lines (NDJSON) file.
 
-    This function writes data incrementally, making it memory-efficient for
-    large datasets. The output is a JSON array with each approach as a separate
-    object.
+    Each line of the output is one compact JSON object, with the same keys and
+    values as the elements of the array written by `write_to_json`. Unlike
+    that array, the output can be appended to, split by line, tailed while it
+    is written, and processed one record at a time.
+
+    Like `write_to_json_streaming`, the file is flushed regularly.
 
     Args:
         results: An iterable of CloseApproach objects.
         filename: A Path-like object pointing to where the data should be saved.
+        flush_interval: Flush at least this often, in seconds (None for never).
+        flush_bytes: Flush after writing this many characters (None for never).
 
     Raises:
         IOError: If the file cannot be written.
         ValueError: If the data cannot be serialized.
     """
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write("[\n")
-            first = True
+        _write_records(
+            results,
+            filename,
+            _encode_lines,
+            ("", "", ""),
+            flush_interval,
+            flush_bytes,
+        )
+    except OSError as e:
+        raise OSError(f"Failed to write NDJSON file {filename}: {e}") from e
 
-            for approach in results:
-                try:
-                    if not first:
-                        file.write(",\n")
-                    else:
-                        first = False
-
-                    data = approach.serialize()
-                    json.dump(data, file, indent=2, separators=(',', ': '))
-                    file.flush()  # Ensure data is written immediately
-                except (AttributeError, TypeError) as e:
-                    print(f"Warning: Skipping invalid approach data: {e}", file=sys.stderr)
-                    continue
 
-            file.write("\n]")
-    except OSError as e:
-        raise OSError(f"Failed to write streaming JSON file {filename}: {e}") from e
+def _write_records(results, filename, encode, delimiters, flush_interval, flush_bytes):
+    """Write close approaches as encoded records, in batches, through a large buffer.
+
+    Each approach is serialized with `serialize`, and each batch of up to
+    `JSON_BATCH_SIZE` records is encoded and written at once. Whether the file
+    is due to be flushed is checked after each batch.
+
+    Args:
+        results: An iterable of CloseApproach objects.
+        filename: A Path-like object pointing to where the data should be saved.
+        encode: A function from a list of serialized approaches to their
+            encoded records, separated by the text written between records.
+        delimiters: The text written before the records, between records, and
+            after the records.
+        flush_interval: If given, flush at least this often, in seconds.
+        flush_bytes: If given, flush after writing this many characters.
+    """
+    opening, between, closing = delimiters
+    with _open(filename, "w", encoding="utf-8", buffering=JSON_BUFFER_SIZE) as file:
+        file.write(opening)
+        separator = ""
+        unflushed = 0
+        last_flush = time.monotonic()
+        for batch in _serialized_batches(results):
+            text = separator + encode(batch)
+            file.write(text)
+            separator = between
+            unflushed += len(text)
+            if (flush_bytes is not None and unflushed >= flush_bytes) or (
+                flush_interval is not None
+                and time.monotonic() - last_flush >= flush_interval
+            ):
+                file.flush()
+                unflushed = 0
+                last_flush = time.monotonic()
+        file.write(closing)
+
+
+def _serialized_batches(results):
+    """Serialize close approaches, in lists of up to `JSON_BATCH_SIZE` records.
+
+    Approaches that can't be serialized are skipped with a warning.
+    """
+    batch = []
+    for approach in results:
+        try:
+            batch.append(approach.serialize())
+        except AttributeError as e:
+            print(f"Warning: Skipping invalid approach data: {e}", file=sys.stderr)
+            continue
+        if len(batch) >= JSON_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_records(batch):
+    """Encode serialized approaches as consecutive elements of a JSON array.
+
+    The batch is encoded as a whole. The encoder escapes the newlines within
+    strings, so each newline of its output lays out the array: removing the
+    array's brackets and one level of indentation leaves the records laid
+    out as by `json.dumps(record, indent=2)`, separated by ",\\n".
+    """
+    return _JSON_ENCODER.encode(batch)[4:-2].replace("\n  ", "\n")
+
+
+def _encode_lines(batch):
+    """Encode serialized approaches as lines of compact JSON."""
+    return "".join([_COMPACT_JSON_ENCODER.encode(record) + "\n" for record in batch])
+
+
+def _open(filename, mode, **kwargs):
+    """Open an output file, compressing it if its suffix names a codec.
+
+    Uncompressed files are opened with the built-in `open`.
+    """
+    if compression_of(filename) is not None:
+        return open_file(filename, mode, **kwargs)
+    return open(filename, mode, **kwargs)